@@ -7,7 +7,11 @@ from src.tools import (
     create_patent_tool,
     create_clinical_trials_tool,
     create_internal_knowledge_tool,
-    create_web_search_tool
+    create_web_search_tool,
+    create_opportunity_tool,
+    create_class_trends_tool,
+    create_competitor_landscape_tool,
+    create_patent_expiry_tool
 )
 import os
 
@@ -56,9 +60,15 @@ def create_iqvia_agent() -> Agent:
         - Handling currency fluctuations by normalizing revenue to USD using annual exchange rates
         - Implementing fuzzy matching to handle spelling variations (e.g., Acetaminophen vs Paracetamol)
         - Flagging Year-to-Date (YTD) data and estimating full-year figures using Q1-Q3 annualized run rates
+        - Ranking opportunities, therapy class trends and competitor landscapes by therapy area and country
         
         You excel at translating raw market numbers into actionable competitive insights.""",
-        tools=[create_iqvia_tool()],
+        tools=[
+            create_iqvia_tool(),
+            create_opportunity_tool(),
+            create_class_trends_tool(),
+            create_competitor_landscape_tool()
+        ],
         llm=llm,
         verbose=True
     )
@@ -98,7 +108,7 @@ def create_patent_agent() -> Agent:
         - Jurisdiction Logic: Prioritize US, EU5, and Japan for global FTO assessments; group "Rest of World" to prevent data overload
         
         You generate risk-flagged timelines (🔴 High Risk, 🟡 Medium Risk, 🟢 Low Risk) for patent expiry analysis.""",
-        tools=[create_patent_tool()],
+        tools=[create_patent_tool(), create_patent_expiry_tool()],
         llm=llm,
         verbose=True
     )
@@ -1,11 +1,18 @@
 """Application Factory - Create and Configure Flask App"""
-from flask import Flask
+from flask import Flask, g
 from flask_cors import CORS
-from src.config import FLASK_DEBUG, ENABLE_CORS, ALLOWED_ORIGINS
+from src.config import FLASK_DEBUG, ENABLE_CORS, ALLOWED_ORIGINS, DATA_WATCH_INTERVAL
 from src.routes import health_bp, chat_bp
 from src.routes.auth_flask import bp as auth_bp
 from src.routes.projects_flask import bp as projects_bp
 from src.routes.agents_flask import bp as agents_bp
+from src.routes.data_flask import bp as data_bp
+from src.data.aggregates import build_all_aggregates
+from src.data.index import build_all_indexes
+from src.data.quality import build_all_quality_profiles
+from src.data.trade_analytics import section_analytics
+from src.data.registry import dataset_registry
+from src.data.resolver import molecule_resolver
 
 
 def create_app():
@@ -34,6 +41,39 @@ def create_app():
     app.register_blueprint(auth_bp)
     app.register_blueprint(projects_bp)
     app.register_blueprint(agents_bp)
+    app.register_blueprint(data_bp)
+
+    # Parse the bundled datasets and build their molecule indexes, aggregates, quality profiles,
+    # trade series and name resolver up front
+    build_all_indexes()
+    build_all_aggregates()
+    build_all_quality_profiles()
+    section_analytics()
+    molecule_resolver()
+
+    # Refreshed data files are reloaded in the background and swapped in whole;
+    # each request reads the snapshot that was current when it started
+    dataset_registry.on_refresh(molecule_resolver)
+    dataset_registry.start_watching(DATA_WATCH_INTERVAL)
+
+    @app.before_request
+    def pin_data_snapshot():
+        g.data_snapshot_token = dataset_registry.pin_snapshot()
+
+    @app.after_request
+    def add_data_version(response):
+        response.headers['X-Data-Version'] = str(dataset_registry.version)
+        return response
+
+    @app.teardown_request
+    def unpin_data_snapshot(error=None):
+        token = g.pop('data_snapshot_token', None)
+        if token is not None:
+            try:
+                dataset_registry.unpin(token)
+            except ValueError:
+                # Streamed responses finish in a different context; nothing left to reset
+                pass
 
     # Global error handlers
     @app.errorhandler(404)
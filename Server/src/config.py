@@ -48,6 +48,80 @@ FLASK_PORT = int(os.getenv("FLASK_PORT", "5001"))
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 ENABLE_CORS = os.getenv("ENABLE_CORS", True)
 
+# Agent tool results: "compact" (tables, no indentation or boilerplate, token budget)
+# or "json" (indented, complete)
+TOOL_OUTPUT_MODE = os.getenv("TOOL_OUTPUT_MODE", "compact").lower()
+TOOL_OUTPUT_MAX_TOKENS = int(os.getenv("TOOL_OUTPUT_MAX_TOKENS", "3000"))
+# Tool results are cached across requests: "memory" (per process), "sqlite" (shared by
+# workers; default path <compiled dir>/tool_cache.sqlite) or "off"
+TOOL_CACHE_BACKEND = os.getenv("TOOL_CACHE_BACKEND", "memory").lower()
+TOOL_CACHE_PATH = os.getenv("TOOL_CACHE_PATH", "")
+TOOL_CACHE_TTL = float(os.getenv("TOOL_CACHE_TTL", "3600"))
+TOOL_CACHE_MAX_MB = float(os.getenv("TOOL_CACHE_MAX_MB", "64"))
+# Worker agents' first tool lookups run concurrently before crew kickoff and are embedded
+# in their task descriptions, saving each agent an LLM round-trip
+CREW_PREFETCH = os.getenv("CREW_PREFETCH", "true").lower() == "true"
+# Full chat responses are cached in memory and on disk (default <compiled dir>/chat_cache.sqlite).
+# Entries are fresh for CHAT_CACHE_TTL seconds, then served for up to CHAT_CACHE_MAX_STALE more
+# seconds while the crew re-runs in the background
+CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "true").lower() == "true"
+CHAT_CACHE_PATH = os.getenv("CHAT_CACHE_PATH", "")
+CHAT_CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL", "21600"))
+CHAT_CACHE_MAX_STALE = float(os.getenv("CHAT_CACHE_MAX_STALE", "604800"))
+CHAT_CACHE_MEMORY_ENTRIES = int(os.getenv("CHAT_CACHE_MEMORY_ENTRIES", "128"))
+CHAT_CACHE_MAX_MB = float(os.getenv("CHAT_CACHE_MAX_MB", "256"))
+
+# Data Layer Configuration
+# Point DATA_DIR at a generated directory (python -m src.data synth) for load testing
+DATA_DIR = os.getenv("DATA_DIR", "")
+# Compiled (memory-mapped) datasets are used when present and up to date
+DATA_COMPILED_DIR = os.getenv("DATA_COMPILED_DIR", "")
+USE_COMPILED_DATA = os.getenv("USE_COMPILED_DATA", "true").lower() == "true"
+# Files at least this large are stream-compiled on first load instead of json.load (0 disables)
+STREAM_COMPILE_MIN_MB = int(os.getenv("STREAM_COMPILE_MIN_MB", "64"))
+# Synthetic results for unknown molecules are seeded from the molecule name and memoized
+DETERMINISTIC_FALLBACK_DATA = os.getenv("DETERMINISTIC_FALLBACK_DATA", "true").lower() == "true"
+FALLBACK_CACHE_SIZE = int(os.getenv("FALLBACK_CACHE_SIZE", "1024"))
+# Clinical trials are queried through an indexed SQLite copy, one file per data version
+# (default: <compiled dir>/trials-<version>.sqlite)
+TRIAL_STORE_ENABLED = os.getenv("TRIAL_STORE_ENABLED", "true").lower() == "true"
+TRIAL_STORE_PATH = os.getenv("TRIAL_STORE_PATH", "")
+# Records last updated more than this many days ago are flagged as stale in data quality profiles
+DATA_STALE_DAYS = int(os.getenv("DATA_STALE_DAYS", "365"))
+# Seconds between checks for refreshed data files (0: stat the file on every access instead)
+DATA_WATCH_INTERVAL = float(os.getenv("DATA_WATCH_INTERVAL", "2"))
+BATCH_MAX_MOLECULES = int(os.getenv("BATCH_MAX_MOLECULES", "500"))
+# Market, trade, patent and trial sources: "local" (bundled datasets) or "http"
+# DATA_SOURCE_URLS: "iqvia=http://host:8701,exim=...,patents=...,clinical_trials=...,web=..."
+# (python -m src.data standin serves the bundled data at these paths for offline runs)
+DATA_SOURCE_MODE = os.getenv("DATA_SOURCE_MODE", "local").lower()
+DATA_SOURCE_URLS = os.getenv("DATA_SOURCE_URLS", "")
+DATA_SOURCE_TIMEOUT = float(os.getenv("DATA_SOURCE_TIMEOUT", "10"))
+DATA_SOURCE_RETRIES = int(os.getenv("DATA_SOURCE_RETRIES", "2"))
+DATA_SOURCE_CONCURRENCY = int(os.getenv("DATA_SOURCE_CONCURRENCY", "8"))
+DATA_SOURCE_MAX_CONNECTIONS = int(os.getenv("DATA_SOURCE_MAX_CONNECTIONS", "32"))
+# Remote web search results are cached on disk (default: <compiled dir>/web_cache.sqlite)
+# TTL in seconds per query type; least recently used results are evicted above WEB_CACHE_MAX_MB
+WEB_CACHE_ENABLED = os.getenv("WEB_CACHE_ENABLED", "true").lower() == "true"
+WEB_CACHE_PATH = os.getenv("WEB_CACHE_PATH", "")
+WEB_CACHE_TTLS = os.getenv("WEB_CACHE_TTLS", "news=3600,research=86400,guidelines=604800,general=21600")
+WEB_CACHE_MAX_MB = float(os.getenv("WEB_CACHE_MAX_MB", "64"))
+# Internal knowledge base: PDFs indexed by python -m src.data ingest-docs
+# (defaults: <data dir>/internal_docs and <compiled dir>/knowledge)
+KNOWLEDGE_DOCS_DIR = os.getenv("KNOWLEDGE_DOCS_DIR", "")
+KNOWLEDGE_INDEX_DIR = os.getenv("KNOWLEDGE_INDEX_DIR", "")
+KNOWLEDGE_CHUNK_WORDS = int(os.getenv("KNOWLEDGE_CHUNK_WORDS", "200"))
+KNOWLEDGE_CHUNK_OVERLAP = int(os.getenv("KNOWLEDGE_CHUNK_OVERLAP", "40"))
+KNOWLEDGE_DIM = int(os.getenv("KNOWLEDGE_DIM", "512"))
+# PDF extraction processes (0 = one per CPU)
+KNOWLEDGE_INGEST_WORKERS = int(os.getenv("KNOWLEDGE_INGEST_WORKERS", "0"))
+# Queries take the top KNOWLEDGE_CANDIDATES chunks by BM25, then re-rank them with the
+# chunk vectors (final score: DENSE_WEIGHT * cosine + (1 - DENSE_WEIGHT) * normalized BM25)
+KNOWLEDGE_CANDIDATES = int(os.getenv("KNOWLEDGE_CANDIDATES", "100"))
+KNOWLEDGE_DENSE_WEIGHT = float(os.getenv("KNOWLEDGE_DENSE_WEIGHT", "0.5"))
+# Minimum cosine similarity for builds without a BM25 index
+KNOWLEDGE_MIN_SCORE = float(os.getenv("KNOWLEDGE_MIN_SCORE", "0.1"))
+
 # JWT Configuration
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
 JWT_ALGORITHM = "HS256"
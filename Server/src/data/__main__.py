@@ -0,0 +1,363 @@
+"""Data layer maintenance commands
+
+    python -m src.data compile [--force]   compile src/data/*.json into memory-mapped columnar files
+    python -m src.data synth --out DIR [--trials N ...]   generate large synthetic datasets for load testing
+    python -m src.data standin [--latency-ms MS]   serve the bundled data as local HTTP source APIs
+    python -m src.data bench-sources [--latency-ms MS]   sequential requests vs the pooled async adapter
+    python -m src.data ingest-docs [--docs DIR] [--workers N]   index new or modified internal PDFs for the knowledge base tool
+    python -m src.data bench-knowledge [--chunks N]   knowledge base query latency on a synthetic index
+    python -m src.data bench-web-cache [--latency-ms MS]   web search through the result cache vs a slow stand-in API
+    python -m src.data bench-prefetch [--llm-latency-ms MS]   crew wall clock with and without prefetched tool results
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+from .adapters import SOURCES, HttpAdapter, fetch_sources, set_data_source_adapter
+from .columnar import compile_all
+from .knowledge import KnowledgeIndex, build_index, docs_dir, index_dir, ingest_documents
+from .registry import dataset_registry
+from .standin import start_standin_servers, urls_spec
+from .synthetic import DEFAULT_CHUNK_SIZE, generate_datasets
+from .web_cache import WebResultCache, cached_web_search, parse_ttls, set_web_cache, web_cache
+
+
+def _compile(args: argparse.Namespace) -> None:
+    for filename, outcome in compile_all(args.data_dir, args.out_dir, force=args.force):
+        print(f"[OK] {filename}: {outcome}")
+
+
+def _synth(args: argparse.Namespace) -> None:
+    report = generate_datasets(args.out, trials=args.trials, patents=args.patents, trade=args.trade,
+                               markets=args.markets, molecules=args.molecules, seed=args.seed,
+                               chunk_size=args.chunk_size)
+    for filename, outcome in report.items():
+        print(f"[OK] {filename}: {outcome['rows']:,} rows in {outcome['seconds']}s")
+
+
+def _standin(args: argparse.Namespace) -> None:
+    servers, urls = start_standin_servers(host=args.host, base_port=args.port, latency_ms=args.latency_ms)
+    for source, url in urls.items():
+        print(f"[OK] {source}: {url}/{source}?molecule=...")
+    print(f'DATA_SOURCE_MODE=http DATA_SOURCE_URLS="{urls_spec(urls)}"')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+
+
+def _bench_sources(args: argparse.Namespace) -> None:
+    from . import MockDataSources
+
+    molecules = (list(MockDataSources.MOLECULES) + ["Semaglutide", "Paracetamol", "Pembrolizumab"])[:args.molecules]
+    requests = [(source, molecule) for molecule in molecules for source in SOURCES]
+    servers, urls = start_standin_servers(latency_ms=args.latency_ms)
+    try:
+        # Baseline: one request at a time, a new connection each (a tool calling an API inline)
+        started = time.perf_counter()
+        for source, molecule in requests:
+            httpx.get(f"{urls[source]}/{source}", params={"molecule": molecule}).raise_for_status()
+        sequential = time.perf_counter() - started
+
+        set_data_source_adapter(HttpAdapter(urls, concurrency=args.concurrency))
+        fetch_sources(requests[:len(SOURCES)])  # open the pooled connections
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            fetch_sources(requests)
+        pooled = (time.perf_counter() - started) / args.rounds
+    finally:
+        for server in servers:
+            server.shutdown()
+
+    print(f"[OK] {len(requests)} requests ({len(molecules)} molecules x {len(SOURCES)} sources, "
+          f"{args.latency_ms:g} ms simulated latency)")
+    print(f"     sequential, new connection each: {sequential:.2f}s ({len(requests) / sequential:.0f} req/s)")
+    print(f"     pooled async adapter:            {pooled:.2f}s ({len(requests) / pooled:.0f} req/s)")
+
+
+def _ingest_docs(args: argparse.Namespace) -> None:
+    stats = ingest_documents(args.docs, args.index, workers=args.workers, force=args.force)
+    print(f"[OK] {stats['files']} PDFs: {stats['extracted']} extracted, {stats['failed']} failed, "
+          f"{stats['duplicates']} duplicate copies")
+    if stats.get("unchanged"):
+        print(f"[OK] No document changed, index kept ({stats['seconds']}s)")
+    else:
+        print(f"[OK] {stats['documents']} documents, {stats['chunks']:,} chunks indexed in {stats['seconds']}s")
+
+
+def _bench_knowledge(args: argparse.Namespace) -> None:
+    import numpy as np
+
+    rng = np.random.default_rng(args.seed)
+    # Zipf-distributed vocabulary, so term frequencies look like real prose
+    vocabulary = np.array([f"term{i}" for i in range(args.vocabulary)])
+    weights = 1 / np.arange(1, args.vocabulary + 1)
+    weights /= weights.sum()
+
+    def text(words: int) -> str:
+        return " ".join(vocabulary[rng.choice(args.vocabulary, size=words, p=weights)])
+
+    with tempfile.TemporaryDirectory() as out:
+        started = time.perf_counter()
+        build_index(((f"doc{i // 50}.pdf", i % 50 + 1, text(args.words)) for i in range(args.chunks)), out)
+        print(f"[OK] {args.chunks:,} synthetic chunks indexed in {time.perf_counter() - started:.1f}s")
+
+        index = KnowledgeIndex(out)
+        queries = [text(6) for _ in range(args.queries)]
+        index.search(queries[0])
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query)
+            timings.append((time.perf_counter() - started) * 1000)
+    print(f"     query latency over {args.queries} queries: p50 {np.percentile(timings, 50):.1f} ms, "
+          f"p95 {np.percentile(timings, 95):.1f} ms")
+
+
+def _bench_web_cache(args: argparse.Namespace) -> None:
+    from src.config import WEB_CACHE_TTLS
+    from . import MockDataSources
+
+    rng = random.Random(args.seed)
+    topics = ["latest news", "NICE guidelines", "phase 3 trial results", "safety review", "market launch"]
+    intents = [(molecule, topic) for molecule in MockDataSources.MOLECULES for topic in topics][:args.distinct]
+    weights = [1 / (i + 1) for i in range(len(intents))]
+
+    def phrasing(molecule: str, topic: str) -> str:
+        # Agents repeat the same question with different wording, order and case
+        words = f"{molecule} {topic}".split() + rng.sample(["for", "the", "of", ""], 1)
+        rng.shuffle(words)
+        return " ".join(w.lower() if rng.random() < 0.5 else w for w in words if w)
+
+    queries = [phrasing(*rng.choices(intents, weights)[0]) for _ in range(args.queries)]
+    servers, urls = start_standin_servers(["web"], latency_ms=args.latency_ms)
+    with tempfile.TemporaryDirectory() as out:
+        path = os.path.join(out, "web_cache.sqlite")
+        try:
+            set_data_source_adapter(HttpAdapter(urls))
+            set_web_cache(WebResultCache(path, parse_ttls(WEB_CACHE_TTLS)))
+            timings = {"hit": [], "miss": []}
+            for query in queries:
+                hits = web_cache().stats()["hits"]
+                started = time.perf_counter()
+                cached_web_search(query)
+                elapsed = time.perf_counter() - started
+                timings["hit" if web_cache().stats()["hits"] > hits else "miss"].append(elapsed)
+            total = sum(timings["hit"]) + sum(timings["miss"])
+
+            # A restarted process opens the same file
+            set_web_cache(WebResultCache(path, parse_ttls(WEB_CACHE_TTLS)))
+            started = time.perf_counter()
+            for molecule, topic in intents:
+                cached_web_search(f"{topic} {molecule}")
+            restart = time.perf_counter() - started
+            restart_stats = web_cache().stats()
+        finally:
+            for server in servers:
+                server.shutdown()
+
+    uncached = len(queries) * args.latency_ms / 1000
+    print(f"[OK] {len(queries)} web searches over {len(intents)} distinct questions "
+          f"({args.latency_ms:g} ms simulated API latency)")
+    print(f"     without cache (every call hits the API): ~{uncached:.1f}s")
+    print(f"     with cache: {total:.2f}s, {len(timings['hit'])} hits / {len(timings['miss'])} misses, "
+          f"hit {1000 * sum(timings['hit']) / max(len(timings['hit']), 1):.2f} ms, "
+          f"miss {1000 * sum(timings['miss']) / max(len(timings['miss']), 1):.0f} ms on average")
+    print(f"     after a restart: {len(intents)} searches in {restart:.2f}s "
+          f"({restart_stats['hits']} hits, {restart_stats['entries']} entries, {restart_stats['bytes']:,} bytes)")
+
+
+def _bench_prefetch(args: argparse.Namespace) -> None:
+    """End-to-end crew time with and without prefetch.
+
+    With --model the agents run on that LLM (e.g. gemini/gemini-2.0-flash),
+    so the difference is the wall-clock saving of a real model deciding for
+    itself whether to call its tool. Without it, a scripted stand-in with a
+    fixed latency per call makes exactly one tool call when its task holds no
+    data; that only exercises the prefetch path, its timings follow from the
+    script.
+    """
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    from crewai import LLM, Agent, Crew, Process, Task
+    from crewai.llms.base_llm import BaseLLM
+
+    from src.config import GEMINI_TEMPERATURE
+    from src.utils.prefetch import (PREFETCH_HEADER, PREFETCH_TOOLS, prefetch_context, prefetch_tool_results,
+                                    shared_tool)
+    from src.utils.tool_cache import ToolCache, set_tool_cache
+    from . import MockDataSources
+
+    class ScriptedLLM(BaseLLM):
+        """Calls its agent's tool first unless the task already holds the data, then answers"""
+        latency: float = 1.0
+        action: str = ""
+        calls: int = 0
+
+        def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None,
+                 from_agent=None, response_model=None):
+            time.sleep(self.latency)
+            self.calls += 1
+            messages = [{"role": "user", "content": messages}] if isinstance(messages, str) else messages
+            answered = any(m.get("role") == "assistant" for m in messages)
+            if not self.action or answered or any(PREFETCH_HEADER in str(m.get("content")) for m in messages):
+                return "Thought: I now know the final answer\nFinal Answer: analysis"
+            return f"Thought: I need the data first\n{self.action}"
+
+        def supports_function_calling(self) -> bool:
+            return False
+
+        def get_context_window_size(self) -> int:
+            return 1_000_000
+
+    keys = [key for key in PREFETCH_TOOLS if key in args.agents.split(",")]
+    query = "market size, patents, pipeline and supply outlook"
+    latency = args.llm_latency_ms / 1000
+
+    def make_llm(action: str = ""):
+        if args.model:
+            return LLM(model=args.model, temperature=GEMINI_TEMPERATURE,
+                       api_key=os.getenv(args.api_key_env) or None, timeout=120)
+        return ScriptedLLM(model="scripted", latency=latency, action=action)
+
+    def run_crew(molecule: str, prefetch: bool):
+        started = time.perf_counter()
+        prefetched = prefetch_tool_results(keys, molecule, query) if prefetch else {}
+        fetched = time.perf_counter() - started
+        llms, agents, tasks = [], [], []
+        for key in keys:
+            factory, argument = PREFETCH_TOOLS[key][0]
+            tool = shared_tool(factory)
+            value = molecule if argument == "molecule" else f"{molecule} {query}"
+            llm = make_llm(f"Action: {tool.name}\nAction Input: {json.dumps({argument: value})}")
+            agent = Agent(role=f"{key} analyst", goal=f"Analyze {key} data", backstory="Analyst",
+                          llm=llm, tools=[tool], verbose=False)
+            llms.append(llm)
+            agents.append(agent)
+            description = (f"Analyze {key} data for {molecule} ({query}) and summarize the key findings"
+                           + prefetch_context(prefetched.get(key, [])))
+            tasks.append(Task(description=description, expected_output="Analysis", agent=agent, async_execution=True))
+        report_llm = make_llm()
+        report = Agent(role="Report writer", goal="Write the report", backstory="Writer", llm=report_llm, verbose=False)
+        llms.append(report_llm)
+        tasks.append(Task(description=f"Report on {molecule}", expected_output="Report", agent=report,
+                          context=list(tasks), async_execution=False))
+        output = Crew(agents=agents + [report], tasks=tasks, process=Process.sequential, verbose=False).kickoff()
+        calls = output.token_usage.successful_requests if args.model else sum(llm.calls for llm in llms)
+        return time.perf_counter() - started, fetched, calls
+
+    molecules = list(MockDataSources.MOLECULES)
+    servers, urls = start_standin_servers(latency_ms=args.source_latency_ms)
+    with tempfile.TemporaryDirectory() as out:
+        try:
+            set_data_source_adapter(HttpAdapter(urls))
+            set_web_cache(WebResultCache(os.path.join(out, "web_cache.sqlite")))
+            # Every lookup does its full work in both modes
+            set_tool_cache(ToolCache(None))
+            run_crew("Warmup", False)
+            results = {False: [], True: []}
+            for i in range(args.rounds):
+                for prefetch in (False, True):
+                    results[prefetch].append(run_crew(molecules[(2 * i + prefetch) % len(molecules)], prefetch))
+        finally:
+            for server in servers:
+                server.shutdown()
+
+    def mean(rows, column):
+        return sum(row[column] for row in rows) / len(rows)
+
+    plain, prefetched = results[False], results[True]
+    saved = mean(plain, 0) - mean(prefetched, 0)
+    model = args.model or f"scripted model, {args.llm_latency_ms:g} ms per call"
+    print(f"[OK] {len(keys)} worker agents + report agent on {model}, "
+          f"{args.source_latency_ms:g} ms per data source call ({args.rounds} rounds)")
+    print(f"     agents call their tools:  {mean(plain, 0):.2f}s, {mean(plain, 2):.1f} LLM calls")
+    print(f"     prefetched before kickoff: {mean(prefetched, 0):.2f}s (prefetch {mean(prefetched, 1):.2f}s), "
+          f"{mean(prefetched, 2):.1f} LLM calls")
+    if args.model:
+        print(f"     saved per request: {saved:.2f}s ({100 * saved / mean(plain, 0):.0f}%)")
+    else:
+        print("     (scripted model: one tool call per agent without prefetch; pass --model to measure the saving)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.data", description="Data layer maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compile_cmd = commands.add_parser("compile", help="compile JSON datasets into memory-mapped columnar files")
+    compile_cmd.add_argument("--data-dir", default=dataset_registry.data_dir)
+    compile_cmd.add_argument("--out-dir", default=dataset_registry.compiled_dir)
+    compile_cmd.add_argument("--force", action="store_true", help="recompile files that are already up to date")
+    compile_cmd.set_defaults(handler=_compile)
+
+    synth_cmd = commands.add_parser("synth", help="generate synthetic datasets with the bundled schemas")
+    synth_cmd.add_argument("--out", required=True, help="output directory (serve it with DATA_DIR=<out>)")
+    synth_cmd.add_argument("--trials", type=int, default=0)
+    synth_cmd.add_argument("--patents", type=int, default=0, help="patent families")
+    synth_cmd.add_argument("--trade", type=int, default=0, help="EXIM rows across api/formulation sections")
+    synth_cmd.add_argument("--markets", type=int, default=0, help="market overview segments")
+    synth_cmd.add_argument("--molecules", type=int, default=5000, help="distinct molecule names")
+    synth_cmd.add_argument("--seed", type=int, default=7)
+    synth_cmd.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    synth_cmd.set_defaults(handler=_synth)
+
+    standin_cmd = commands.add_parser("standin", help="serve the bundled data as local HTTP source APIs")
+    standin_cmd.add_argument("--host", default="127.0.0.1")
+    standin_cmd.add_argument("--port", type=int, default=8701, help="first port; sources use consecutive ports")
+    standin_cmd.add_argument("--latency-ms", type=float, default=0, help="delay added to every response")
+    standin_cmd.set_defaults(handler=_standin)
+
+    bench_cmd = commands.add_parser("bench-sources", help="benchmark the HTTP adapter against stand-in servers")
+    bench_cmd.add_argument("--molecules", type=int, default=12)
+    bench_cmd.add_argument("--latency-ms", type=float, default=40)
+    bench_cmd.add_argument("--concurrency", type=int, default=8, help="concurrent requests per source")
+    bench_cmd.add_argument("--rounds", type=int, default=3)
+    bench_cmd.set_defaults(handler=_bench_sources)
+
+    ingest_cmd = commands.add_parser("ingest-docs", help="index internal PDFs for the knowledge base tool")
+    ingest_cmd.add_argument("--docs", default=docs_dir(), help="directory of PDFs (searched recursively)")
+    ingest_cmd.add_argument("--index", default=index_dir(), help="index output directory")
+    ingest_cmd.add_argument("--workers", type=int, default=0, help="extraction processes (default: one per CPU)")
+    ingest_cmd.add_argument("--force", action="store_true", help="rebuild the index even if no document changed")
+    ingest_cmd.set_defaults(handler=_ingest_docs)
+
+    knowledge_cmd = commands.add_parser("bench-knowledge", help="benchmark knowledge base queries on a synthetic index")
+    knowledge_cmd.add_argument("--chunks", type=int, default=100_000)
+    knowledge_cmd.add_argument("--words", type=int, default=200, help="words per chunk")
+    knowledge_cmd.add_argument("--vocabulary", type=int, default=50_000)
+    knowledge_cmd.add_argument("--queries", type=int, default=200)
+    knowledge_cmd.add_argument("--seed", type=int, default=7)
+    knowledge_cmd.set_defaults(handler=_bench_knowledge)
+
+    web_cmd = commands.add_parser("bench-web-cache", help="benchmark the web result cache against a slow stand-in API")
+    web_cmd.add_argument("--queries", type=int, default=200)
+    web_cmd.add_argument("--distinct", type=int, default=40, help="distinct questions behind the queries")
+    web_cmd.add_argument("--latency-ms", type=float, default=300, help="simulated search API latency")
+    web_cmd.add_argument("--seed", type=int, default=7)
+    web_cmd.set_defaults(handler=_bench_web_cache)
+
+    prefetch_cmd = commands.add_parser("bench-prefetch",
+                                       help="time crews with and without prefetched tool results")
+    prefetch_cmd.add_argument("--agents", default="market,patent,trials,trade,internal,web",
+                              help="comma-separated worker agent keys")
+    prefetch_cmd.add_argument("--model", default="",
+                              help="LLM to run the agents on, e.g. gemini/gemini-2.0-flash (default: scripted stand-in)")
+    prefetch_cmd.add_argument("--api-key-env", default="GEMINI_API_KEY", help="environment variable holding its API key")
+    prefetch_cmd.add_argument("--llm-latency-ms", type=float, default=1500, help="scripted model round-trip")
+    prefetch_cmd.add_argument("--source-latency-ms", type=float, default=200, help="simulated data source latency")
+    prefetch_cmd.add_argument("--rounds", type=int, default=3)
+    prefetch_cmd.set_defaults(handler=_bench_prefetch)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
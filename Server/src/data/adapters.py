@@ -0,0 +1,272 @@
+"""Data Source Adapters - Pluggable access to market, trade, patent and trial sources
+
+    LocalAdapter   answers from the bundled datasets (MockDataSources)
+    HttpAdapter    calls one HTTP API per source with httpx: pooled keep-alive
+                   connections, a concurrency limit per source, timeouts and
+                   retries with backoff
+
+Both are asyncio-native. Tools and routes are synchronous, so they go through
+fetch_source / fetch_sources, which run remote requests on one long-lived
+event loop in a background thread (the pooled client stays bound to it).
+Local lookups are in-memory and are called directly.
+
+HTTP sources answer `GET <base url>/<source>?molecule=<name>` with the same
+JSON shape MockDataSources returns (the "web" source receives the search query
+as `molecule`); src.data.standin serves exactly that from the bundled files
+for offline runs and benchmarks.
+"""
+import asyncio
+import random
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from src.config import (
+    DATA_SOURCE_CONCURRENCY,
+    DATA_SOURCE_MAX_CONNECTIONS,
+    DATA_SOURCE_MODE,
+    DATA_SOURCE_RETRIES,
+    DATA_SOURCE_TIMEOUT,
+    DATA_SOURCE_URLS,
+)
+from .fallback import normalize_key
+from .registry import dataset_registry
+from .singleflight import single_flight
+
+# Source name -> MockDataSources method answering it locally
+SOURCES = {
+    "iqvia": "search_iqvia",
+    "exim": "search_exim",
+    "patents": "search_patents",
+    "clinical_trials": "search_clinical_trials",
+    "web": "web_search",
+}
+
+# Responses worth retrying: throttling and transient server errors
+_RETRY_STATUS = {429, 502, 503, 504}
+
+
+class DataSourceError(Exception):
+    """A source could not answer (after retries)"""
+
+
+class DataSourceAdapter(ABC):
+    """Interface of a data source backend"""
+
+    name = "base"
+
+    @abstractmethod
+    async def fetch(self, source: str, molecule: str) -> Dict:
+        """The JSON answer of one source for one molecule; raises DataSourceError"""
+
+    async def fetch_many(self, requests: Iterable[Tuple[str, str]]) -> List[Any]:
+        """Results for (source, molecule) pairs, fetched concurrently and returned in order.
+
+        A failed request yields its exception instead of a result.
+        """
+        return await asyncio.gather(*(self.fetch(source, molecule) for source, molecule in requests),
+                                    return_exceptions=True)
+
+    async def aclose(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"adapter": self.name, "single_flight": single_flight.stats()}
+
+
+class LocalAdapter(DataSourceAdapter):
+    """Bundled datasets (in-memory lookups, so fetch does not await anything)"""
+
+    name = "local"
+
+    async def fetch(self, source: str, molecule: str) -> Dict:
+        from . import MockDataSources
+
+        if source not in SOURCES:
+            raise DataSourceError(f"Unknown data source: {source}")
+        return getattr(MockDataSources, SOURCES[source])(molecule)
+
+
+class HttpAdapter(DataSourceAdapter):
+    """One pooled httpx client shared by every source, with a concurrency cap per source"""
+
+    name = "http"
+
+    def __init__(self, urls: Dict[str, str], timeout: float = DATA_SOURCE_TIMEOUT,
+                 retries: int = DATA_SOURCE_RETRIES, concurrency: int = DATA_SOURCE_CONCURRENCY,
+                 max_connections: int = DATA_SOURCE_MAX_CONNECTIONS):
+        self.urls = {source: url.rstrip("/") for source, url in urls.items()}
+        self.retries = retries
+        self.concurrency = concurrency
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                                keepalive_expiry=30.0),
+        )
+        # Created lazily so they belong to the loop that runs the requests
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._counters = {"requests": 0, "retries": 0, "failures": 0}
+
+    def _limit(self, source: str) -> asyncio.Semaphore:
+        limit = self._limits.get(source)
+        if limit is None:
+            limit = self._limits[source] = asyncio.Semaphore(self.concurrency)
+        return limit
+
+    async def fetch(self, source: str, molecule: str) -> Dict:
+        base = self.urls.get(source)
+        if base is None:
+            raise DataSourceError(f"No URL configured for data source: {source}")
+
+        async with self._limit(source):
+            for attempt in range(self.retries + 1):
+                self._counters["requests"] += 1
+                try:
+                    response = await self._client.get(f"{base}/{source}", params={"molecule": molecule})
+                    if response.status_code not in _RETRY_STATUS:
+                        response.raise_for_status()
+                        return response.json()
+                    error: Exception = DataSourceError(f"{source} answered HTTP {response.status_code}")
+                except (httpx.TransportError, httpx.HTTPStatusError, ValueError) as e:
+                    error = e
+                    if isinstance(e, httpx.HTTPStatusError):
+                        # Other 4xx/5xx answers will not change on retry
+                        break
+                if attempt < self.retries:
+                    self._counters["retries"] += 1
+                    # Exponential backoff with jitter: ~0.1s, 0.2s, 0.4s ...
+                    await asyncio.sleep(0.1 * 2 ** attempt * (0.5 + random.random()))
+
+        self._counters["failures"] += 1
+        raise DataSourceError(f"{source} request for {molecule!r} failed: {error}")
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"adapter": self.name, "sources": sorted(self.urls), **self._counters,
+                "single_flight": single_flight.stats()}
+
+
+def parse_source_urls(spec: str) -> Dict[str, str]:
+    """"iqvia=http://host:8701,exim=http://host:8702" -> {source: url}"""
+    urls = {}
+    for item in spec.split(","):
+        source, _, url = item.partition("=")
+        if source.strip() and url.strip():
+            urls[source.strip()] = url.strip()
+    return urls
+
+
+def create_adapter(mode: str = DATA_SOURCE_MODE, urls: str = DATA_SOURCE_URLS) -> DataSourceAdapter:
+    if mode == "http":
+        return HttpAdapter(parse_source_urls(urls))
+    return LocalAdapter()
+
+
+# ---------------------------------------------------------------------------
+# Sync bridge
+# ---------------------------------------------------------------------------
+
+class SyncBridge:
+    """Runs coroutines on one background event loop and waits for their results"""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="data-sources", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coro, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result(timeout)
+
+
+_bridge = SyncBridge()
+_adapter: Dict[str, Optional[DataSourceAdapter]] = {"current": None}
+
+
+def data_source_adapter() -> DataSourceAdapter:
+    """Process-wide adapter selected by DATA_SOURCE_MODE"""
+    if _adapter["current"] is None:
+        _adapter["current"] = create_adapter()
+    return _adapter["current"]
+
+
+def current_data_source_adapter() -> Optional[DataSourceAdapter]:
+    """The process-wide adapter if it has been created, without creating it"""
+    return _adapter["current"]
+
+
+def set_data_source_adapter(adapter: DataSourceAdapter) -> None:
+    """Replace the process-wide adapter (the previous one is closed)"""
+    previous = _adapter["current"]
+    _adapter["current"] = adapter
+    if previous is not None:
+        _bridge.run(previous.aclose())
+
+
+def _local(source: str, molecule: str) -> Dict:
+    from . import MockDataSources
+
+    return getattr(MockDataSources, SOURCES[source])(molecule)
+
+
+def fetch_source(source: str, molecule: str, fallback: bool = True) -> Dict:
+    """One source result; remote failures fall back to the bundled data (or raise, without fallback)"""
+    return fetch_sources([(source, molecule)], fallback=fallback)[0]
+
+
+def _fetch(adapter: DataSourceAdapter, requests: List[Tuple[str, str]], fallback: bool = True) -> List[Dict]:
+    if isinstance(adapter, LocalAdapter):
+        # In-memory lookups: no loop hop, and the caller's pinned data snapshot applies
+        return [_local(source, molecule) for source, molecule in requests]
+    results = _bridge.run(adapter.fetch_many(requests)) if requests else []
+    for i, result in enumerate(results):
+        if isinstance(result, BaseException):
+            if not fallback:
+                raise result
+            source, molecule = requests[i]
+            print(f"DEBUG: {adapter.name} source {source} failed, using bundled data: {result}")
+            results[i] = _local(source, molecule)
+    return results
+
+
+def fetch_sources(requests: Iterable[Tuple[str, str]], fallback: bool = True) -> List[Dict]:
+    """Several source results fetched concurrently, in request order.
+
+    A lookup another thread already has in flight (same source, data snapshot
+    and molecule, ignoring case and whitespace) is joined instead of repeated;
+    see src.data.singleflight.
+    """
+    requests = list(requests)
+    adapter = data_source_adapter()
+    version = dataset_registry.version
+    keys = [(adapter.name, source, normalize_key(molecule), version) for source, molecule in requests]
+    claims = [single_flight.claim(key) for key in keys]
+    led = [i for i, (_, leader) in enumerate(claims) if leader]
+
+    try:
+        fetched = _fetch(adapter, [requests[i] for i in led], fallback)
+    except BaseException as e:
+        for i in led:
+            single_flight.resolve(keys[i], claims[i][0], error=e)
+        raise
+
+    results: List[Optional[Dict]] = [None] * len(requests)
+    for i, result in zip(led, fetched):
+        # Snapshots the result for any waiters before it is handed back to be annotated
+        single_flight.resolve(keys[i], claims[i][0], result)
+        results[i] = result
+    # Waiters last: every call this thread leads is resolved, so joined calls cannot wait on us
+    for i, (call, leader) in enumerate(claims):
+        if not leader:
+            results[i] = single_flight.wait(call)
+    return results
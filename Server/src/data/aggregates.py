@@ -0,0 +1,239 @@
+"""Materialized Aggregates - Per-molecule summaries computed once per dataset version
+
+Tool results, chart series and the PDF report all need the same derived
+numbers: revenue by year, ranked manufacturers, trade totals and trial counts
+by phase and status. They are computed here in one pass over each dataset
+and kept on the registry entry (see DatasetRegistry.derive), so requests read
+precomputed rows instead of regrouping raw records.
+
+    market   segment key            -> revenue series, ranked manufacturers
+    trade    (section, position)    -> 2024 totals, yearwise volume / value
+    trials   normalized molecule    -> counts by phase, status and indication
+"""
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .columnar import ColumnarDocument, StringColumn
+from .fallback import normalize_key
+from .index import RecordRef, find_records
+from .registry import dataset_registry
+
+MARKET_FILE = "market_overview.json"
+TRADE_FILE = "exim_data.json"
+TRIALS_FILE = "clinical_trials_mock.json"
+
+PHASES = ["Phase 1", "Phase 2", "Phase 3", "Phase 4"]
+
+# (volume series, value series, unit) per exim section
+_TRADE_FIELDS = {
+    "api_exports": ("yearwise_volume_tonnes", "export_value_usd_mn", "Tonnes"),
+    "api_imports": ("yearwise_import_volume_tonnes", "import_value_usd_mn", "Tonnes"),
+    "formulation_exports": ("yearwise_export_packs_mn", "export_value_usd_mn", "Packs Mn"),
+}
+
+
+def ranked_counts(counter: Counter) -> Dict[str, int]:
+    """Counts largest first, ties by name (the trial store's GROUP BY order)"""
+    return dict(sorted(counter.items(), key=lambda item: (-item[1], item[0].lower())))
+
+
+def _year_series(values: Dict[str, Any]) -> List[Tuple[int, Any]]:
+    return sorted((int(year), value) for year, value in (values or {}).items())
+
+
+# ---------------------------------------------------------------------------
+# Builders (one pass over a dataset)
+# ---------------------------------------------------------------------------
+
+def build_market_aggregates(doc: Dict) -> Dict[str, Dict]:
+    rows = {}
+    for key, segment in doc.items():
+        leaders = segment.get("brand_leaders", [])
+        history = _year_series(segment.get("historical_market_size_usd_mn"))
+        rows[key] = {
+            "historical_data": [{"year": year, "revenue_usd_million": value} for year, value in history],
+            "top_manufacturers": [
+                {
+                    "rank": i + 1,
+                    "manufacturer": leader.get("company", "Unknown"),
+                    "market_share_percent": leader.get("market_share_percent", 0),
+                    "brand": leader.get("brand", "")
+                }
+                for i, leader in enumerate(leaders)
+            ],
+            # Chart order: largest share first
+            "share_ranking": sorted(
+                ((leader.get("company", "Unknown"), leader.get("market_share_percent", 0)) for leader in leaders),
+                key=lambda item: item[1], reverse=True
+            ),
+        }
+    return rows
+
+
+def build_trade_aggregates(doc: Dict) -> Dict[RecordRef, Dict]:
+    rows = {}
+    for section, (volume_field, value_field, unit) in _TRADE_FIELDS.items():
+        for pos, item in enumerate(doc.get(section, [])):
+            volume = _year_series(item.get(volume_field))
+            value = _year_series(item.get(value_field))
+            rows[(section, pos)] = {
+                "total_volume": dict(volume).get(2024, 0),
+                "unit": unit,
+                "value_usd_mn": dict(value).get(2024, 0),
+                "years": [year for year, _ in volume],
+                "volume": [v for _, v in volume],
+                "value": [v for _, v in value],
+            }
+    return rows
+
+
+def _new_group() -> Dict[str, Any]:
+    return {"total": 0, "enrollment": 0, "phase": Counter(), "status": Counter(), "indication": Counter()}
+
+
+# (group counter, record field, label for a missing value)
+_TRIAL_COUNTS = (("phase", "phase", "Unknown"), ("status", "status", "Unknown"), ("indication", "therapy_area", "Other"))
+
+
+def _trial_groups(trials) -> Dict[str, Dict[str, Any]]:
+    groups: Dict[str, Dict[str, Any]] = {}
+    for trial in trials:
+        key = normalize_key(trial.get("molecule") or "")
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = _new_group()
+        group["total"] += 1
+        group["enrollment"] += trial.get("sample_size") or 0
+        for name, field, missing in _TRIAL_COUNTS:
+            group[name][trial.get(field) or missing] += 1
+    return groups
+
+
+def _columnar_trial_groups(section) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Same groups computed over the compiled columns with NumPy (no record decoding)"""
+    columns = {field: section.column(field) for field in ("molecule", "phase", "status", "therapy_area")
+               if field in section.columns()}
+    if len(columns) < 4 or not all(isinstance(c, StringColumn) for c in columns.values()):
+        return None
+    molecules = columns["molecule"]
+    # Missing values carry the largest code; remap them to one past the table
+    codes = np.minimum(molecules.codes, len(molecules.values)).astype(np.int64)
+    names = [normalize_key(v) for v in molecules.values] + [""]
+
+    groups: Dict[str, Dict[str, Any]] = {}
+    for code, total in zip(*np.unique(codes, return_counts=True)):
+        group = groups.setdefault(names[code], _new_group())
+        group["total"] += int(total)
+    if "sample_size" in section.columns():
+        enrollment = np.bincount(codes, weights=np.nan_to_num(section.column("sample_size")), minlength=len(names))
+        for code in np.flatnonzero(enrollment):
+            groups[names[code]]["enrollment"] += int(enrollment[code])
+
+    for name, field, missing in _TRIAL_COUNTS:
+        column = columns[field]
+        values = [v or missing for v in column.values] + [missing]
+        width = len(values)
+        pairs = codes * width + np.minimum(column.codes, width - 1)
+        for pair, count in zip(*np.unique(pairs, return_counts=True)):
+            groups[names[pair // width]][name][values[pair % width]] += int(count)
+    return groups
+
+
+def build_trial_aggregates(doc: Dict) -> Dict[str, Dict]:
+    groups = None
+    if isinstance(doc, ColumnarDocument) and "trials" in doc:
+        groups = _columnar_trial_groups(doc.section("trials"))
+    if groups is None:
+        groups = _trial_groups(doc.get("trials", []))
+    return {
+        key: {
+            "total": group["total"],
+            "enrollment": group["enrollment"],
+            "by_phase": ranked_counts(group["phase"]),
+            "by_status": ranked_counts(group["status"]),
+            "by_indication": ranked_counts(group["indication"]),
+        }
+        for key, group in groups.items()
+    }
+
+
+BUILDERS = {
+    MARKET_FILE: build_market_aggregates,
+    TRADE_FILE: build_trade_aggregates,
+    TRIALS_FILE: build_trial_aggregates,
+}
+
+
+def aggregates(filename: str) -> Dict:
+    """Materialized rows of one dataset, built once per version of the file"""
+    return dataset_registry.derive(filename, "aggregates", BUILDERS[filename])
+
+
+def build_all_aggregates() -> Dict[str, int]:
+    """Materialize every dataset's aggregates; called at startup after the indexes"""
+    built = {}
+    for filename in BUILDERS:
+        try:
+            built[filename] = len(aggregates(filename))
+        except Exception as e:
+            print(f"DEBUG: Could not aggregate {filename}: {e}")
+    return built
+
+
+# ---------------------------------------------------------------------------
+# Lookups
+# ---------------------------------------------------------------------------
+
+def market_row(segment: str) -> Optional[Dict]:
+    return aggregates(MARKET_FILE).get(segment)
+
+
+def trade_row(ref: RecordRef) -> Optional[Dict]:
+    return aggregates(TRADE_FILE).get(tuple(ref))
+
+
+def trial_row(molecule: str, total: Optional[int] = None) -> Optional[Dict]:
+    """Counts for one molecule; with `total`, only if they cover exactly that many matched trials"""
+    row = aggregates(TRIALS_FILE).get(normalize_key(molecule))
+    if row is None or (total is not None and row["total"] != total):
+        return None
+    return row
+
+
+def molecule_aggregates(molecule: str) -> Dict[str, Any]:
+    """Chart-ready series for one molecule, read from the materialized rows.
+
+    Sections the datasets do not cover are omitted (charts then fall back to
+    the tool results, e.g. for synthetic data).
+    """
+    result: Dict[str, Any] = {"molecule": molecule}
+    try:
+        matches = find_records(MARKET_FILE, molecule)
+        row = market_row(matches[0][1]) if matches else None
+        if row:
+            result["revenue_series"] = {
+                "labels": [str(h["year"]) for h in row["historical_data"]],
+                "values": [h["revenue_usd_million"] for h in row["historical_data"]],
+            }
+            top_5 = row["share_ranking"][:5]
+            result["market_share"] = {"labels": [c for c, _ in top_5], "values": [s for _, s in top_5]}
+
+        matches = find_records(TRADE_FILE, molecule, fields=("molecule",))
+        row = trade_row(matches[0]) if matches else None
+        if row:
+            result["trade_series"] = {
+                "labels": [str(year) for year in row["years"]],
+                "volume": row["volume"],
+                "value": row["value"],
+                "unit": row["unit"],
+            }
+
+        matches = find_records(TRIALS_FILE, molecule, fields=("molecule",))
+        row = trial_row(molecule, total=len(matches)) if matches else None
+        if row:
+            result["pipeline"] = {"labels": PHASES, "values": [row["by_phase"].get(p, 0) for p in PHASES]}
+    except Exception as e:
+        print(f"DEBUG: Could not read aggregates for {molecule}: {e}")
+    return result
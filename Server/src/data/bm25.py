@@ -0,0 +1,287 @@
+"""BM25 Index - Compressed on-disk inverted index with MaxScore top-k retrieval
+
+Postings of each term are stored in blocks of BLOCK postings: the doc id gaps
+followed by the term frequencies, all as LEB128 varints. The lexicon row of a
+term (in the build's SQLite file) carries its document frequency, the last doc
+id, byte offset and maximum BM25 score of every block, so a block can be
+skipped or decoded on its own. Encoding and decoding are vectorized.
+
+Queries run term-at-a-time MaxScore: terms are scored in order of their upper
+bound, and once the k-th best accumulated score exceeds what the remaining
+terms could still add, no unseen document can enter the top k. From then on
+only the current candidates are scored, decoding just the blocks that hold
+them, and candidates that can no longer reach the k-th score are dropped.
+"""
+import mmap
+import sqlite3
+from array import array
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+BLOCK = 128
+K1 = 1.2
+B = 0.75
+
+LEXICON_SCHEMA = """
+CREATE TABLE terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER,
+    max_score REAL,
+    offset INTEGER,
+    length INTEGER,
+    block_last BLOB,
+    block_offsets BLOB,
+    block_max BLOB
+);
+"""
+
+
+# ---------------------------------------------------------------------------
+# Varints
+# ---------------------------------------------------------------------------
+
+def encode_varints(values: np.ndarray) -> Tuple[bytes, np.ndarray]:
+    """LEB128 bytes of non-negative integers (< 2**35) and the byte length of each"""
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 5):
+        lengths += values >= (1 << (7 * k))
+    groups = np.zeros((len(values), 5), dtype=np.uint8)
+    for k in range(5):
+        byte = ((values >> np.uint64(7 * k)) & np.uint64(0x7F)).astype(np.uint8)
+        groups[:, k] = byte | np.where(lengths > k + 1, 0x80, 0).astype(np.uint8)
+    return groups[np.arange(5) < lengths[:, None]].tobytes(), lengths
+
+
+def decode_varints(data: bytes) -> np.ndarray:
+    raw = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(raw < 0x80)
+    if len(ends) == len(raw):
+        # Every value fits in one byte (the common case for gaps and frequencies)
+        return raw.astype(np.int64)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    values = (raw[starts] & 0x7F).astype(np.int64)
+    extra = ends - starts
+    for k in range(1, 5):
+        longer = np.flatnonzero(extra >= k)
+        if not len(longer):
+            break
+        values[longer] |= (raw[starts[longer] + k] & 0x7F).astype(np.int64) << (7 * k)
+    return values
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+def _idf(df: np.ndarray, n_docs: int) -> np.ndarray:
+    return np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+
+class BM25Builder:
+    """Collects (term, document, frequency) postings; doc ids are assigned in add() order"""
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self._terms = array("I")
+        self._docs = array("I")
+        self._freqs = array("I")
+        self._lengths = array("I")
+
+    def add(self, tokens: Sequence[str]) -> None:
+        doc = len(self._lengths)
+        self._lengths.append(len(tokens))
+        vocabulary = self.vocabulary
+        for term, tf in Counter(tokens).items():
+            self._terms.append(vocabulary.setdefault(term, len(vocabulary)))
+            self._docs.append(doc)
+            self._freqs.append(tf)
+
+    def write(self, postings_path: str, conn: sqlite3.Connection) -> Dict[str, int]:
+        """Write the postings file and the `terms` lexicon table"""
+        return _write(self, postings_path, conn)
+
+
+def build_bm25(documents: Iterable[Sequence[str]], postings_path: str, conn: sqlite3.Connection) -> Dict[str, int]:
+    """Index token lists (doc id = position) into postings_path and the `terms` table of conn"""
+    builder = BM25Builder()
+    for tokens in documents:
+        builder.add(tokens)
+    return builder.write(postings_path, conn)
+
+
+def _write(builder: BM25Builder, postings_path: str, conn: sqlite3.Connection) -> Dict[str, int]:
+    vocabulary, lengths = builder.vocabulary, builder._lengths
+    n_docs = len(lengths)
+    doc_lengths = np.asarray(lengths, dtype=np.uint32)
+    conn.executescript(LEXICON_SCHEMA)
+    conn.executemany("INSERT INTO meta VALUES (?,?)", [("bm25_docs", str(n_docs))])
+    conn.execute("INSERT INTO meta VALUES ('bm25_doc_lengths', ?)", (doc_lengths.tobytes(),))
+    if not builder._terms:
+        open(postings_path, "wb").close()
+        return {"terms": 0, "postings": 0, "bytes": 0}
+
+    term_arr = np.frombuffer(builder._terms, dtype=np.uint32).astype(np.int64)
+    doc_arr = np.frombuffer(builder._docs, dtype=np.uint32).astype(np.int64)
+    order = np.lexsort((doc_arr, term_arr))
+    terms, docs = term_arr[order], doc_arr[order]
+    tfs = np.frombuffer(builder._freqs, dtype=np.uint32).astype(np.int64)[order]
+    n = len(terms)
+
+    term_start = np.flatnonzero(np.concatenate(([True], terms[1:] != terms[:-1])))
+    term_end = np.append(term_start[1:], n)
+    df = term_end - term_start
+    rank = np.arange(n) - np.repeat(term_start, df)
+
+    # Blocks: BLOCK consecutive postings of one term
+    new_block = rank % BLOCK == 0
+    block_start = np.flatnonzero(new_block)
+    block_end = np.append(block_start[1:], n)
+    block_size = block_end - block_start
+    block_of = np.cumsum(new_block) - 1
+
+    gaps = np.diff(docs, prepend=-1)
+    gaps[term_start] = docs[term_start] + 1
+    # Per block: the gaps, then the frequencies
+    slots = np.empty(2 * n, dtype=np.int64)
+    first = block_start[block_of]
+    slots[first + np.arange(n)] = gaps
+    slots[first + np.arange(n) + block_size[block_of]] = tfs
+    data, byte_lengths = encode_varints(slots)
+    byte_offsets = np.concatenate(([0], np.cumsum(byte_lengths)))
+    with open(postings_path, "wb") as f:
+        f.write(data)
+
+    avg_length = max(float(doc_lengths.mean()), 1.0)
+    norms = K1 * (1 - B + B * doc_lengths.astype(np.float64) / avg_length)
+    idf = _idf(df, n_docs)
+    scores = np.repeat(idf, df) * tfs * (K1 + 1) / (tfs + norms[docs])
+    block_max = np.maximum.reduceat(scores, block_start).astype(np.float32)
+    block_last = docs[block_end - 1].astype(np.uint32)
+    block_byte = byte_offsets[2 * block_start]
+
+    names = [None] * len(vocabulary)
+    for term, i in vocabulary.items():
+        names[i] = term
+    blocks_of_term = np.searchsorted(block_start, term_start)
+    blocks_end = np.append(blocks_of_term[1:], len(block_start))
+    rows = []
+    for t in range(len(term_start)):
+        b0, b1 = blocks_of_term[t], blocks_end[t]
+        offset = int(block_byte[b0])
+        end = int(byte_offsets[2 * term_end[t]])
+        rows.append((names[terms[term_start[t]]], int(df[t]), float(block_max[b0:b1].max()), offset, end - offset,
+                     block_last[b0:b1].tobytes(), (block_byte[b0:b1] - offset).astype(np.uint32).tobytes(),
+                     block_max[b0:b1].tobytes()))
+    conn.executemany("INSERT INTO terms VALUES (?,?,?,?,?,?,?,?)", rows)
+    return {"terms": len(rows), "postings": n, "bytes": len(data)}
+
+
+# ---------------------------------------------------------------------------
+# Query
+# ---------------------------------------------------------------------------
+
+class _Term:
+    __slots__ = ("df", "upper", "offset", "length", "block_last", "block_offsets", "block_max", "idf")
+
+    def __init__(self, row, n_docs: int):
+        self.df, self.upper, self.offset, self.length = row[0], row[1], row[2], row[3]
+        self.block_last = np.frombuffer(row[4], dtype=np.uint32).astype(np.int64)
+        self.block_offsets = np.frombuffer(row[5], dtype=np.uint32).astype(np.int64)
+        self.block_max = np.frombuffer(row[6], dtype=np.float32)
+        self.idf = float(_idf(np.float64(self.df), n_docs))
+
+    def block_sizes(self, blocks: np.ndarray) -> np.ndarray:
+        return np.minimum(BLOCK, self.df - blocks * BLOCK)
+
+
+class BM25Index:
+    """Read-only queries over one built index (postings memory-mapped)"""
+
+    def __init__(self, postings_path: str, connect: Callable[[], sqlite3.Connection]):
+        self._connect = connect
+        meta = dict(connect().execute("SELECT key, value FROM meta WHERE key LIKE 'bm25_%'"))
+        self.n_docs = int(meta["bm25_docs"])
+        lengths = np.frombuffer(meta["bm25_doc_lengths"], dtype=np.uint32).astype(np.float32)
+        avg_length = max(float(lengths.mean()), 1.0) if len(lengths) else 1.0
+        self._norms = K1 * (1 - B + B * lengths / avg_length)
+        with open(postings_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if f.seek(0, 2) else None
+
+    def _lookup(self, terms: Sequence[str]) -> List[_Term]:
+        found, conn = [], self._connect()
+        for term in dict.fromkeys(terms):
+            row = conn.execute(
+                "SELECT df, max_score, offset, length, block_last, block_offsets, block_max FROM terms WHERE term = ?",
+                (term,)).fetchone()
+            if row:
+                found.append(_Term(row, self.n_docs))
+        return found
+
+    def _decode(self, term: _Term, blocks: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Doc ids and frequencies of all postings of a term, or of the given blocks only"""
+        n_blocks = len(term.block_last)
+        if blocks is None:
+            blocks = np.arange(n_blocks)
+            data = self._mm[term.offset:term.offset + term.length]
+        else:
+            ends = np.append(term.block_offsets[1:], term.length)
+            data = b"".join(self._mm[term.offset + term.block_offsets[b]:term.offset + ends[b]] for b in blocks)
+        values = decode_varints(data)
+        # Layout per block: the gaps then the frequencies; only a term's last block can be short
+        tail = int(term.block_sizes(blocks[-1:])[0])
+        full = values[:len(values) - 2 * tail].reshape(-1, 2, BLOCK)
+        base = np.where(blocks > 0, term.block_last[np.maximum(blocks - 1, 0)], -1)
+        docs = np.concatenate(((base[:-1, None] + np.cumsum(full[:, 0], axis=1)).ravel(),
+                               base[-1] + np.cumsum(values[len(values) - 2 * tail:len(values) - tail])))
+        tfs = np.concatenate((full[:, 1].ravel(), values[len(values) - tail:]))
+        return docs, tfs
+
+    def _scores(self, term: _Term, docs: np.ndarray, tfs: np.ndarray) -> np.ndarray:
+        return (term.idf * tfs * (K1 + 1) / (tfs + self._norms[docs])).astype(np.float32)
+
+    def top_k(self, terms: Sequence[str], k: int) -> List[Tuple[int, float]]:
+        """(doc id, BM25 score) of the k best documents, best first"""
+        found = sorted(self._lookup(terms), key=lambda t: -t.upper)
+        if not found or self._mm is None or k <= 0:
+            return []
+        remaining = np.cumsum([t.upper for t in found][::-1])[::-1].tolist() + [0.0]
+        acc = np.zeros(self.n_docs, dtype=np.float32)
+        seen = np.zeros(self.n_docs, dtype=bool)
+        candidates: Optional[np.ndarray] = None
+        theta = 0.0
+
+        for i, term in enumerate(found):
+            rest = remaining[i + 1]
+            if candidates is None:
+                docs, tfs = self._decode(term)
+                acc[docs] += self._scores(term, docs, tfs)
+                seen[docs] = True
+                touched = docs if i == 0 else np.flatnonzero(seen)
+                if len(touched) >= k:
+                    theta = float(np.partition(acc[touched], len(touched) - k)[len(touched) - k])
+                    if theta > rest:
+                        # Unseen documents score at most `rest` < theta: only candidates can still qualify
+                        candidates = touched[acc[touched] + rest >= theta]
+                        seen[:] = False
+                        seen[candidates] = True
+                continue
+
+            blocks = np.unique(np.searchsorted(term.block_last, candidates))
+            blocks = blocks[blocks < len(term.block_last)]
+            if len(blocks):
+                docs, tfs = self._decode(term, blocks)
+                hit = seen[docs]
+                acc[docs[hit]] += self._scores(term, docs[hit], tfs[hit])
+            scores = acc[candidates]
+            if len(candidates) >= k:
+                theta = max(theta, float(np.partition(scores, len(candidates) - k)[len(candidates) - k]))
+            keep = scores + rest >= theta
+            seen[candidates[~keep]] = False
+            candidates = candidates[keep]
+
+        pool = np.flatnonzero(seen) if candidates is None else candidates
+        best = pool[np.argsort(-acc[pool], kind="stable")[:k]]
+        return [(int(doc), float(acc[doc])) for doc in best]
@@ -0,0 +1,579 @@
+"""Columnar Datasets - Compiled, memory-mapped form of the src/data JSON files
+
+`python -m src.data compile` compiles every data file into a `.pcol` file
+under the compiled directory. The registry opens a compiled file with mmap
+instead of parsing the JSON when the compiled copy is up to date, so all
+Gunicorn workers share the same physical pages and boot without a parse.
+
+File layout (all integers native-endian, blocks 8-byte aligned):
+
+    MAGIC | data blocks ... | header JSON | uint64 header length | MAGIC
+
+Each record section stores its records as compact JSON in one blob with a
+uint64 offsets array, plus dictionary-encoded string columns and float64
+numeric columns for the scalar fields of its records, and for the scalar
+members of flat sub-objects as `field.key` (e.g. yearwise_volume_tonnes.2024,
+so year series can be read without decoding records). The molecule index
+built by src.data.index is stored alongside so workers do not rebuild it.
+"""
+import itertools
+import json
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .stream import ArrayStream, iter_members
+
+MAGIC = b"PCOL0001"
+FORMAT_VERSION = 2
+_FOOTER = struct.Struct("=Q8s")
+_MISSING_CODE = 0xFFFFFFFF
+
+# Name of the pseudo-section used for files that are a mapping of segments
+MAPPING_SECTION = "__segments__"
+
+# Records decoded per json.loads call when a whole section is iterated
+_DECODE_BATCH = 4096
+
+
+def _json_bytes(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def compiled_path(compiled_dir: str, filename: str) -> str:
+    """Location of the compiled copy of a data file"""
+    return os.path.join(compiled_dir, os.path.splitext(filename)[0] + ".pcol")
+
+
+# ---------------------------------------------------------------------------
+# Reader
+# ---------------------------------------------------------------------------
+
+class StringTable(Sequence):
+    """Lazily decoded list of strings stored as offsets + UTF-8 blob"""
+
+    def __init__(self, mm: mmap.mmap, meta: Dict):
+        self._mm = mm
+        self._count = meta["count"]
+        self._offsets = np.frombuffer(mm, dtype=np.uint64, count=self._count + 1, offset=meta["offsets"][0])
+        self._blob_start = meta["blob"][0]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        start = self._blob_start + int(self._offsets[i])
+        end = self._blob_start + int(self._offsets[i + 1])
+        return self._mm[start:end].decode("utf-8")
+
+
+class StringColumn:
+    """Dictionary-encoded string column: uint32 codes over a table of distinct values"""
+
+    def __init__(self, mm: mmap.mmap, meta: Dict, count: int):
+        self.codes = np.frombuffer(mm, dtype=np.uint32, count=count, offset=meta["codes"][0])
+        self.values = StringTable(mm, meta["strings"])
+        self._lookup: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        code = int(self.codes[i])
+        return None if code == _MISSING_CODE else self.values[code]
+
+    def where(self, value: str) -> np.ndarray:
+        """Positions of the records whose field equals `value`"""
+        if self._lookup is None:
+            self._lookup = {v: code for code, v in enumerate(self.values)}
+        code = self._lookup.get(value)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(self.codes == code)
+
+
+class ColumnarSection(Sequence):
+    """A list of records; each record is decoded from the mapped file on access"""
+
+    def __init__(self, mm: mmap.mmap, meta: Dict):
+        self._mm = mm
+        self._meta = meta
+        self._count = meta["count"]
+        self._offsets = np.frombuffer(mm, dtype=np.uint64, count=self._count + 1, offset=meta["offsets"][0])
+        self._blob_start = meta["blob"][0]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        start = self._blob_start + int(self._offsets[i])
+        end = self._blob_start + int(self._offsets[i + 1])
+        return json.loads(self._mm[start:end])
+
+    def __iter__(self) -> Iterator[Any]:
+        # Full scans decode a batch of records per json.loads call instead of one each
+        offsets = self._offsets.tolist()
+        for first in range(0, self._count, _DECODE_BATCH):
+            last = min(first + _DECODE_BATCH, self._count)
+            base = offsets[first]
+            chunk = self._mm[self._blob_start + base:self._blob_start + offsets[last]]
+            parts = [chunk[offsets[i] - base:offsets[i + 1] - base] for i in range(first, last)]
+            yield from json.loads(b"[" + b",".join(parts) + b"]")
+
+    def columns(self) -> List[str]:
+        return list(self._meta["columns"])
+
+    def column(self, field: str):
+        """Zero-copy view of a scalar field across all records (float64 array or StringColumn)"""
+        meta = self._meta["columns"][field]
+        if meta["type"] == "str":
+            return StringColumn(self._mm, meta, self._count)
+        return np.frombuffer(self._mm, dtype=np.float64, count=self._count, offset=meta["values"][0])
+
+
+class ColumnarDocument(Mapping):
+    """Read-only, dict-like view of a compiled data file.
+
+    Behaves like the parsed JSON document: record lists come back as
+    ColumnarSection sequences, small non-record values as plain JSON values.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            header = self._read_header()
+        except Exception:
+            self._mm.close()
+            raise
+
+        self.header = header
+        self.source = header["source"]
+        self.source_signature = tuple(header["source_signature"])
+        self._order: List[str] = header["order"]
+        self._scalars: Dict[str, Any] = header["scalars"]
+        self._sections = {
+            name: ColumnarSection(self._mm, meta) for name, meta in header["sections"].items()
+        }
+        self._keys: Optional[StringTable] = None
+        self._key_pos: Optional[Dict[str, int]] = None
+        if MAPPING_SECTION in self._sections:
+            self._keys = StringTable(self._mm, header["keys"])
+            self._key_pos = {key: pos for pos, key in enumerate(self._keys)}
+            self._order = list(self._keys)
+        self._stored_index: Optional[Dict[str, Any]] = None
+
+    def _read_header(self) -> Dict[str, Any]:
+        if len(self._mm) < _FOOTER.size:
+            raise ValueError(f"{self.path} is not a compiled dataset")
+        header_len, tail_magic = _FOOTER.unpack(self._mm[-_FOOTER.size:])
+        if self._mm[:len(MAGIC)] != MAGIC or tail_magic != MAGIC:
+            raise ValueError(f"{self.path} is not a compiled dataset")
+        header_end = len(self._mm) - _FOOTER.size
+        header = json.loads(self._mm[header_end - header_len:header_end])
+        if header.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"{self.path} was compiled with an unsupported format version")
+        return header
+
+    def __enter__(self) -> "ColumnarDocument":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the file; sections and columns obtained earlier become unusable"""
+        self._sections = {}
+        self._keys = None
+        self._key_pos = None
+        self._stored_index = None
+        try:
+            self._mm.close()
+        except BufferError:
+            # A caller still holds a view into the mapping; it is released with it
+            pass
+
+    def __getitem__(self, key: str):
+        if self._key_pos is not None:
+            return self._sections[MAPPING_SECTION][self._key_pos[key]]
+        if key in self._sections:
+            return self._sections[key]
+        return self._scalars[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def section(self, name: Optional[str]) -> ColumnarSection:
+        """Record section by name (None for the segments of a mapping-style file)"""
+        return self._sections[MAPPING_SECTION if name is None else name]
+
+    def stored_index(self) -> Optional[Dict[str, Any]]:
+        """Molecule index persisted by the compiler, in the shape StoredDatasetIndex expects"""
+        meta = self.header.get("index")
+        if meta is None:
+            return None
+        if self._stored_index is None:
+            count = meta["records"]
+            self._stored_index = {
+                "sections": [None if s == MAPPING_SECTION else s for s in meta["sections"]],
+                "keys": self._keys,
+                "fields": meta["fields"],
+                "postings": np.frombuffer(self._mm, dtype=np.uint32, count=meta["postings"][1] // 4,
+                                          offset=meta["postings"][0]),
+                "ref_section": np.frombuffer(self._mm, dtype=np.uint16, count=count, offset=meta["ref_section"][0]),
+                "ref_pos": np.frombuffer(self._mm, dtype=np.uint32, count=count, offset=meta["ref_pos"][0]),
+            }
+        return self._stored_index
+
+
+def open_compiled(path: str) -> ColumnarDocument:
+    return ColumnarDocument(path)
+
+
+# ---------------------------------------------------------------------------
+# Writer
+# ---------------------------------------------------------------------------
+
+class _BlockWriter:
+    """Appends 8-byte aligned blocks to the output file and reports their spans"""
+
+    def __init__(self, path: str, resume_at: Optional[int] = None):
+        if resume_at is None:
+            self._f = open(path, "wb")
+            self._f.write(MAGIC)
+        else:
+            # Reopen a finished file to append more blocks before a new header
+            self._f = open(path, "r+b")
+            self._f.truncate(resume_at)
+            self._f.seek(resume_at)
+
+    def _align(self) -> int:
+        pad = (-self._f.tell()) % 8
+        if pad:
+            self._f.write(b"\0" * pad)
+        return self._f.tell()
+
+    def block(self, data: bytes) -> List[int]:
+        start = self._align()
+        self._f.write(data)
+        return [start, len(data)]
+
+    def begin_stream(self) -> int:
+        return self._align()
+
+    def write(self, data: bytes) -> None:
+        self._f.write(data)
+
+    def end_stream(self, start: int) -> List[int]:
+        return [start, self._f.tell() - start]
+
+    def finish(self, header: Dict) -> int:
+        """Write header and footer; returns where the data blocks end (see resume_at)"""
+        data_end = self._f.tell()
+        header_bytes = _json_bytes(header)
+        self._f.write(header_bytes)
+        self._f.write(_FOOTER.pack(len(header_bytes), MAGIC))
+        self._f.close()
+        return data_end
+
+    def abort(self) -> None:
+        self._f.close()
+
+
+def _write_strings(writer: _BlockWriter, strings: Iterable[str]) -> Dict:
+    offsets = array("Q", [0])
+    start = writer.begin_stream()
+    for s in strings:
+        data = s.encode("utf-8")
+        writer.write(data)
+        offsets.append(offsets[-1] + len(data))
+    blob = writer.end_stream(start)
+    return {"count": len(offsets) - 1, "blob": blob, "offsets": writer.block(offsets.tobytes())}
+
+
+# String fields with more distinct values than this (titles, ids) are not worth
+# dictionary-encoding and would grow the compiler's memory with the file
+_MAX_DICTIONARY = 1 << 16
+
+
+class _ColumnBuilder:
+    """Collects one scalar field across records; gives up if the field is not a clean column"""
+
+    def __init__(self, first_row: int):
+        self.kind: Optional[str] = None
+        self.valid = True
+        self._first_row = first_row
+        self._values = None
+        self._table: Dict[str, int] = {}
+
+    def add(self, row: int, value: Any) -> None:
+        if not self.valid:
+            return
+        if isinstance(value, str):
+            kind = "str"
+        elif isinstance(value, (int, float)):
+            kind = "num"
+        else:
+            self.valid = False
+            return
+
+        if self.kind is None:
+            self.kind = kind
+            self._values = array("I") if kind == "str" else array("d")
+            self._pad(self._first_row)
+        elif self.kind != kind:
+            self.valid = False
+            self._values = None
+            return
+
+        self._pad(row)
+        if kind == "str":
+            code = self._table.setdefault(value, len(self._table))
+            if len(self._table) > _MAX_DICTIONARY:
+                self.valid = False
+                self._values = None
+                self._table = {}
+                return
+            self._values.append(code)
+        else:
+            self._values.append(float(value))
+
+    def _pad(self, row: int) -> None:
+        missing = _MISSING_CODE if self.kind == "str" else float("nan")
+        while len(self._values) < row:
+            self._values.append(missing)
+
+    def write(self, writer: _BlockWriter, count: int) -> Optional[Dict]:
+        if not self.valid or self.kind is None:
+            return None
+        self._pad(count)
+        if self.kind == "str":
+            return {
+                "type": "str",
+                "codes": writer.block(self._values.tobytes()),
+                "strings": _write_strings(writer, self._table),
+            }
+        return {"type": "f8", "values": writer.block(self._values.tobytes())}
+
+
+def _column_values(record: Dict) -> Iterator[Tuple[str, Any]]:
+    """(column, value) pairs of a record: its fields, plus `field.key` for members of object fields"""
+    for field, value in record.items():
+        yield field, value
+        if isinstance(value, dict):
+            for key, member in value.items():
+                if not isinstance(member, (dict, list)):
+                    yield f"{field}.{key}", member
+
+
+def _write_section(writer: _BlockWriter, records: Iterable[Any]) -> Dict:
+    """Write one record list: JSON blob, offsets and scalar columns"""
+    offsets = array("Q", [0])
+    columns: Dict[str, _ColumnBuilder] = {}
+    start = writer.begin_stream()
+    row = 0
+    for row, record in enumerate(records):
+        data = _json_bytes(record)
+        writer.write(data)
+        offsets.append(offsets[-1] + len(data))
+        if isinstance(record, dict):
+            for field, value in _column_values(record):
+                if field not in columns:
+                    columns[field] = _ColumnBuilder(row)
+                columns[field].add(row, value)
+    blob = writer.end_stream(start)
+    count = len(offsets) - 1
+
+    meta = {"count": count, "blob": blob, "offsets": writer.block(offsets.tobytes()), "columns": {}}
+    for field, builder in columns.items():
+        column = builder.write(writer, count)
+        if column is not None:
+            meta["columns"][field] = column
+    return meta
+
+
+def _write_index(writer: _BlockWriter, index, key_positions: Optional[Dict[str, int]]) -> Dict:
+    """Persist a DatasetIndex: token directory in the header, postings and refs as blocks"""
+    sections: List[str] = []
+    ref_section = array("H")
+    ref_pos = array("I")
+    for section, key in index.iter_refs():
+        name = MAPPING_SECTION if section is None else section
+        if name not in sections:
+            sections.append(name)
+        ref_section.append(sections.index(name))
+        ref_pos.append(key_positions[key] if section is None else key)
+
+    # Posting lists are written back to back; the directory records (start, count)
+    fields: Dict[str, Dict[str, List[int]]] = {}
+    total = 0
+    start = writer.begin_stream()
+    for field, tokens in index.postings().items():
+        fields[field] = {}
+        for token in sorted(tokens):
+            ordinals = array("I", tokens[token])
+            fields[field][token] = [total, len(ordinals)]
+            writer.write(ordinals.tobytes())
+            total += len(ordinals)
+    postings = writer.end_stream(start)
+
+    return {
+        "records": len(index),
+        "sections": sections,
+        "fields": fields,
+        "postings": postings,
+        "ref_section": writer.block(ref_section.tobytes()),
+        "ref_pos": writer.block(ref_pos.tobytes()),
+    }
+
+
+# Up to this many leading non-array members are held back while deciding whether
+# a file is a mapping of segments or a metadata object with record arrays
+_MAPPING_PROBE = 16
+
+
+def _write_members(writer: _BlockWriter, header: Dict, members: Iterator[Tuple[str, Any]]) -> bool:
+    """Write the members of a streamed document; returns True for a mapping of segments.
+
+    Record arrays are written as sections while they stream in. A file with
+    no record arrays is a mapping of segments: one record per key.
+    """
+    pending: List[Tuple[str, Any]] = []
+    has_sections = False
+    for key, value in members:
+        if isinstance(value, ArrayStream):
+            first = next(value, None)
+            if isinstance(first, dict):
+                if not has_sections:
+                    has_sections = True
+                    header["scalars"].update(pending)
+                    pending = []
+                header["order"].append(key)
+                header["sections"][key] = _write_section(writer, itertools.chain([first], value))
+                continue
+            value = [] if first is None else [first, *value]
+
+        header["order"].append(key)
+        if has_sections:
+            header["scalars"][key] = value
+            continue
+        pending.append((key, value))
+        if len(pending) > _MAPPING_PROBE:
+            break
+    else:
+        if has_sections:
+            return False
+        members = iter(())
+
+    # Mapping of segments: stream every remaining member into one section
+    keys: List[str] = []
+
+    def segments() -> Iterator[Any]:
+        for key, value in itertools.chain(pending, members):
+            if isinstance(value, ArrayStream):
+                first = next(value, None)
+                if isinstance(first, dict):
+                    raise ValueError(f"Record array {key!r} follows segment entries; cannot compile this layout")
+                value = [] if first is None else [first, *value]
+            keys.append(key)
+            yield value
+
+    header["sections"][MAPPING_SECTION] = _write_section(writer, segments())
+    header["keys"] = _write_strings(writer, keys)
+    header["order"] = keys
+    header["scalars"] = {}
+    return True
+
+
+def compile_dataset(source_path: str, out_path: str) -> Dict:
+    """Compile one JSON data file into the columnar layout; returns the header.
+
+    The source is streamed (src.data.stream) and records are written as they
+    are decoded; the molecule index is then built from the compiled records,
+    so memory stays bounded by the largest record, not the file.
+    """
+    from .index import RECORD_EXTRACTORS, build_dataset_index
+
+    stat = os.stat(source_path)
+    tmp_path = out_path + ".tmp"
+    writer = _BlockWriter(tmp_path)
+    try:
+        header = {
+            "format_version": FORMAT_VERSION,
+            "source": os.path.basename(source_path),
+            "source_signature": [stat.st_mtime_ns, stat.st_size],
+            "order": [],
+            "scalars": {},
+            "sections": {},
+        }
+        is_mapping = _write_members(writer, header, iter_members(source_path))
+        data_end = writer.finish(header)
+
+        if header["source"] in RECORD_EXTRACTORS:
+            document = ColumnarDocument(tmp_path)
+            try:
+                index = build_dataset_index(header["source"], document)
+                key_positions = {key: pos for pos, key in enumerate(document)} if is_mapping else None
+            finally:
+                document.close()
+            writer = _BlockWriter(tmp_path, resume_at=data_end)
+            header["index"] = _write_index(writer, index, key_positions)
+            writer.finish(header)
+    except Exception:
+        writer.abort()
+        os.remove(tmp_path)
+        raise
+
+    os.replace(tmp_path, out_path)
+    return header
+
+
+def is_fresh(source_path: str, out_path: str) -> bool:
+    """True when the compiled file was built from the current version of the source"""
+    if not os.path.exists(out_path):
+        return False
+    try:
+        stat = os.stat(source_path)
+        with open_compiled(out_path) as document:
+            return document.source_signature == (stat.st_mtime_ns, stat.st_size)
+    except (OSError, ValueError):
+        return False
+
+
+def compile_all(data_dir: str, compiled_dir: str, force: bool = False) -> List[Tuple[str, str]]:
+    """Compile every JSON file in data_dir that is missing or stale; returns (file, outcome) pairs"""
+    os.makedirs(compiled_dir, exist_ok=True)
+    results = []
+    for filename in sorted(os.listdir(data_dir)):
+        if not filename.endswith(".json"):
+            continue
+        source_path = os.path.join(data_dir, filename)
+        out_path = compiled_path(compiled_dir, filename)
+        if not force and is_fresh(source_path, out_path):
+            results.append((filename, "up to date"))
+            continue
+        header = compile_dataset(source_path, out_path)
+        counts = {name: meta["count"] for name, meta in header["sections"].items()}
+        results.append((filename, f"compiled {counts}"))
+    return results
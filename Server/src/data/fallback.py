@@ -0,0 +1,76 @@
+"""Fallback Generation - Seeded, memoized synthetic results for unknown molecules"""
+import copy
+import hashlib
+import random
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Tuple
+
+from src.config import DETERMINISTIC_FALLBACK_DATA, FALLBACK_CACHE_SIZE
+
+
+def normalize_key(text: str) -> str:
+    """Case- and whitespace-insensitive form of a molecule name or query"""
+    return " ".join(str(text).lower().split())
+
+
+def seeded_rng(source: str, key: str) -> random.Random:
+    """Random generator whose sequence depends only on the source and the normalized key"""
+    digest = hashlib.sha256(f"{source}:{normalize_key(key)}".encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+class FallbackMemo:
+    """Bounded LRU of generated fallback results.
+
+    Entries are keyed by (source, exact input, day): the numbers only depend on
+    the normalized key, but the input is echoed back verbatim in the result and
+    generated dates are relative to today. Callers get a deep copy because the
+    tools annotate the returned dict in place.
+    """
+
+    def __init__(self, max_entries: int = FALLBACK_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get_or_generate(self, source: str, key: str,
+                        generator: Callable[[str, random.Random], Dict]) -> Dict:
+        memo_key = (source, key, date.today().isoformat())
+        with self._lock:
+            result = self._entries.get(memo_key)
+            if result is not None:
+                self._entries.move_to_end(memo_key)
+                self._counters["hits"] += 1
+                return copy.deepcopy(result)
+
+        result = generator(key, seeded_rng(source, key))
+
+        with self._lock:
+            self._counters["misses"] += 1
+            self._entries[memo_key] = result
+            self._entries.move_to_end(memo_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+        return copy.deepcopy(result)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries), "max_entries": self.max_entries}
+
+
+fallback_memo = FallbackMemo()
+
+
+def generate_fallback(source: str, key: str, generator: Callable[[str, random.Random], Dict]) -> Dict:
+    """Run a fallback generator, seeded and memoized unless deterministic mode is off"""
+    if not DETERMINISTIC_FALLBACK_DATA:
+        return generator(key, random.Random())
+    return fallback_memo.get_or_generate(source, key, generator)
@@ -0,0 +1,303 @@
+"""Molecule Index - Inverted token index over the bundled datasets"""
+import re
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .columnar import ColumnarDocument
+from .registry import dataset_registry
+
+# A record reference: (section, key). `section` is the top-level list a record
+# lives in (e.g. "trials"), or None for files that are a mapping of segments,
+# in which case `key` is the segment name instead of a list position.
+RecordRef = Tuple[Optional[str], Any]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Any) -> List[str]:
+    """Split a name into lowercase alphanumeric tokens ("Umeclidinium/Vilanterol" -> 2 tokens)"""
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+class DatasetIndex:
+    """Maps normalized molecule, brand and therapy-area tokens to record positions.
+
+    Records are numbered in document order, so a lookup returns matches in the
+    same order a linear scan would have found them. References and posting
+    lists are kept in compact arrays (a few bytes per entry) so indexes over
+    millions of records stay small.
+    """
+
+    def __init__(self):
+        self._sections: List[Optional[str]] = []
+        self._keys: List[Any] = []
+        self._ref_section = array("H")
+        self._ref_key = array("I")
+        self._postings: Dict[str, Dict[str, array]] = {}
+
+    def __len__(self) -> int:
+        return len(self._ref_section)
+
+    def add(self, ref: RecordRef, fields: Dict[str, Iterable[Any]]) -> None:
+        """Register one record under the tokens of each of its indexed fields"""
+        ordinal = len(self._ref_section)
+        section, key = ref
+        if section not in self._sections:
+            self._sections.append(section)
+        self._ref_section.append(self._sections.index(section))
+        if section is None:
+            # Segment names are stored once; list positions are stored inline
+            self._keys.append(key)
+            key = len(self._keys) - 1
+        self._ref_key.append(key)
+
+        for field, values in fields.items():
+            postings = self._postings.setdefault(field, {})
+            for value in values:
+                if not value:
+                    continue
+                for token in tokenize(value):
+                    ordinals = postings.get(token)
+                    if ordinals is None:
+                        postings[token] = array("I", [ordinal])
+                    elif ordinals[-1] != ordinal:
+                        ordinals.append(ordinal)
+
+    def lookup(self, query: str, fields: Optional[Sequence[str]] = None,
+               section: Optional[str] = None) -> List[RecordRef]:
+        """Records whose indexed fields contain every token of the query"""
+        return self.lookup_many([query], fields=fields, section=section)[query]
+
+    def lookup_many(self, queries: Iterable[str], fields: Optional[Sequence[str]] = None,
+                    section: Optional[str] = None) -> Dict[str, List[RecordRef]]:
+        """Look up several queries at once; postings of a token shared by queries are read once"""
+        field_names = fields if fields is not None else self._fields()
+        token_hits: Dict[str, Set[int]] = {}
+        results: Dict[str, List[RecordRef]] = {}
+        for query in queries:
+            if query in results:
+                continue
+            results[query] = self._match(tokenize(query), field_names, token_hits, section)
+        return results
+
+    def _match(self, tokens: List[str], field_names: Sequence[str], token_hits: Dict[str, Set[int]],
+               section: Optional[str]) -> List[RecordRef]:
+        if not tokens:
+            return []
+        matched: Optional[Set[int]] = None
+        for token in tokens:
+            hits = token_hits.get(token)
+            if hits is None:
+                hits = set()
+                for field in field_names:
+                    hits |= self._ordinals(field, token)
+                token_hits[token] = hits
+            matched = hits if matched is None else matched & hits
+            if not matched:
+                return []
+
+        refs = [self._ref(i) for i in sorted(matched)]
+        if section is not None:
+            refs = [ref for ref in refs if ref[0] == section]
+        return refs
+
+    def contains(self, token: str, fields: Optional[Sequence[str]] = None) -> bool:
+        """Whether a single token occurs in any of the given fields (all fields by default)"""
+        field_names = fields if fields is not None else self._fields()
+        return any(self._ordinals(field, token) for field in field_names)
+
+    def _fields(self) -> List[str]:
+        return list(self._postings)
+
+    def _ordinals(self, field: str, token: str) -> Set[int]:
+        return set(self._postings.get(field, {}).get(token, ()))
+
+    def _ref(self, ordinal: int) -> RecordRef:
+        section = self._sections[self._ref_section[ordinal]]
+        key = self._ref_key[ordinal]
+        return (None, self._keys[key]) if section is None else (section, key)
+
+    def iter_refs(self) -> Iterator[RecordRef]:
+        """Every record reference in ordinal order"""
+        for ordinal in range(len(self)):
+            yield self._ref(ordinal)
+
+    def postings(self) -> Dict[str, Dict[str, array]]:
+        """field -> token -> ascending record ordinals (used when persisting the index)"""
+        return self._postings
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "records": len(self),
+            **{f"{field}_tokens": len(tokens) for field, tokens in self._postings.items()}
+        }
+
+
+class StoredDatasetIndex(DatasetIndex):
+    """Read-only DatasetIndex backed by the postings stored in a compiled dataset.
+
+    Posting lists stay in the memory-mapped file; only the token directory is
+    held per process.
+    """
+
+    def __init__(self, stored: Dict[str, Any]):
+        super().__init__()
+        self._stored = stored
+
+    def __len__(self) -> int:
+        return len(self._stored["ref_pos"])
+
+    def add(self, ref: RecordRef, fields: Dict[str, Iterable[Any]]) -> None:
+        raise TypeError("Stored indexes are read-only; recompile the dataset instead")
+
+    def _fields(self) -> List[str]:
+        return list(self._stored["fields"])
+
+    def _ordinals(self, field: str, token: str) -> Set[int]:
+        span = self._stored["fields"].get(field, {}).get(token)
+        if span is None:
+            return set()
+        start, count = span
+        return set(self._stored["postings"][start:start + count].tolist())
+
+    def _ref(self, ordinal: int) -> RecordRef:
+        section = self._stored["sections"][int(self._stored["ref_section"][ordinal])]
+        pos = int(self._stored["ref_pos"][ordinal])
+        return (None, self._stored["keys"][pos]) if section is None else (section, pos)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "records": len(self),
+            **{f"{field}_tokens": len(tokens) for field, tokens in self._stored["fields"].items()},
+            "stored": True
+        }
+
+
+def resolve(document: Dict, ref: RecordRef) -> Dict:
+    """Return the record a reference points to"""
+    section, key = ref
+    return document[key] if section is None else document[section][key]
+
+
+# ---------------------------------------------------------------------------
+# Per-dataset record extraction
+# ---------------------------------------------------------------------------
+
+def _market_overview_records(doc: Dict) -> Iterator[Tuple[RecordRef, Dict]]:
+    for key, segment in doc.items():
+        leaders = segment.get("brand_leaders", [])
+        yield (None, key), {
+            "segment": [key.replace("_", " ")],
+            "therapy_area": [segment.get("therapy_area")],
+            "country": [segment.get("country")],
+            "brand": [b.get("brand") for b in leaders],
+            "company": [b.get("company") for b in leaders],
+        }
+
+
+def _exim_records(doc: Dict) -> Iterator[Tuple[RecordRef, Dict]]:
+    # Section order matches the lookup priority of search_exim
+    for section, name_field in (("api_exports", "molecule"),
+                                ("api_imports", "molecule"),
+                                ("formulation_exports", "formulation_name")):
+        for pos, item in enumerate(doc.get(section, [])):
+            yield (section, pos), {"molecule": [item.get(name_field)]}
+
+
+def _patent_records(doc: Dict) -> Iterator[Tuple[RecordRef, Dict]]:
+    for pos, family in enumerate(doc.get("patent_families", [])):
+        yield ("patent_families", pos), {
+            "molecule": [family.get("molecule")],
+            "therapy_area": [family.get("therapy_area")],
+        }
+
+
+def _trial_records(doc: Dict) -> Iterator[Tuple[RecordRef, Dict]]:
+    for pos, trial in enumerate(doc.get("trials", [])):
+        yield ("trials", pos), {
+            "molecule": [trial.get("molecule")],
+            "therapy_area": [trial.get("therapy_area")],
+            "sponsor": [trial.get("sponsor", {}).get("name")],
+        }
+
+
+def _competitor_records(doc: Dict) -> Iterator[Tuple[RecordRef, Dict]]:
+    for key, segment in doc.items():
+        molecules = segment.get("molecules", [])
+        yield (None, key), {
+            "segment": [key.replace("_", " ")],
+            "therapy_area": [segment.get("therapy_area")],
+            "molecule": [m.get("molecule") for m in molecules],
+            "brand": [b for m in molecules for b in m.get("brands", [])],
+            "company": [c for m in molecules for c in m.get("manufacturers", [])],
+        }
+
+
+def _segment_records(doc: Dict) -> Iterator[Tuple[RecordRef, Dict]]:
+    """class_trends.json / opportunity_score.json: segments keyed by therapy area and country"""
+    for key, segment in doc.items():
+        yield (None, key), {
+            "segment": [key.replace("_", " ")],
+            "therapy_area": [segment.get("therapy_area")],
+            "country": [segment.get("country")],
+            "class": [c.get("class_name") for c in segment.get("classes", [])],
+        }
+
+
+RECORD_EXTRACTORS = {
+    "market_overview.json": _market_overview_records,
+    "exim_data.json": _exim_records,
+    "uspto_patents_detailed.json": _patent_records,
+    "clinical_trials_mock.json": _trial_records,
+    "competitor_landscape.json": _competitor_records,
+    "class_trends.json": _segment_records,
+    "opportunity_score.json": _segment_records,
+}
+
+
+def build_dataset_index(filename: str, document: Dict) -> DatasetIndex:
+    """Walk a dataset once and index every record"""
+    index = DatasetIndex()
+    for ref, fields in RECORD_EXTRACTORS[filename](document):
+        index.add(ref, fields)
+    return index
+
+
+def _load_or_build_index(filename: str, document: Dict) -> DatasetIndex:
+    if isinstance(document, ColumnarDocument) and document.stored_index() is not None:
+        return StoredDatasetIndex(document.stored_index())
+    return build_dataset_index(filename, document)
+
+
+def molecule_index(filename: str) -> DatasetIndex:
+    """Index for one dataset, built (or opened from the compiled file) once per version"""
+    return dataset_registry.derive(
+        filename, "molecule_index", lambda doc: _load_or_build_index(filename, doc)
+    )
+
+
+def find_records(filename: str, query: str, fields: Optional[Sequence[str]] = None,
+                 section: Optional[str] = None) -> List[RecordRef]:
+    """Dictionary lookup of a molecule/brand/therapy-area query in one dataset"""
+    return molecule_index(filename).lookup(query, fields=fields, section=section)
+
+
+def find_everywhere(query: str) -> Dict[str, List[RecordRef]]:
+    """Lookup across every bundled dataset; datasets without a match are omitted"""
+    matches = {}
+    for filename in RECORD_EXTRACTORS:
+        refs = find_records(filename, query)
+        if refs:
+            matches[filename] = refs
+    return matches
+
+
+def build_all_indexes() -> Dict[str, Dict[str, int]]:
+    """Build (or reuse) the index of every dataset; called at startup"""
+    built = {}
+    for filename in RECORD_EXTRACTORS:
+        try:
+            built[filename] = molecule_index(filename).stats()
+        except Exception as e:
+            print(f"DEBUG: Could not index {filename}: {e}")
+    return built
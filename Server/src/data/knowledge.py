@@ -0,0 +1,529 @@
+"""Internal Knowledge Base - Offline retrieval over internal PDF documents
+
+    python -m src.data ingest-docs    extract, chunk and embed the PDFs in KNOWLEDGE_DOCS_DIR
+
+Extraction is incremental: pages are extracted by a process pool and their text
+is kept in KNOWLEDGE_INDEX_DIR/extracted/pages.sqlite keyed by the file's
+SHA-256, so a rerun only extracts new or modified PDFs (files whose size and
+mtime are unchanged are not even re-hashed) and byte-identical copies are
+extracted and indexed once. Every extracted document is committed as it
+completes, so an interrupted run resumes where it stopped. When no document
+changed, the current index build is kept as is.
+
+Every PDF page's text (pdfplumber) is split into overlapping word windows, so
+each chunk cites exactly one filename and page. Chunks are embedded with a
+signed feature-hashing vectorizer: word unigrams and bigrams hashed into
+KNOWLEDGE_DIM buckets, sublinear term frequency, L2-normalized. There is no
+model to download and nothing leaves the machine.
+
+An index build writes three files under KNOWLEDGE_INDEX_DIR:
+
+    knowledge-<build>.npy        float32 (chunks x dim), memory-mapped for queries
+    knowledge-<build>.postings   compressed BM25 postings (see src.data.bm25)
+    knowledge-<build>.sqlite     chunk text, filename and page; BM25 lexicon;
+                                 document frequency per hash bucket
+
+The SQLite file is renamed into place last, so its presence marks a complete
+build; readers switch to the newest one. A query first takes the top
+KNOWLEDGE_CANDIDATES chunks by BM25, so exact terms (trial ids, HS codes,
+brand names) are matched literally and most postings are never decoded.
+Those candidates are then re-ranked with their chunk vectors against the
+IDF-weighted hashed query, and the best hits are read from SQLite.
+"""
+import glob
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config import (
+    KNOWLEDGE_CANDIDATES,
+    KNOWLEDGE_CHUNK_OVERLAP,
+    KNOWLEDGE_CHUNK_WORDS,
+    KNOWLEDGE_DENSE_WEIGHT,
+    KNOWLEDGE_DIM,
+    KNOWLEDGE_DOCS_DIR,
+    KNOWLEDGE_INDEX_DIR,
+    KNOWLEDGE_INGEST_WORKERS,
+    KNOWLEDGE_MIN_SCORE,
+)
+from .bm25 import BM25Builder, BM25Index
+from .registry import dataset_registry
+
+# (filename, page number, text)
+Chunk = Tuple[str, int, str]
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9\-\.]*[a-z0-9]|[a-z0-9]")
+_STOPWORDS = frozenset("""
+a an and are as at be been but by can did do does for from had has have how if in into is it its
+may more most no not of on or our such than that the their them then there these they this those
+to was we were what when where which who will with would you your
+""".split())
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE documents (filename TEXT PRIMARY KEY, pages INTEGER, chunks INTEGER, size INTEGER, mtime_ns INTEGER,
+                        hash TEXT, duplicate_of TEXT);
+CREATE TABLE chunks (id INTEGER PRIMARY KEY, filename TEXT, page INTEGER, text TEXT);
+CREATE TABLE bucket_df (bucket INTEGER PRIMARY KEY, df INTEGER);
+"""
+
+# Extraction cache, kept across builds
+_PAGES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (filename TEXT PRIMARY KEY, hash TEXT, size INTEGER, mtime_ns INTEGER);
+CREATE TABLE IF NOT EXISTS extracted (hash TEXT PRIMARY KEY, pages INTEGER);
+CREATE TABLE IF NOT EXISTS pages (hash TEXT, page INTEGER, text TEXT, PRIMARY KEY (hash, page));
+"""
+
+
+def docs_dir() -> str:
+    return KNOWLEDGE_DOCS_DIR or os.path.join(dataset_registry.data_dir, "internal_docs")
+
+
+def index_dir() -> str:
+    return KNOWLEDGE_INDEX_DIR or os.path.join(dataset_registry.compiled_dir, "knowledge")
+
+
+# ---------------------------------------------------------------------------
+# Text -> chunks -> vectors
+# ---------------------------------------------------------------------------
+
+def words(text: str) -> List[str]:
+    """Lowercased words without stopwords; ids and codes (NCT04123456, 2942.20) stay whole"""
+    return [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def terms(text: str) -> List[str]:
+    """Unigrams (stopwords dropped) and bigrams of adjacent kept words"""
+    kept = words(text)
+    return kept + [f"{a} {b}" for a, b in zip(kept, kept[1:])]
+
+
+def embed(texts: Sequence[str], dim: int = KNOWLEDGE_DIM) -> np.ndarray:
+    """Hashed, sublinear-tf, L2-normalized float32 vectors, one row per text"""
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for term, count in Counter(terms(text)).items():
+            h = zlib.crc32(term.encode("utf-8"))
+            # Low bits pick the bucket, the top bit the sign (so collisions cancel out on average)
+            weight = 1 + math.log(count)
+            vectors[row, h % dim] += weight if h & 0x80000000 else -weight
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def chunk_page(text: str, words: int = KNOWLEDGE_CHUNK_WORDS, overlap: int = KNOWLEDGE_CHUNK_OVERLAP) -> List[str]:
+    """Overlapping windows of `words` words over one page"""
+    tokens = text.split()
+    if not tokens:
+        return []
+    step = max(1, words - overlap)
+    return [" ".join(tokens[start:start + words])
+            for start in range(0, max(1, len(tokens) - overlap), step)]
+
+
+def extract_pages(path: str) -> Iterator[Tuple[int, str]]:
+    """(page number, text) of every page of a PDF; pages without a text layer yield ''"""
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        for number, page in enumerate(pdf.pages, start=1):
+            yield number, page.extract_text() or ""
+            page.close()
+
+
+# ---------------------------------------------------------------------------
+# Index build
+# ---------------------------------------------------------------------------
+
+def build_index(chunks: Iterable[Chunk], out_dir: str, documents: Optional[Dict[str, Dict]] = None,
+                dim: int = KNOWLEDGE_DIM, batch: int = 2048) -> Dict[str, Any]:
+    """Embed the chunks into a new index build under out_dir; returns its stats"""
+    os.makedirs(out_dir, exist_ok=True)
+    build = time.time_ns()
+    base = os.path.join(out_dir, f"knowledge-{build}")
+    tmp_db = f"{base}.sqlite.{os.getpid()}.tmp"
+
+    conn = sqlite3.connect(tmp_db)
+    lexical = BM25Builder()
+    blocks: List[np.ndarray] = []
+    df = np.zeros(dim, dtype=np.int64)
+    try:
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(_SCHEMA)
+        pending: List[Chunk] = []
+        count = 0
+
+        def flush():
+            vectors = embed([text for _, _, text in pending], dim)
+            df[:] += (vectors != 0).sum(axis=0)
+            blocks.append(vectors)
+            for _, _, text in pending:
+                lexical.add(words(text))
+            conn.executemany("INSERT INTO chunks VALUES (?,?,?,?)",
+                             [(count - len(pending) + i, f, p, t) for i, (f, p, t) in enumerate(pending)])
+            pending.clear()
+
+        for chunk in chunks:
+            pending.append(chunk)
+            count += 1
+            if len(pending) >= batch:
+                flush()
+        if pending:
+            flush()
+
+        vectors = np.concatenate(blocks) if blocks else np.zeros((0, dim), dtype=np.float32)
+        np.save(f"{base}.npy", vectors)
+        lexical.write(f"{base}.postings", conn)
+        conn.executemany("INSERT INTO bucket_df VALUES (?,?)",
+                         [(int(b), int(n)) for b, n in zip(np.flatnonzero(df), df[df > 0])])
+        for filename, info in (documents or {}).items():
+            conn.execute("INSERT INTO documents VALUES (?,?,?,?,?,?,?)",
+                         (filename, info.get("pages", 0), info.get("chunks", 0), info.get("size", 0),
+                          info.get("mtime_ns", 0), info.get("hash"), info.get("duplicate_of")))
+        conn.executemany("INSERT INTO meta VALUES (?,?)",
+                         [("dim", str(dim)), ("chunks", str(count)), ("vectors", os.path.basename(f"{base}.npy")),
+                          ("postings", os.path.basename(f"{base}.postings"))])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_db, f"{base}.sqlite")
+    _prune(out_dir, keep=base)
+    return {"build": build, "chunks": count, "documents": len(documents or {}), "dim": dim}
+
+
+def _prune(out_dir: str, keep: str) -> None:
+    """Delete builds other than `keep` and the newest previous one (readers may still hold it)"""
+    builds = sorted(p[:-len(".sqlite")] for p in glob.glob(os.path.join(out_dir, "knowledge-*.sqlite")))
+    for base in [b for b in builds if b != keep][:-1]:
+        for ext in (".sqlite", ".npy", ".postings"):
+            try:
+                os.remove(base + ext)
+            except OSError:
+                pass
+
+
+def content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _extract_worker(path: str) -> Tuple[Optional[List[str]], Optional[str]]:
+    """Process pool task: the text of every page of one PDF, or the error"""
+    try:
+        return [text for _, text in extract_pages(path)], None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def _open_page_cache(out_dir: str) -> sqlite3.Connection:
+    directory = os.path.join(out_dir, "extracted")
+    os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(directory, "pages.sqlite"))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_PAGES_SCHEMA)
+    return conn
+
+
+def _extract_missing(cache: sqlite3.Connection, todo: Dict[str, str], workers: int) -> List[str]:
+    """Extract the PDFs of `todo` (hash -> path) into the page cache; returns the hashes that failed"""
+    failed = []
+
+    def checkpoint(digest: str, pages: Optional[List[str]], error: Optional[str]) -> None:
+        if error is not None:
+            print(f"DEBUG: Could not read {todo[digest]}: {error}")
+            failed.append(digest)
+            return
+        cache.executemany("INSERT OR REPLACE INTO pages VALUES (?,?,?)",
+                          [(digest, number, text) for number, text in enumerate(pages, start=1) if text.strip()])
+        cache.execute("INSERT OR REPLACE INTO extracted VALUES (?,?)", (digest, len(pages)))
+        # One commit per document: an interrupted run resumes after the last one
+        cache.commit()
+
+    if workers <= 1:
+        for digest, path in todo.items():
+            checkpoint(digest, *_extract_worker(path))
+        return failed
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {pool.submit(_extract_worker, path): digest for digest, path in todo.items()}
+        for done, future in enumerate(as_completed(futures), start=1):
+            checkpoint(futures[future], *future.result())
+            if done % 500 == 0:
+                print(f"DEBUG: extracted {done:,}/{len(todo):,} PDFs")
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return failed
+
+
+def _indexed_hashes(out_dir: str) -> Optional[Dict[str, str]]:
+    """filename -> content hash of the newest complete build (None if there is none or it predates hashing)"""
+    builds = sorted(glob.glob(os.path.join(out_dir, "knowledge-*.sqlite")))
+    if not builds:
+        return None
+    conn = sqlite3.connect(f"file:{builds[-1]}?mode=ro", uri=True)
+    try:
+        return dict(conn.execute("SELECT filename, hash FROM documents"))
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+
+def ingest_documents(source_dir: Optional[str] = None, out_dir: Optional[str] = None,
+                     workers: Optional[int] = None, force: bool = False) -> Dict[str, Any]:
+    """Extract new or modified PDFs of source_dir in parallel, then rebuild the index if anything changed"""
+    source_dir, out_dir = source_dir or docs_dir(), out_dir or index_dir()
+    started = time.perf_counter()
+    paths = sorted(glob.glob(os.path.join(source_dir, "**", "*.pdf"), recursive=True))
+    cache = _open_page_cache(out_dir)
+    try:
+        known = {row[0]: row[1:] for row in cache.execute("SELECT filename, hash, size, mtime_ns FROM files")}
+        extracted = {digest for (digest,) in cache.execute("SELECT hash FROM extracted")}
+
+        # filename -> (hash, size, mtime_ns); unchanged size and mtime reuse the recorded hash
+        files: Dict[str, Tuple[str, int, int]] = {}
+        for path in paths:
+            filename = os.path.relpath(path, source_dir)
+            stat = os.stat(path)
+            previous = known.get(filename)
+            if previous and tuple(previous[1:]) == (stat.st_size, stat.st_mtime_ns):
+                digest = previous[0]
+            else:
+                digest = content_hash(path)
+            files[filename] = (digest, stat.st_size, stat.st_mtime_ns)
+
+        todo: Dict[str, str] = {}
+        for filename, (digest, _, _) in files.items():
+            if digest not in extracted:
+                todo.setdefault(digest, os.path.join(source_dir, filename))
+        workers = max(1, min(workers or KNOWLEDGE_INGEST_WORKERS or os.cpu_count() or 1, len(todo) or 1))
+        if todo:
+            print(f"DEBUG: extracting {len(todo):,} new or modified PDF(s) with {workers} worker(s)")
+        failed = set(_extract_missing(cache, todo, workers))
+        # Failed files stay out of `files`, so the next run tries them again
+        files = {f: entry for f, entry in files.items() if entry[0] not in failed}
+        cache.execute("DELETE FROM files")
+        cache.executemany("INSERT INTO files VALUES (?,?,?,?)", [(f, *entry) for f, entry in files.items()])
+        # Page text of documents that were deleted or replaced
+        cache.execute("DELETE FROM pages WHERE hash NOT IN (SELECT hash FROM files)")
+        cache.execute("DELETE FROM extracted WHERE hash NOT IN (SELECT hash FROM files)")
+        cache.commit()
+
+        stats: Dict[str, Any] = {"files": len(paths), "extracted": len(todo) - len(failed), "failed": len(failed),
+                                 "duplicates": len(files) - len({entry[0] for entry in files.values()})}
+        current = {f: entry[0] for f, entry in files.items()}
+        if not force and current == _indexed_hashes(out_dir):
+            stats.update(index_dir=out_dir, documents=len(files), unchanged=True,
+                         seconds=round(time.perf_counter() - started, 2))
+            return stats
+
+        page_counts = dict(cache.execute("SELECT hash, pages FROM extracted"))
+        documents: Dict[str, Dict] = {}
+
+        def chunks() -> Iterator[Chunk]:
+            first: Dict[str, str] = {}
+            for filename in sorted(files):
+                digest, size, mtime_ns = files[filename]
+                info = documents[filename] = {"pages": page_counts.get(digest, 0), "chunks": 0, "size": size,
+                                              "mtime_ns": mtime_ns, "hash": digest}
+                if digest in first:
+                    # Identical content is indexed (and cited) once
+                    info["duplicate_of"] = first[digest]
+                    continue
+                first[digest] = filename
+                for number, text in cache.execute("SELECT page, text FROM pages WHERE hash = ? ORDER BY page",
+                                                  (digest,)).fetchall():
+                    for chunk in chunk_page(text):
+                        info["chunks"] += 1
+                        yield filename, number, chunk
+
+        stats.update(build_index(chunks(), out_dir, documents))
+    finally:
+        cache.close()
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+class KnowledgeIndex:
+    """Newest complete index build in a directory, reloaded when a new build appears"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._seen: Optional[int] = None
+        self._state: Optional[Dict[str, Any]] = None
+        self._local = threading.local()
+
+    def _current(self) -> Optional[Dict[str, Any]]:
+        try:
+            stamp = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+        if stamp != self._seen:
+            with self._lock:
+                if stamp != self._seen:
+                    self._state = self._load()
+                    self._seen = stamp
+        return self._state
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        builds = sorted(glob.glob(os.path.join(self.directory, "knowledge-*.sqlite")))
+        if not builds:
+            return None
+        path = builds[-1]
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            dim = int(meta["dim"])
+            df = np.zeros(dim, dtype=np.float32)
+            for bucket, count in conn.execute("SELECT bucket, df FROM bucket_df"):
+                df[bucket] = count
+            documents = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        finally:
+            conn.close()
+        vectors = np.load(os.path.join(self.directory, meta["vectors"]), mmap_mode="r")
+        total = max(len(vectors), 1)
+        lexical = None
+        if "postings" in meta:
+            lexical = BM25Index(os.path.join(self.directory, meta["postings"]), lambda: self._conn(path))
+        return {
+            "path": path,
+            "bm25": lexical,
+            "dim": dim,
+            "vectors": vectors,
+            "idf": np.log((total + 1) / (df + 1)).astype(np.float32) + 1,
+            "documents": documents,
+        }
+
+    def _conn(self, path: str) -> sqlite3.Connection:
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        conn = conns.get(path)
+        if conn is None:
+            conn = conns[path] = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        return conn
+
+    def stats(self) -> Dict[str, Any]:
+        state = self._current()
+        if state is None:
+            return {"available": False, "directory": self.directory}
+        return {"available": True, "directory": self.directory, "index": os.path.basename(state["path"]),
+                "chunks": len(state["vectors"]), "documents": state["documents"], "dim": state["dim"]}
+
+    def search(self, query: str, k: int = 5, min_score: float = KNOWLEDGE_MIN_SCORE) -> Optional[List[Dict[str, Any]]]:
+        """Best chunks for a query, one per (filename, page); None when no index has been built"""
+        state = self._current()
+        if state is None:
+            return None
+        vectors = state["vectors"]
+        query_vector = embed([query], state["dim"])[0] * state["idf"]
+        norm = np.linalg.norm(query_vector)
+        if norm:
+            query_vector /= norm
+        # A few extra candidates, since chunks of the same page collapse into one hit
+        wanted = min(len(vectors), k * 3)
+        if not wanted:
+            return []
+
+        lexical = state["bm25"]
+        if lexical is not None:
+            # First stage: exact terms (trial ids, HS codes, brands) through the BM25 index
+            matches = lexical.top_k(words(query), max(KNOWLEDGE_CANDIDATES, wanted))
+            if not matches:
+                return []
+            ids = np.array([doc for doc, _ in matches])
+            bm25 = np.array([score for _, score in matches], dtype=np.float32)
+            scores = bm25 / bm25.max()
+            if KNOWLEDGE_DENSE_WEIGHT > 0 and norm:
+                # Dense re-ranking of the small candidate set only
+                dense = np.asarray(vectors[ids]) @ query_vector
+                scores = KNOWLEDGE_DENSE_WEIGHT * dense + (1 - KNOWLEDGE_DENSE_WEIGHT) * scores
+            order = np.argsort(-scores, kind="stable")[:wanted]
+            top, top_scores = ids[order].tolist(), scores[order]
+            bm25_scores = dict(zip(top, bm25[order].tolist()))
+        else:
+            # Builds without a lexical index: score every chunk vector
+            if not norm:
+                return []
+            scores = vectors @ query_vector
+            top = np.argpartition(-scores, wanted - 1)[:wanted]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            top = top[scores[top] >= min_score]
+            top, top_scores, bm25_scores = top.tolist(), scores[top], {}
+        if not top:
+            return []
+        rows = self._conn(state["path"]).execute(
+            f"SELECT id, filename, page, text FROM chunks WHERE id IN ({','.join('?' * len(top))})", top)
+        by_id = {row[0]: row[1:] for row in rows}
+
+        hits, seen = [], set()
+        for i, score in zip(top, top_scores):
+            filename, page, text = by_id[i]
+            if (filename, page) in seen:
+                continue
+            seen.add((filename, page))
+            hit = {"filename": filename, "page": page, "relevance_score": round(float(score), 4),
+                   "excerpt": text[:600]}
+            if i in bm25_scores:
+                hit["bm25_score"] = round(bm25_scores[i], 4)
+            hits.append(hit)
+            if len(hits) == k:
+                break
+        return hits
+
+
+_indexes: Dict[str, KnowledgeIndex] = {}
+
+
+def knowledge_index() -> KnowledgeIndex:
+    """Index reader for the configured index directory"""
+    directory = index_dir()
+    if directory not in _indexes:
+        _indexes[directory] = KnowledgeIndex(directory)
+    return _indexes[directory]
+
+
+def current_knowledge_index() -> Optional[KnowledgeIndex]:
+    """Index reader for the configured directory if one is open, without opening it"""
+    return _indexes.get(index_dir())
+
+
+def search_knowledge(query: str, k: int = 5) -> Optional[Dict[str, Any]]:
+    """Cited internal-document hits for a query; None when no documents have been indexed"""
+    index = knowledge_index()
+    hits = index.search(query, k=k)
+    if hits is None:
+        return None
+    stats = index.stats()
+    result: Dict[str, Any] = {
+        "query": query,
+        "total_documents_searched": stats.get("documents", 0),
+        "total_chunks_searched": stats.get("chunks", 0),
+        "documents_found": len({hit["filename"] for hit in hits}),
+        "relevant_documents": hits,
+        "_data_quality": {"source": "internal document index", "index": stats.get("index")},
+    }
+    if not hits:
+        result["status"] = "Not found"
+        result["message"] = "No internal document passage matches this query"
+    return result
@@ -0,0 +1,204 @@
+"""Patent Expiry Index - Date-window queries over patent families per jurisdiction
+
+Each family in uspto_patents_detailed.json is protected in a jurisdiction
+from its grant date (filing date if not granted) until expiry. The dataset
+only gives the expiry year per jurisdiction (`expiry_years`), so the day is
+taken from the filing-date anniversary, as patent terms run from filing.
+
+Per jurisdiction two structures are built once per dataset version:
+
+    expiring  expiry dates sorted -> families expiring in [start, end]
+    protected static centered interval tree -> families whose protection
+              overlaps [start, end] (e.g. still blocking generics in 2027)
+
+Both answer in O(log n + k) for k results.
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .index import find_records
+from .registry import dataset_registry
+
+PATENTS_FILE = "uspto_patents_detailed.json"
+MODES = ("expiring", "protected")
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+def expiry_date(family: Dict, jurisdiction: str) -> Optional[date]:
+    """Expiry in one jurisdiction: `expiry_years` year on the filing-date anniversary"""
+    year = (family.get("expiry_years") or {}).get(jurisdiction.lower())
+    if not isinstance(year, int):
+        return None
+    filed = _parse_date((family.get("representative_patent") or {}).get("filing_date"))
+    if filed is None:
+        return date(year, 12, 31)
+    # Feb 29 filings expire on Feb 28 in non-leap years
+    return date(year, filed.month, min(filed.day, 28) if filed.month == 2 else filed.day)
+
+
+def parse_window(start: str, end: str) -> Tuple[date, date]:
+    """"2026", "2026-06" or "2026-06-30" bounds -> inclusive (first day, last day)"""
+    def bound(value: str, last: bool) -> date:
+        value = (value or "").strip()
+        parts = value.split("-")
+        try:
+            if len(parts) == 1:
+                year = int(parts[0])
+                return date(year, 12, 31) if last else date(year, 1, 1)
+            if len(parts) == 2:
+                year, month = int(parts[0]), int(parts[1])
+                if not 1 <= month <= 12:
+                    raise ValueError
+                if not last:
+                    return date(year, month, 1)
+                following = date(year + month // 12, month % 12 + 1, 1)
+                return date.fromordinal(following.toordinal() - 1)
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid date {value!r}; use YYYY, YYYY-MM or YYYY-MM-DD")
+
+    first, last = bound(start, False), bound(end, True)
+    if first > last:
+        raise ValueError("start must not be after end")
+    return first, last
+
+
+class _IntervalNode:
+    """Intervals containing `center`, sorted by start and by end, plus the subtrees"""
+
+    __slots__ = ("center", "by_start", "starts", "by_end", "ends", "left", "right")
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, ids: np.ndarray):
+        self.center = int(np.median(np.concatenate([starts, ends])))
+        here = (starts <= self.center) & (ends >= self.center)
+        order = np.argsort(starts[here], kind="stable")
+        self.by_start, self.starts = ids[here][order], starts[here][order]
+        order = np.argsort(ends[here], kind="stable")
+        self.by_end, self.ends = ids[here][order], ends[here][order]
+        left, right = ends < self.center, starts > self.center
+        self.left = _IntervalNode(starts[left], ends[left], ids[left]) if left.any() else None
+        self.right = _IntervalNode(starts[right], ends[right], ids[right]) if right.any() else None
+
+
+class IntervalTree:
+    """Static centered interval tree over closed integer intervals"""
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        self._root = _IntervalNode(starts, ends, np.arange(len(starts))) if len(starts) else None
+
+    def overlapping(self, low: int, high: int) -> np.ndarray:
+        """Ids of the intervals sharing at least one point with [low, high]"""
+        found, node_stack = [], [self._root]
+        while node_stack:
+            node = node_stack.pop()
+            if node is None:
+                continue
+            if high < node.center:
+                # Node intervals reach the center, so they overlap iff they start by `high`
+                found.append(node.by_start[:np.searchsorted(node.starts, high, side="right")])
+                node_stack.append(node.left)
+            elif low > node.center:
+                found.append(node.by_end[np.searchsorted(node.ends, low, side="left"):])
+                node_stack.append(node.right)
+            else:
+                found.append(node.by_start)
+                node_stack.extend((node.left, node.right))
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+
+class JurisdictionIndex:
+    """Expiry and protection intervals of every family with a term in one jurisdiction"""
+
+    def __init__(self, positions: List[int], starts: List[int], ends: List[int]):
+        self.positions = np.asarray(positions, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self._by_expiry = np.argsort(self.ends, kind="stable")
+        self._sorted_ends = self.ends[self._by_expiry]
+        self._tree = IntervalTree(self.starts, self.ends)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def expiring(self, first: date, last: date) -> np.ndarray:
+        """Entries whose term ends within [first, last], earliest expiry first"""
+        lo = np.searchsorted(self._sorted_ends, first.toordinal(), side="left")
+        hi = np.searchsorted(self._sorted_ends, last.toordinal(), side="right")
+        return self._by_expiry[lo:hi]
+
+    def protected(self, first: date, last: date) -> np.ndarray:
+        """Entries in force at any time within [first, last], earliest expiry first"""
+        found = self._tree.overlapping(first.toordinal(), last.toordinal())
+        return found[np.lexsort((found, self.ends[found]))]
+
+
+def build_expiry_index(doc: Dict) -> Dict[str, JurisdictionIndex]:
+    columns: Dict[str, Tuple[List[int], List[int], List[int]]] = {}
+    for pos, family in enumerate(doc.get("patent_families", [])):
+        patent = family.get("representative_patent") or {}
+        begins = _parse_date(patent.get("grant_date")) or _parse_date(patent.get("filing_date"))
+        for jurisdiction in (family.get("expiry_years") or {}):
+            expires = expiry_date(family, jurisdiction)
+            if expires is None:
+                continue
+            start = min(begins, expires) if begins else expires
+            positions, starts, ends = columns.setdefault(jurisdiction.lower(), ([], [], []))
+            positions.append(pos)
+            starts.append(start.toordinal())
+            ends.append(expires.toordinal())
+    return {jurisdiction: JurisdictionIndex(*cols) for jurisdiction, cols in columns.items()}
+
+
+def expiry_index() -> Dict[str, JurisdictionIndex]:
+    """Per-jurisdiction index for the current patents dataset (built once per version)"""
+    return dataset_registry.derive(PATENTS_FILE, "expiry_index", build_expiry_index)
+
+
+def search_patent_expiry(jurisdiction: str, start: str, end: str, mode: str = "expiring",
+                         molecule: str = "", limit: int = 50) -> Dict:
+    """Families expiring in, or protected during, a date window in one jurisdiction"""
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of: {', '.join(MODES)}")
+    first, last = parse_window(start, end)
+    jurisdiction = (jurisdiction or "").strip().lower()
+    indexes = expiry_index()
+    index = indexes.get(jurisdiction)
+    if index is None:
+        raise ValueError(f"Unknown jurisdiction {jurisdiction!r}; available: {', '.join(sorted(indexes))}")
+
+    entries = index.expiring(first, last) if mode == "expiring" else index.protected(first, last)
+    if molecule.strip():
+        # Same molecule/brand matching as the patent search, as a mask over the hits
+        wanted = [pos for _, pos in find_records(PATENTS_FILE, molecule, fields=("molecule",))]
+        entries = entries[np.isin(index.positions[entries], wanted)]
+    families = dataset_registry.get(PATENTS_FILE).get("patent_families", [])
+    results = []
+    for entry in entries[:limit]:
+        family = families[int(index.positions[entry])]
+        results.append({
+            "molecule": family.get("molecule"),
+            "patent_family_id": family.get("patent_family_id"),
+            "therapy_area": family.get("therapy_area"),
+            "expiry_date": date.fromordinal(int(index.ends[entry])).isoformat(),
+            "protected_from": date.fromordinal(int(index.starts[entry])).isoformat(),
+            "patent_types": family.get("patent_types", []),
+            "freedom_to_operate_risk": family.get("freedom_to_operate_risk"),
+            "litigation_flag": family.get("litigation_flag"),
+            "generic_entry_estimate_range": family.get("generic_entry_estimate_range"),
+        })
+    return {
+        "jurisdiction": jurisdiction,
+        "mode": mode,
+        "window": {"start": first.isoformat(), "end": last.isoformat()},
+        "total_families": len(entries),
+        "families": results,
+        "_metadata": {"source": PATENTS_FILE, "indexed_families": len(index)}
+    }
@@ -0,0 +1,186 @@
+"""Data Quality - Per-record quality profiles computed once per dataset version
+
+Each record of a bundled dataset is walked once when the dataset is loaded
+(see DatasetRegistry.derive) and its profile is kept next to it, keyed by the
+same RecordRef the molecule index returns:
+
+    completeness   share of leaf fields that hold a value (not null, empty,
+                   "N/A", "Unknown" or "TBD")
+    ytd            year-to-date figures (keys or values mentioning YTD)
+    estimated      estimated figures
+    partial        partial figures
+    last_update    the record's own last_update / as_of date, else the date
+                   the dataset was generated; staleness_days is derived from
+                   it when the profile is read
+
+Tools attach the stored profile to their results and derive their data gap
+flags from it instead of scanning the serialized result.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+from src.config import DATA_STALE_DAYS
+from .index import RECORD_EXTRACTORS, RecordRef, resolve
+from .registry import dataset_registry
+
+# Substrings of lowercased keys and values that mark each kind of figure
+MARKERS = {
+    "ytd": ("ytd", "yyd", "yty_data", "year_to_date", "year-to-date", "year to date"),
+    "estimated": ("estimated",),
+    "partial": ("partial",),
+}
+MISSING = frozenset(["", "n/a", "na", "none", "null", "unknown", "tbd", "-"])
+RECORD_DATE_FIELDS = frozenset(["last_update", "last_updated", "updated_at", "as_of", "data_as_of"])
+DATASET_DATE_FIELDS = ("last_update", "last_updated", "generated_date")
+
+YTD_FLAG = "⚠️ Year-to-Date (YTD) data detected - full-year estimates may be annualized from Q1-Q3"
+PARTIAL_FLAG = "⚠️ Partial or estimated data - verify with additional sources"
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _mark(text: str, found: set) -> None:
+    for kind, needles in MARKERS.items():
+        if kind not in found and any(needle in text for needle in needles):
+            found.add(kind)
+
+
+def profile_record(record: Any, default_date: Optional[date] = None) -> Dict[str, Any]:
+    """Quality profile of one record, from a single walk over its fields"""
+    fields = missing = 0
+    found: set = set()
+    updated = None
+    stack = [record]
+    while stack:
+        node = stack.pop()
+        items = node.items() if isinstance(node, Mapping) else ((None, item) for item in node)
+        for key, item in items:
+            if key is not None:
+                name = str(key).lower()
+                # "is_estimated": False is not an estimate
+                if item is not False:
+                    _mark(name, found)
+                if updated is None and name in RECORD_DATE_FIELDS:
+                    updated = _parse_date(item)
+            if isinstance(item, (dict, list)) and item:
+                stack.append(item)
+                continue
+            fields += 1
+            if item is None or isinstance(item, (dict, list)):
+                missing += 1
+            elif isinstance(item, str):
+                text = item.strip().lower()
+                if text in MISSING:
+                    missing += 1
+                else:
+                    _mark(text, found)
+    updated = updated or default_date
+    return {
+        "completeness": round(1 - missing / fields, 3) if fields else 0.0,
+        "fields": fields,
+        "missing": missing,
+        "ytd": "ytd" in found,
+        "estimated": "estimated" in found,
+        "partial": "partial" in found,
+        "last_update": updated.isoformat() if updated else None,
+    }
+
+
+def _dataset_date(doc: Dict) -> Optional[date]:
+    metadata = doc.get("metadata")
+    if not isinstance(metadata, Mapping):
+        return None
+    for field in DATASET_DATE_FIELDS:
+        parsed = _parse_date(metadata.get(field))
+        if parsed:
+            return parsed
+    return None
+
+
+def build_quality_profiles(filename: str, doc: Dict) -> Dict[RecordRef, Dict[str, Any]]:
+    default_date = _dataset_date(doc)
+    return {tuple(ref): profile_record(resolve(doc, ref), default_date)
+            for ref, _ in RECORD_EXTRACTORS[filename](doc)}
+
+
+def quality_profiles(filename: str) -> Dict[RecordRef, Dict[str, Any]]:
+    """Profiles of every record in one dataset, built once per version of the file"""
+    return dataset_registry.derive(filename, "quality", lambda doc: build_quality_profiles(filename, doc))
+
+
+def build_all_quality_profiles() -> Dict[str, int]:
+    """Profile every dataset's records; called at startup after the aggregates"""
+    built = {}
+    for filename in RECORD_EXTRACTORS:
+        try:
+            built[filename] = len(quality_profiles(filename))
+        except Exception as e:
+            print(f"DEBUG: Could not profile {filename}: {e}")
+    return built
+
+
+def with_staleness(profile: Dict[str, Any], today: Optional[date] = None) -> Dict[str, Any]:
+    """Copy of a profile with staleness_days (days since last_update) as of today"""
+    updated = _parse_date(profile.get("last_update"))
+    today = today or date.today()
+    return {**profile, "staleness_days": (today - updated).days if updated else None}
+
+
+def record_quality(filename: str, ref: RecordRef) -> Optional[Dict[str, Any]]:
+    """Stored profile of one record (with its current staleness), or None if it is not profiled"""
+    profile = quality_profiles(filename).get(tuple(ref))
+    return with_staleness(profile) if profile is not None else None
+
+
+def gap_flags(profile: Dict[str, Any], stale_days: int = DATA_STALE_DAYS) -> Dict[str, Any]:
+    """Data gap flags of a result from its quality profile"""
+    if "staleness_days" not in profile:
+        profile = with_staleness(profile)
+    flags = {
+        "is_yyd": profile["ytd"],
+        "is_partial": profile["estimated"] or profile["partial"],
+        "is_stale": profile["staleness_days"] is not None and profile["staleness_days"] > stale_days,
+        "completeness": profile["completeness"],
+        "flags": []
+    }
+    if flags["is_yyd"]:
+        flags["flags"].append(YTD_FLAG)
+    if flags["is_partial"]:
+        flags["flags"].append(PARTIAL_FLAG)
+    if flags["is_stale"]:
+        flags["flags"].append(f"⚠️ Data last updated {profile['staleness_days']} days ago "
+                              f"({profile['last_update']}) - check for newer figures")
+    return flags
+
+
+def dataset_quality(filename: str, today: Optional[date] = None) -> Dict[str, Any]:
+    """Quality summary of one dataset: completeness, flagged records and staleness"""
+    profiles = [with_staleness(p, today) for p in quality_profiles(filename).values()]
+    completeness = [p["completeness"] for p in profiles]
+    ages = [p["staleness_days"] for p in profiles if p["staleness_days"] is not None]
+    dates = sorted(p["last_update"] for p in profiles if p["last_update"])
+    return {
+        "dataset": filename,
+        "version": dataset_registry.version,
+        "records": len(profiles),
+        "completeness": {
+            "mean": round(sum(completeness) / len(completeness), 3) if completeness else None,
+            "min": min(completeness) if completeness else None,
+        },
+        "flagged": {kind: sum(1 for p in profiles if p[kind]) for kind in MARKERS},
+        "last_update": {"oldest": dates[0], "newest": dates[-1]} if dates else None,
+        "stale_records": sum(1 for age in ages if age > DATA_STALE_DAYS),
+        "max_staleness_days": max(ages) if ages else None,
+    }
+
+
+def quality_report(datasets: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """dataset_quality for the given datasets (default: every bundled one)"""
+    return {filename: dataset_quality(filename) for filename in (datasets or RECORD_EXTRACTORS)}
@@ -0,0 +1,329 @@
+"""Dataset Registry - Process-wide cache of parsed data files"""
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.config import DATA_COMPILED_DIR, DATA_DIR as DATA_DIR_OVERRIDE, STREAM_COMPILE_MIN_MB, USE_COMPILED_DATA
+from .columnar import ColumnarDocument, compile_dataset, compiled_path
+
+DATA_DIR = DATA_DIR_OVERRIDE or os.path.dirname(os.path.abspath(__file__))
+
+
+class Snapshot:
+    """One consistent version of the loaded data files and their derived artifacts.
+
+    A swapped-in snapshot is never modified except to add files loaded for
+    the first time, so a request holding it sees the same data throughout.
+    """
+
+    def __init__(self, version: int, entries: Dict[str, Dict[str, Any]]):
+        self.version = version
+        self.entries = entries
+        self.created_at = datetime.now().isoformat()
+
+
+# Snapshot pinned by the current request (see DatasetRegistry.pin)
+_pinned: ContextVar[Optional[Snapshot]] = ContextVar("data_snapshot", default=None)
+
+
+class DatasetRegistry:
+    """Parses each data file once and keeps it in memory.
+
+    A file is re-parsed only when its mtime or size changes, so refreshed
+    datasets still take effect without a restart. Returned documents are
+    shared between requests and must be treated as read-only.
+
+    By default every access stats the file. With start_watching(), a
+    background thread polls instead: it reloads changed files, rebuilds their
+    derived artifacts and then swaps in a new Snapshot, so requests never pay
+    for a reload and never see a cold cache. The snapshot version is exposed
+    for caches that key on the data they were computed from.
+
+    When an up-to-date compiled copy exists (see src.data.columnar) it is
+    memory-mapped instead of parsing the JSON. Files too large to parse whole
+    are stream-compiled on first load so json.load never sees them.
+    """
+
+    def __init__(self, data_dir: str = DATA_DIR, compiled_dir: Optional[str] = None,
+                 use_compiled: bool = USE_COMPILED_DATA):
+        self.data_dir = data_dir
+        self.compiled_dir = compiled_dir or DATA_COMPILED_DIR or os.path.join(data_dir, "compiled")
+        self.use_compiled = use_compiled
+        self._snapshot = Snapshot(1, {})
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "reloads": 0, "errors": 0, "swaps": 0}
+        self._refresh_hooks: List[Callable[[], Any]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._watch_interval = 0.0
+        self._fingerprint: Optional[Tuple[float, str]] = None
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _signature(self, filename: str):
+        stat = os.stat(os.path.join(self.data_dir, filename))
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @property
+    def version(self) -> int:
+        """Version of the snapshot this request reads (bumped on every swap)"""
+        return (_pinned.get() or self._snapshot).version
+
+    def _entry(self, filename: str) -> Dict[str, Any]:
+        """Return the cache entry for a file, parsing it only if it changed"""
+        snapshot = _pinned.get() or self._snapshot
+        entry = snapshot.entries.get(filename)
+        if entry is not None and self._watcher is not None:
+            # The watcher swaps in changed files; no stat on the request path
+            self._count("hits")
+            return entry
+
+        try:
+            signature = self._signature(filename)
+        except OSError:
+            self._count("errors")
+            raise
+        if entry is not None and entry["signature"] == signature:
+            self._count("hits")
+            return entry
+
+        with self._lock:
+            # Another thread may have parsed the file while we waited
+            current = self._snapshot
+            entry = current.entries.get(filename)
+            if entry is not None and entry["signature"] == signature:
+                self._counters["hits"] += 1
+                return entry
+
+            try:
+                new_entry = self._load(filename, signature)
+            except Exception:
+                self._counters["errors"] += 1
+                raise
+
+            if entry is None:
+                # First load of this file: every snapshot would have read the same
+                self._counters["misses"] += 1
+                current.entries[filename] = new_entry
+            else:
+                self._counters["reloads"] += 1
+                self._counters["swaps"] += 1
+                self._snapshot = Snapshot(current.version + 1, {**current.entries, filename: new_entry})
+            return new_entry
+
+    def _load(self, filename: str, signature) -> Dict[str, Any]:
+        """Parse (or map) one version of a file into a fresh cache entry"""
+        data = self._open_compiled(filename, signature)
+        if data is None:
+            data = self._compile_large(filename, signature)
+        data_format = "columnar"
+        if data is None:
+            with open(os.path.join(self.data_dir, filename), 'r') as f:
+                data = json.load(f)
+            data_format = "json"
+        return {
+            "signature": signature,
+            "data": data,
+            "format": data_format,
+            "derived": {},
+            "builders": {},
+            "loaded_at": datetime.now().isoformat()
+        }
+
+    def _open_compiled(self, filename: str, signature) -> Optional[ColumnarDocument]:
+        """Memory-map the compiled copy of a file if it was built from this version"""
+        if not self.use_compiled:
+            return None
+        path = compiled_path(self.compiled_dir, filename)
+        if not os.path.exists(path):
+            return None
+        try:
+            document = ColumnarDocument(path)
+        except (OSError, ValueError) as e:
+            print(f"DEBUG: Ignoring compiled {path}: {e}")
+            return None
+        if document.source_signature != signature:
+            print(f"DEBUG: Compiled {path} is stale, parsing {filename} (run: python -m src.data compile)")
+            document.close()
+            return None
+        return document
+
+    def _compile_large(self, filename: str, signature) -> Optional[ColumnarDocument]:
+        """Stream-compile a file above STREAM_COMPILE_MIN_MB and map the result"""
+        if not self.use_compiled or not STREAM_COMPILE_MIN_MB or signature[1] < STREAM_COMPILE_MIN_MB * 1024 * 1024:
+            return None
+        path = compiled_path(self.compiled_dir, filename)
+        try:
+            os.makedirs(self.compiled_dir, exist_ok=True)
+            print(f"DEBUG: {filename} is {signature[1] // (1024 * 1024)} MB, stream-compiling to {path}")
+            compile_dataset(os.path.join(self.data_dir, filename), path)
+            return ColumnarDocument(path)
+        except Exception as e:
+            print(f"DEBUG: Could not stream-compile {filename}, parsing it instead: {e}")
+            return None
+
+    def get(self, filename: str) -> Dict:
+        """Return the parsed contents of a data file, parsing it only if it changed"""
+        return self._entry(filename)["data"]
+
+    def derive(self, filename: str, name: str, builder: Callable[[Dict], Any]) -> Any:
+        """Return builder(data) for a file, computed once per version of that file.
+
+        Derived artifacts (indexes, aggregates) live on the cache entry, so they
+        are dropped together with the document when the file changes.
+        """
+        entry = self._entry(filename)
+        derived = entry["derived"]
+        if name not in derived:
+            # Built outside the lock; a concurrent duplicate build is harmless
+            derived[name] = builder(entry["data"])
+            # Remembered so a refresh can rebuild it before the swap
+            entry["builders"][name] = builder
+        return derived[name]
+
+    @contextmanager
+    def pin(self, snapshot: Optional[Snapshot] = None) -> Iterator[Snapshot]:
+        """Read one snapshot (default: the current one) for the duration of the block"""
+        token = self.pin_snapshot(snapshot)
+        try:
+            yield _pinned.get()
+        finally:
+            self.unpin(token)
+
+    def pin_snapshot(self, snapshot: Optional[Snapshot] = None) -> Token:
+        return _pinned.set(snapshot or self._snapshot)
+
+    def unpin(self, token: Token) -> None:
+        _pinned.reset(token)
+
+    def on_refresh(self, hook: Callable[[], Any]) -> None:
+        """Run `hook` against each new snapshot before it is swapped in (to warm caches)"""
+        self._refresh_hooks.append(hook)
+
+    def refresh(self) -> bool:
+        """Reload changed files and rebuild their derived artifacts, then swap atomically.
+
+        Requests keep reading the previous snapshot until the swap. A file that
+        fails to load (e.g. caught mid-write) keeps its previous version and is
+        retried on the next refresh. Returns True if a new snapshot was swapped in.
+        """
+        with self._refresh_lock:
+            current = self._snapshot
+            changed = {}
+            for filename, entry in current.entries.items():
+                try:
+                    signature = self._signature(filename)
+                except OSError:
+                    continue
+                if signature != entry["signature"]:
+                    changed[filename] = signature
+            if not changed:
+                return False
+
+            snapshot = Snapshot(current.version + 1, dict(current.entries))
+            reloaded = []
+            with self.pin(snapshot):
+                for filename, signature in changed.items():
+                    started = time.perf_counter()
+                    try:
+                        entry = self._load(filename, signature)
+                        for name, builder in current.entries[filename]["builders"].items():
+                            entry["derived"][name] = builder(entry["data"])
+                            entry["builders"][name] = builder
+                    except Exception as e:
+                        self._count("errors")
+                        print(f"DEBUG: Could not reload {filename}, keeping the previous version: {e}")
+                        continue
+                    snapshot.entries[filename] = entry
+                    reloaded.append(f"{filename} ({time.perf_counter() - started:.2f}s)")
+                if not reloaded:
+                    return False
+                for hook in self._refresh_hooks:
+                    try:
+                        hook()
+                    except Exception as e:
+                        print(f"DEBUG: Refresh hook {getattr(hook, '__name__', hook)} failed: {e}")
+
+            with self._lock:
+                # Keep files another thread loaded for the first time meanwhile
+                for filename, entry in self._snapshot.entries.items():
+                    snapshot.entries.setdefault(filename, entry)
+                snapshot.version = self._snapshot.version + 1
+                self._snapshot = snapshot
+                self._counters["reloads"] += len(reloaded)
+                self._counters["swaps"] += 1
+            print(f"[OK] Data snapshot {snapshot.version}: reloaded {', '.join(reloaded)}")
+            return True
+
+    def start_watching(self, interval: float) -> None:
+        """Poll the data files every `interval` seconds and refresh in the background"""
+        if self._watcher is not None or interval <= 0:
+            return
+        self._watch_interval = interval
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"DEBUG: Data refresh failed: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="data-watcher", daemon=True)
+        self._watcher.start()
+
+    def fingerprint(self) -> str:
+        """Identity of the data files' current contents (names, mtimes, sizes), equal in every process.
+
+        Unlike `version`, it can key caches shared between worker processes.
+        The file stats are reused for a second.
+        """
+        now = time.monotonic()
+        cached = self._fingerprint
+        if cached is not None and now - cached[0] < 1.0:
+            return cached[1]
+        digest = hashlib.sha1()
+        for path in sorted(glob.glob(os.path.join(self.data_dir, "*.json"))):
+            stat = os.stat(path)
+            digest.update(f"{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size};".encode("utf-8"))
+        value = digest.hexdigest()[:16]
+        self._fingerprint = (now, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop all cached documents (counters are kept)"""
+        with self._lock:
+            self._snapshot = Snapshot(self._snapshot.version + 1, {})
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/reload counters plus the files currently held in memory"""
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                **self._counters,
+                "version": snapshot.version,
+                "snapshot_created_at": snapshot.created_at,
+                "watch_interval_seconds": self._watch_interval if self._watcher is not None else 0,
+                "files": {
+                    name: {
+                        "size_bytes": entry["signature"][1],
+                        "format": entry["format"],
+                        "loaded_at": entry["loaded_at"],
+                        "derived": sorted(entry["derived"])
+                    }
+                    for name, entry in snapshot.entries.items()
+                }
+            }
+
+
+# Shared by every MockDataSources call in this process
+dataset_registry = DatasetRegistry()
@@ -0,0 +1,333 @@
+"""Molecule Resolver - Trigram index mapping spelling variants, synonyms and brands to canonical names"""
+import re
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .fallback import normalize_key
+from .registry import dataset_registry
+
+# Equivalent names (INN / USAN / common abbreviations). The member that
+# appears in the bundled data becomes canonical, otherwise the first one.
+SYNONYM_GROUPS = [
+    ("Paracetamol", "Acetaminophen", "APAP"),
+    ("Salbutamol", "Albuterol"),
+    ("Adrenaline", "Epinephrine"),
+    ("Noradrenaline", "Norepinephrine"),
+    ("Glibenclamide", "Glyburide"),
+    ("Furosemide", "Frusemide"),
+    ("Lidocaine", "Lignocaine"),
+    ("Ciclosporin", "Cyclosporine"),
+    ("Rifampicin", "Rifampin"),
+    ("Aciclovir", "Acyclovir"),
+    ("Pethidine", "Meperidine"),
+    ("Levothyroxine", "L-Thyroxine", "Thyroxine"),
+    ("Isoprenaline", "Isoproterenol"),
+    ("Bendroflumethiazide", "Bendrofluazide"),
+    ("Colecalciferol", "Cholecalciferol", "Vitamin D3"),
+    ("Metformin", "Dimethylbiguanide"),
+    ("Acetylsalicylic Acid", "Aspirin", "ASA"),
+    ("Tenofovir Disoproxil Fumarate", "TDF"),
+    ("Dolutegravir/Lamivudine/Tenofovir", "TLD"),
+]
+
+FUZZY_THRESHOLD = 0.45
+# A fuzzy match only replaces a tool input when it is a typo of the input: one edit
+# (insertion, deletion, substitution or transposition) away, or at least this similar
+# with a near-equal length. Distinct molecules of one class (Empagliflozin vs
+# Dapagliflozin, Esomeprazole vs Omeprazole) stay apart and come back as suggestions.
+CANONICAL_THRESHOLD = 0.85
+CANONICAL_LENGTH_RATIO = 0.85
+_MIN_TYPO_LENGTH = 6
+
+# "Metformin SR 500 mg Tablets" -> "Metformin": dose, release type and dosage form dropped
+_FORMULATION_RE = re.compile(
+    r"\s+(?:\d|(?:SR|XR|ER|CR|MR|IR|DR|ODT|LA)\b|(?:tablets?|capsules?|injections?|syrups?|suspensions?|"
+    r"inhalers?|creams?|ointments?|gels?|drops|solutions?|powders?|sachets?)\b).*$",
+    re.IGNORECASE,
+)
+# Brand placeholders in the competitor data that name no product
+_PLACEHOLDER_BRANDS = frozenset(["generics", "generic", "multiple biosimilars", "biosimilars", "others"])
+
+
+def trigrams(text: str) -> Set[str]:
+    """Distinct character trigrams of the normalized, space-padded text"""
+    padded = f"  {normalize_key(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    """Dice coefficient over character trigrams (1.0 = same normalized name)"""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return 2 * len(ta & tb) / (len(ta) + len(tb))
+
+
+def edit_distance(a: str, b: str, limit: int = 2) -> int:
+    """Optimal string alignment distance of the normalized names (adjacent transpositions count
+    as one edit); anything above `limit` is reported as limit + 1"""
+    a, b = normalize_key(a), normalize_key(b)
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return min(current[-1], limit + 1)
+
+
+def is_typo(query: str, alias: str, score: float) -> bool:
+    """Whether a fuzzy match is a misspelling of the same name rather than a different one"""
+    shorter, longer = sorted((len(normalize_key(query)), len(normalize_key(alias))))
+    if shorter >= _MIN_TYPO_LENGTH and edit_distance(query, alias, limit=1) <= 1:
+        return True
+    return score >= CANONICAL_THRESHOLD and longer and shorter / longer >= CANONICAL_LENGTH_RATIO
+
+
+class MoleculeResolver:
+    """Ranked lookup of a free-text name against known molecule names and aliases.
+
+    Every alias (the canonical name itself, a synonym or a brand) is one entry.
+    Exact matches are a dictionary hit; fuzzy matches count shared trigrams
+    for all entries at once with NumPy over per-trigram posting arrays, so a
+    lookup touches only the postings of the query's own trigrams.
+    """
+
+    def __init__(self):
+        self._canonical: List[str] = []
+        self._aliases: List[str] = []
+        self._kinds: List[str] = []
+        self._exact: Dict[str, List[int]] = {}
+        self._postings: Dict[str, List[int]] = {}
+        # (trigram -> posting array, trigram count per alias), published together
+        self._frozen: Optional[Tuple[Dict[str, np.ndarray], np.ndarray]] = None
+        self._lock = threading.Lock()
+
+    def add(self, alias: str, canonical: Optional[str] = None, kind: str = "molecule") -> None:
+        """Register an alias that resolves to `canonical` (defaults to the alias itself)"""
+        key = normalize_key(alias)
+        if not key:
+            return
+        canonical = canonical or alias
+        for entry in self._exact.get(key, []):
+            if self._canonical[entry] == canonical:
+                return
+
+        entry = len(self._aliases)
+        self._canonical.append(canonical)
+        self._aliases.append(alias)
+        self._kinds.append(kind)
+        self._exact.setdefault(key, []).append(entry)
+        for gram in trigrams(alias):
+            self._postings.setdefault(gram, []).append(entry)
+        self._frozen = None
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_key(name) in self._exact
+
+    def freeze(self) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """Posting arrays for lookups, built once after the last add()"""
+        with self._lock:
+            if self._frozen is None:
+                postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in self._postings.items()}
+                sizes = np.array([len(trigrams(alias)) for alias in self._aliases], dtype=np.float32)
+                self._frozen = (postings, sizes)
+            return self._frozen
+
+    def resolve(self, query: str, limit: int = 5, threshold: float = FUZZY_THRESHOLD) -> List[Dict]:
+        """Best canonical matches for a query, highest score first (one row per canonical name)"""
+        key = normalize_key(query)
+        if not key or not self._aliases:
+            return []
+        postings, sizes = self._frozen or self.freeze()
+
+        scored: List[Tuple[float, int, str]] = [(1.0, entry, self._kinds[entry]) for entry in self._exact.get(key, [])]
+
+        grams = trigrams(query)
+        hits = [postings[gram] for gram in grams if gram in postings]
+        if hits:
+            counts = np.bincount(np.concatenate(hits), minlength=len(self._aliases))
+            scores = 2 * counts / (len(grams) + sizes)
+            candidates = np.flatnonzero(scores >= threshold)
+            if len(candidates) > limit * 4:
+                candidates = candidates[np.argpartition(-scores[candidates], limit * 4)[:limit * 4]]
+            scored.extend((float(scores[entry]), int(entry), "fuzzy") for entry in candidates)
+
+        results, seen = [], set()
+        for score, entry, match in sorted(scored, key=lambda item: (-item[0], item[1])):
+            canonical = self._canonical[entry]
+            if canonical in seen:
+                continue
+            seen.add(canonical)
+            results.append({
+                "name": canonical,
+                "alias": self._aliases[entry],
+                "score": round(score, 3),
+                "match": match
+            })
+            if len(results) == limit:
+                break
+        return results
+
+    def lookup(self, query: str, limit: int = 5) -> Tuple[str, List[Dict]]:
+        """(name to query, suggestions) for a tool input.
+
+        Exact names, synonyms, brands and typos resolve to their canonical
+        molecule with no suggestions; otherwise the input is kept as is and the
+        fuzzy candidates are returned as suggestions.
+        """
+        matches = self.resolve(query, limit=limit)
+        if matches:
+            best = matches[0]
+            if best["match"] != "fuzzy" or is_typo(query, best["alias"], best["score"]):
+                return best["name"], []
+        return query.strip(), matches
+
+    def canonical(self, query: str) -> str:
+        """Canonical name for a query, or the query itself when it is not a known name or a typo of one"""
+        return self.lookup(query, limit=1)[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "aliases": len(self._aliases),
+            "canonical_names": len(set(self._canonical)),
+            "trigrams": len(self._postings)
+        }
+
+
+# ---------------------------------------------------------------------------
+# Names found in the bundled datasets: (alias, canonical, kind)
+# ---------------------------------------------------------------------------
+
+NameRow = Tuple[str, Optional[str], str]
+
+
+def _molecule_rows(section: str) -> Callable[[Dict], Iterator[NameRow]]:
+    def rows(doc: Dict) -> Iterator[NameRow]:
+        for item in doc.get(section, []):
+            if item.get("molecule"):
+                yield item["molecule"], None, "molecule"
+    return rows
+
+
+def _exim_rows(doc: Dict) -> Iterator[NameRow]:
+    for section in ("api_exports", "api_imports"):
+        for item in doc.get(section, []):
+            name = str(item.get("molecule") or "")
+            if name.endswith(" API"):
+                name = name[:-4]
+            if name:
+                yield name, None, "molecule"
+    for item in doc.get("formulation_exports", []):
+        # "Metformin SR 500 mg Tablets" -> "Metformin"
+        name = _FORMULATION_RE.sub("", str(item.get("formulation_name") or "")).strip()
+        if name:
+            yield name, None, "molecule"
+
+
+def _competitor_rows(doc: Dict) -> Iterator[NameRow]:
+    for segment in doc.values():
+        for item in segment.get("molecules", []):
+            molecule = item.get("molecule")
+            if not molecule:
+                continue
+            yield molecule, None, "molecule"
+            for brand in item.get("brands", []):
+                if normalize_key(brand) not in _PLACEHOLDER_BRANDS:
+                    yield brand, molecule, "brand"
+
+
+def _market_rows(doc: Dict) -> Iterator[NameRow]:
+    # Brand leaders carry no molecule; build_resolver maps them through the other datasets' brands
+    for segment in doc.values():
+        for leader in segment.get("brand_leaders", []):
+            if leader.get("brand"):
+                yield leader["brand"], None, "brand"
+
+
+NAME_EXTRACTORS = {
+    "clinical_trials_mock.json": _molecule_rows("trials"),
+    "uspto_patents_detailed.json": _molecule_rows("patent_families"),
+    "exim_data.json": _exim_rows,
+    "competitor_landscape.json": _competitor_rows,
+    "market_overview.json": _market_rows,
+}
+
+
+def _dataset_names(filename: str) -> List[NameRow]:
+    """Names in one dataset, extracted once per version of the file"""
+    return dataset_registry.derive(filename, "molecule_names", lambda doc: list(NAME_EXTRACTORS[filename](doc)))
+
+
+def build_resolver(name_rows: Iterable[NameRow]) -> MoleculeResolver:
+    """Resolver over the given names, the built-in molecule table and the synonym groups"""
+    from . import MockDataSources
+
+    rows = [(name, None, "molecule") for name in MockDataSources.MOLECULES]
+    rows += [(info["brand"], name, "brand") for name, info in MockDataSources.MOLECULES.items()]
+    rows += list(name_rows)
+
+    known = {normalize_key(alias) for alias, canonical, kind in rows if kind == "molecule"}
+    brand_molecules = {normalize_key(alias): canonical
+                       for alias, canonical, kind in rows if kind == "brand" and canonical}
+    resolver = MoleculeResolver()
+    for alias, canonical, kind in rows:
+        if kind == "brand" and not canonical:
+            # A brand resolves to its molecule; brands of unknown molecules are not registered
+            canonical = brand_molecules.get(normalize_key(alias))
+            if not canonical:
+                continue
+        resolver.add(alias, canonical, kind)
+    for group in SYNONYM_GROUPS:
+        canonical = next((name for name in group if normalize_key(name) in known), group[0])
+        for name in group:
+            resolver.add(name, canonical, "molecule" if name == canonical else "synonym")
+    # Published resolvers are read by concurrent tool calls; none of them builds the arrays
+    resolver.freeze()
+    return resolver
+
+
+_resolver_cache: Dict[str, object] = {"sources": None, "resolver": None}
+_resolver_lock = threading.Lock()
+
+
+def molecule_resolver() -> MoleculeResolver:
+    """Process-wide resolver, rebuilt when any of the bundled datasets changes"""
+    sources = []
+    for filename in NAME_EXTRACTORS:
+        try:
+            sources.append(_dataset_names(filename))
+        except Exception as e:
+            print(f"DEBUG: Could not read names from {filename}: {e}")
+    with _resolver_lock:
+        cached = _resolver_cache["sources"]
+        # Name lists are cached per file version, so identity means "unchanged"
+        if cached is None or len(cached) != len(sources) or any(a is not b for a, b in zip(cached, sources)):
+            _resolver_cache["resolver"] = build_resolver(row for rows in sources for row in rows)
+            _resolver_cache["sources"] = sources
+        return _resolver_cache["resolver"]
+
+
+def resolve_molecule(query: str, limit: int = 5) -> List[Dict]:
+    """Ranked canonical matches for a molecule, brand or misspelled name"""
+    return molecule_resolver().resolve(query, limit=limit)
+
+
+def canonical_molecule(query: str) -> str:
+    """Normalize a tool input to its canonical molecule name (unchanged if unknown)"""
+    return molecule_resolver().canonical(query)
+
+
+def resolve_tool_input(query: str) -> Tuple[str, List[str]]:
+    """Canonical molecule for a tool input, plus the names of close but different molecules
+    when the input was kept unchanged"""
+    name, suggestions = molecule_resolver().lookup(query)
+    return name, [match["name"] for match in suggestions]
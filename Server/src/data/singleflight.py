@@ -0,0 +1,101 @@
+"""Single-flight - Coalesce concurrent identical lookups into one computation
+
+When several threads ask for the same key at the same time, the first one
+(the leader) computes the result and the others wait for it instead of
+repeating the work. Nothing is cached: once the leader finishes, the next
+call for the key computes again.
+
+    result = single_flight.do(("iqvia", "Semaglutide", 3), lambda: fetch(...))
+
+Callers annotate results in place, so no two callers share an object: when
+a call has waiters, resolve() snapshots the result with one deep copy before
+releasing them, the leader keeps the original and every waiter gets its own
+copy of the snapshot, which nobody holds a reference to otherwise.
+"""
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Per-key in-flight computations shared by concurrent callers"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0}
+
+    def claim(self, key: Hashable) -> Tuple[_Call, bool]:
+        """Join the in-flight call for `key`, or start one; True means the caller must resolve() it"""
+        with self._lock:
+            self._counters["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._counters["coalesced"] += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            self._counters["executions"] += 1
+            return call, True
+
+    def resolve(self, key: Hashable, call: _Call, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Publish the leader's outcome and release the waiters.
+
+        Must be called before the leader touches `result` again: waiters copy
+        from a snapshot taken here, not from the leader's object.
+        """
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            if error is not None:
+                self._counters["errors"] += 1
+            # No one can join once the call is unregistered
+            shared = call.waiters > 0
+        call.result = copy.deepcopy(result) if shared and error is None else None
+        call.error = error
+        call.done.set()
+
+    @staticmethod
+    def wait(call: _Call, timeout: Optional[float] = None) -> Any:
+        """Own copy of the result of a call joined as a waiter (re-raises the leader's error)"""
+        if not call.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for an in-flight lookup")
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.result)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """fn() for the first concurrent caller of `key`; the others get copies of its result"""
+        call, leader = self.claim(key)
+        if not leader:
+            return self.wait(call)
+        try:
+            result = fn()
+        except BaseException as e:
+            self.resolve(key, call, error=e)
+            raise
+        self.resolve(key, call, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self._counters["calls"]
+            return {
+                **self._counters,
+                "in_flight": len(self._calls),
+                "coalesced_ratio": round(self._counters["coalesced"] / calls, 4) if calls else 0.0
+            }
+
+
+# Shared by every data-source lookup in this process
+single_flight = SingleFlight()
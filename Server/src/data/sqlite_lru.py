@@ -0,0 +1,113 @@
+"""SQLite LRU - Size-bounded key/value store in one SQLite file shared by worker processes
+
+Used by the web, tool and chat result caches. Each entry records:
+
+    size       payload bytes; once the table holds more than max_bytes, the
+               least recently accessed entries are evicted
+    created    when it was stored
+    expires    when it stops being served (deleted on the next read or write)
+    accessed   last read, rounded to touch_interval: a hit only writes when the
+               stored time is older than that, so reads of hot entries from
+               every worker do not queue for SQLite's single writer lock
+
+Every thread uses its own connection in WAL mode.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    tag TEXT,
+    payload BLOB,
+    size INTEGER,
+    created REAL,
+    expires REAL,
+    accessed REAL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires);
+"""
+
+# Seconds a hit may leave an entry's access time stale
+TOUCH_INTERVAL = 60.0
+
+
+class SQLiteLRU:
+    """Entries by key in a SQLite file, expired by time and evicted least recently used first by size"""
+
+    def __init__(self, path: str, max_bytes: int, mmap_bytes: int = 0, touch_interval: float = TOUCH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.mmap_bytes = mmap_bytes
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"expired": 0, "evictions": 0}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if self.mmap_bytes:
+                conn.execute(f"PRAGMA mmap_size={self.mmap_bytes}")
+        return conn
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        """(payload, created) of a live entry, or None"""
+        conn, now = self._conn(), time.time() if now is None else now
+        row = conn.execute("SELECT payload, created, expires, accessed FROM entries WHERE key = ?",
+                           (key,)).fetchone()
+        if row is None:
+            return None
+        payload, created, expires, accessed = row
+        if expires <= now:
+            conn.execute("DELETE FROM entries WHERE key = ? AND expires <= ?", (key, now))
+            conn.commit()
+            self._count("expired")
+            return None
+        if now - accessed >= self.touch_interval:
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return payload, created
+
+    def put(self, key: str, payload: Any, expires: float, tag: Optional[str] = None,
+            now: Optional[float] = None) -> None:
+        """Store an entry, then drop expired ones and evict down to max_bytes"""
+        conn, now = self._conn(), time.time() if now is None else now
+        conn.execute("INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?,?)",
+                     (key, tag, payload, len(payload), now, expires, now))
+        conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total > self.max_bytes:
+            evicted = []
+            for old_key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+                if total <= self.max_bytes:
+                    break
+                evicted.append((old_key,))
+                total -= size
+            conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+            self._count("evictions", len(evicted))
+        conn.commit()
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM entries")
+        conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        entries, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        with self._lock:
+            counters = dict(self._counters)
+        return {"path": self.path, "entries": entries, "bytes": size, "max_bytes": self.max_bytes, **counters}
@@ -0,0 +1,82 @@
+"""Stand-in Source Servers - Local HTTP APIs serving the bundled datasets
+
+One small threaded HTTP server per data source, answering the request shape
+HttpAdapter sends (`GET /<source>?molecule=<name>`) from MockDataSources.
+An optional per-request delay imitates a remote API, so the adapter layer
+can be exercised and benchmarked without network access:
+
+    python -m src.data standin --latency-ms 40
+    DATA_SOURCE_MODE=http DATA_SOURCE_URLS="iqvia=http://127.0.0.1:8701,..." python main.py
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from .adapters import SOURCES
+
+
+class _SourceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+    server: "StandinServer"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            return self._send(200, {"status": "ok", "source": self.server.source})
+        if url.path != f"/{self.server.source}":
+            return self._send(404, {"detail": "Unknown path"})
+        molecule = parse_qs(url.query).get("molecule", [""])[0]
+        if not molecule.strip():
+            return self._send(400, {"detail": "molecule is required"})
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        from . import MockDataSources
+
+        return self._send(200, getattr(MockDataSources, SOURCES[self.server.source])(molecule))
+
+    def _send(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, source: str, host: str, port: int, latency_ms: float = 0):
+        super().__init__((host, port), _SourceHandler)
+        self.source = source
+        self.latency = latency_ms / 1000
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_standin_servers(sources: Optional[Iterable[str]] = None, host: str = "127.0.0.1", base_port: int = 0,
+                          latency_ms: float = 0) -> Tuple[List[StandinServer], Dict[str, str]]:
+    """Serve each source on its own port in background threads (base_port 0: any free ports).
+
+    Returns the servers (call shutdown() on each) and the {source: url} map for HttpAdapter.
+    """
+    servers = []
+    for i, source in enumerate(sources or SOURCES):
+        server = StandinServer(source, host, base_port + i if base_port else 0, latency_ms)
+        threading.Thread(target=server.serve_forever, name=f"standin-{source}", daemon=True).start()
+        servers.append(server)
+    return servers, {server.source: server.url for server in servers}
+
+
+def urls_spec(urls: Dict[str, str]) -> str:
+    """{source: url} -> the DATA_SOURCE_URLS format"""
+    return ",".join(f"{source}={url}" for source, url in urls.items())
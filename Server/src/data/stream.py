@@ -0,0 +1,160 @@
+"""Streaming JSON - Read large dataset files one record at a time
+
+The bundled datasets are a top-level object whose big members are arrays of
+records (`trials`, `patent_families`, `api_exports`, ...). `iter_members`
+walks such a file with a sliding text buffer and `json.JSONDecoder.raw_decode`,
+so only the record being decoded and one read chunk are in memory at a time,
+however large the file is.
+
+    for key, value in iter_members(path):
+        if isinstance(value, ArrayStream):
+            for record in value:     # one record at a time
+                ...
+"""
+import json
+import re
+from typing import Any, Iterator, TextIO, Tuple
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*\Z")
+_DECODER = json.JSONDecoder()
+
+
+class _Reader:
+    """Sliding window over a text file that decodes one JSON value at a time"""
+
+    def __init__(self, f: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._consumed = 0
+        self._eof = False
+
+    def _fill(self, size: int) -> bool:
+        """Append at least `size` more characters; False at end of file"""
+        if self._eof:
+            return False
+        # Drop what has been consumed so the buffer stays about one chunk long
+        self._consumed += self._pos
+        self._buf = self._buf[self._pos:]
+        self._pos = 0
+        data = self._f.read(size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf += data
+        return True
+
+    def offset(self) -> int:
+        return self._consumed + self._pos
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at end of file)"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill(self._chunk_size):
+                return ""
+
+    def expect(self, chars: str) -> str:
+        """Consume the next non-whitespace character, which must be one of `chars`"""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} at offset {self.offset()}, found {char or 'end of file'!r}")
+        self._pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value, reading more of the file as needed"""
+        self.peek()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+                # A number running up to the buffer edge may continue in the next read
+                truncated = isinstance(value, (int, float)) and _NUMBER_TAIL.match(self._buf, end)
+                if self._eof or (end < len(self._buf) and not truncated):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill(size)
+            # Grow reads geometrically so one huge value is not re-parsed per chunk
+            size *= 2
+
+
+class ArrayStream:
+    """Iterator over the elements of a JSON array that is being read from a file"""
+
+    def __init__(self, reader: _Reader):
+        self._reader = reader
+        self._done = False
+        self._started = False
+
+    def __iter__(self) -> "ArrayStream":
+        return self
+
+    def __next__(self) -> Any:
+        if self._done:
+            raise StopIteration
+        reader = self._reader
+        if not self._started:
+            self._started = True
+            if reader.peek() == "]":
+                reader.expect("]")
+                self._done = True
+                raise StopIteration
+        else:
+            if reader.expect(",]") == "]":
+                self._done = True
+                raise StopIteration
+        return reader.value()
+
+    def drain(self) -> None:
+        for _ in self:
+            pass
+
+
+def iter_members(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, Any]]:
+    """Yield (key, value) for each member of a top-level JSON object, in file order.
+
+    Array members are yielded as an ArrayStream that must be iterated before
+    advancing to the next member (unconsumed elements are skipped); every
+    other member is decoded whole.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _Reader(f, chunk_size)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected an object key at offset {reader.offset()}")
+            reader.expect(":")
+            if reader.peek() == "[":
+                reader.expect("[")
+                stream = ArrayStream(reader)
+                yield key, stream
+                stream.drain()
+            else:
+                yield key, reader.value()
+            if reader.expect(",}") == "}":
+                break
+        if reader.peek():
+            raise ValueError(f"Unexpected data after the top-level object at offset {reader.offset()}")
+
+
+def iter_records(path: str, section: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Records of one top-level array (e.g. "trials"), decoded one at a time"""
+    for key, value in iter_members(path, chunk_size):
+        if key == section:
+            if isinstance(value, ArrayStream):
+                yield from value
+            return
+
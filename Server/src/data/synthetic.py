@@ -0,0 +1,456 @@
+"""Synthetic Datasets - Vectorized bulk generator for scale and load testing
+
+Builds datasets with the same schemas as clinical_trials_mock.json,
+uspto_patents_detailed.json, exim_data.json and market_overview.json at
+arbitrary size. Every field is drawn for a whole chunk at once with NumPy;
+categorical values are JSON-encoded once per vocabulary entry, so producing
+a row is a single string format. Files are written chunk by chunk and never
+held in memory.
+
+    python -m src.data synth --out /tmp/pharma-10m --trials 10000000
+"""
+import json
+import os
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional, Sequence, TextIO
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+THERAPY_AREAS = [
+    "Metabolic / Obesity", "Diabetes / Renal", "Oncology (EGFR / NSCLC)", "Oncology - Immunotherapy",
+    "HIV / Infectious Diseases", "Respiratory / COPD", "Respiratory - Asthma", "CNS / Schizophrenia",
+    "CNS - Depression", "Cardiovascular - Hypertension", "Heart Failure", "Gastroenterology",
+    "Autoimmune / Dermatology", "Rheumatoid Arthritis", "Chronic Kidney Disease", "Anti-infective",
+]
+COUNTRIES = ["USA", "Canada", "UK", "Germany", "France", "Spain", "Italy", "Japan", "China", "India",
+             "Brazil", "Mexico", "South Africa", "Australia", "Nigeria", "Kenya", "Philippines", "Vietnam"]
+REGIONS = ["India", "US", "EU", "Africa", "LATAM", "SEA", "Middle East"]
+PORTS = ["Mumbai", "Chennai", "Hyderabad", "Nhava Sheva", "Kolkata", "Shanghai", "Rotterdam", "Hamburg"]
+PHASES = ["Phase 1", "Phase 2", "Phase 3", "Phase 4"]
+PHASE_TITLES = ["Phase I", "Phase II", "Phase III", "Phase IV"]
+TRIAL_STATUSES = ["Recruiting", "Active, not recruiting", "Completed", "Terminated", "Withdrawn", "Not yet recruiting"]
+STUDY_TYPES = ["Interventional", "Observational"]
+INTERVENTIONS = ["Drug - Small Molecule", "Drug - GLP-1 Analog", "Biologic - Monoclonal Antibody",
+                 "Drug - Long-acting Injectable", "Drug - Inhaled Combination", "Drug - Fixed-dose Combination"]
+SPONSORS = [("Novo Nordisk", "Industry"), ("AstraZeneca", "Industry"), ("Pfizer", "Industry"),
+            ("Cipla", "Industry"), ("Sun Pharma", "Industry"), ("ViiV Healthcare", "Industry"),
+            ("Mayo Clinic", "Academic"), ("Johns Hopkins", "Academic"), ("NIH", "Government"),
+            ("ICMR", "Government"), ("Cleveland Clinic", "Academic"), ("Teva", "Industry")]
+COLLABORATORS = ["University of Toronto", "Cleveland Clinic", "AIIMS Delhi", "Karolinska Institute",
+                 "Charite Berlin", "University of Tokyo", "Imperial College London", "Duke Clinical Research Institute"]
+ENDPOINTS = ["Percent weight reduction at week 60", "HbA1c change from baseline at week 26",
+             "Progression-free survival", "Overall survival", "Annualized exacerbation rate",
+             "Change in eGFR slope", "Viral suppression (<50 copies/mL) at week 48", "PANSS total score change"]
+SECONDARY_ENDPOINTS = ["Waist circumference", "Cardiometabolic markers", "Quality of life",
+                       "Safety/Tolerability", "Hospitalization rate", "Pharmacokinetics"]
+RISK_LEVELS = ["Low", "Medium", "High", "Very High"]
+TRIAL_NOTES = ["High global competition; strong relevance for expansion insights.",
+               "Low competition; potential first-mover advantage.",
+               "Differentiated formulation; watch enrollment pace.",
+               "Generic-heavy space; limited novelty."]
+PATENT_TYPES = ["Composition", "Process", "Formulation", "Use", "Device"]
+LEGAL_STATUSES = ["Granted", "Pending", "Expired", "Lapsed", "Opposed"]
+IPC_CODES = ["A61K38/26", "A61P3/10", "C07D401/00", "A61K31/506", "A61K9/00", "C07K16/28", "A61P35/00"]
+MAIN_CLAIMS = ["Compound composition and dosing regimen", "Crystalline salt form and process of preparation",
+               "Extended release oral formulation", "Method of treating a disclosed indication",
+               "Inhalation device and combination composition", "Long-acting injectable suspension"]
+FTO_RISKS = ["None", "Low", "Medium", "High"]
+DOSAGE_FORMS = ["Solid Oral", "Injectable", "Inhalation", "Topical", "Oral Liquid"]
+FORM_NAMES = ["Tablets", "Capsules", "Injection", "Inhaler", "Cream", "Suspension"]
+DRIVERS = ["Rising prevalence", "Urbanization", "Improved diagnosis", "Generic price erosion",
+           "Payer coverage expansion", "Aging population", "Combination therapy uptake"]
+BARRIERS = ["Low adherence", "Price sensitivity", "Limited specialist access", "Reimbursement gaps",
+            "Regulatory delays"]
+COMPANIES = ["Cipla", "Sun Pharma", "AstraZeneca", "Novartis", "GSK", "MSD", "Boehringer Ingelheim",
+             "Lupin", "Dr. Reddy's", "Zydus", "Pfizer", "Sanofi", "Teva", "Glenmark"]
+
+_NAME_HEADS = ["Ab", "Bel", "Cab", "Dap", "Elo", "Fin", "Gli", "Hal", "Iva", "Jal", "Ket", "Lor", "Mel",
+               "Nor", "Oza", "Pem", "Qui", "Ris", "Sem", "Tir", "Umo", "Val", "Xan", "Zol"]
+_NAME_MIDS = ["a", "e", "i", "o", "u", "ara", "eli", "ima", "ota", "uvi", "ero", "ani"]
+_NAME_TAILS = ["glutide", "gliflozin", "tinib", "mab", "pril", "sartan", "statin", "prazole", "tegravir",
+               "clidinium", "piprazole", "oxetine", "navir", "parin", "lukast", "terol"]
+_BRAND_HEADS = ["Zen", "Vio", "Cor", "Lum", "Ner", "Pax", "Rel", "Tav", "Ori", "Sym", "Xel", "Dur"]
+_BRAND_TAILS = ["ivo", "ara", "exa", "ora", "ix", "elle", "on", "yra", "asta", "imo"]
+
+
+def _escape(text: str) -> str:
+    """JSON string body (without quotes) so values can be spliced into row templates"""
+    return json.dumps(text, ensure_ascii=False)[1:-1]
+
+
+def _encoded(values: Sequence) -> np.ndarray:
+    """JSON literal for every vocabulary entry, indexable by a NumPy code array"""
+    out = np.empty(len(values), dtype=object)
+    out[:] = [json.dumps(v, separators=(",", ":"), ensure_ascii=False) for v in values]
+    return out
+
+
+def _escaped(values: Sequence[str]) -> np.ndarray:
+    out = np.empty(len(values), dtype=object)
+    out[:] = [_escape(v) for v in values]
+    return out
+
+
+def _combos(rng: np.random.Generator, vocab: Sequence, count: int, min_k: int, max_k: int) -> np.ndarray:
+    """`count` pre-encoded JSON lists of distinct vocabulary entries (rows pick one by index)"""
+    sizes = rng.integers(min_k, max_k + 1, size=count)
+    return _encoded([[vocab[i] for i in sorted(rng.choice(len(vocab), size=k, replace=False))] for k in sizes])
+
+
+def _iso_dates(days: np.ndarray) -> List[str]:
+    """Vectorized day offsets from 2000-01-01 -> ISO date strings"""
+    return np.datetime_as_string(np.datetime64("2000-01-01") + days.astype("timedelta64[D]"), unit="D").tolist()
+
+
+class Vocabulary:
+    """Molecule, brand and therapy-area universe shared by all generated datasets"""
+
+    def __init__(self, rng: np.random.Generator, molecules: int):
+        names = [h + m + t for h in _NAME_HEADS for m in _NAME_MIDS for t in _NAME_TAILS]
+        rng.shuffle(names)
+        if molecules > len(names):
+            names += [f"{names[i % len(names)]}-{i // len(names)}" for i in range(len(names), molecules)]
+        self.molecules = names[:molecules]
+        self.molecule_ta = rng.integers(len(THERAPY_AREAS), size=molecules)
+
+        brands = [h + t for h in _BRAND_HEADS for t in _BRAND_TAILS]
+        self.brands = _escaped(brands)
+
+        self.molecule_names = _escaped(self.molecules)
+        self.therapy_areas = _escaped(THERAPY_AREAS)
+
+
+# ---------------------------------------------------------------------------
+# Row generators: each returns the JSON text of `n` records
+# ---------------------------------------------------------------------------
+
+_TRIAL_ROW = (
+    '{"trial_id":"CT-%d-%08d","title":"A %s Study of %s in %s","molecule":"%s","therapy_area":"%s",'
+    '"phase":"%s","status":"%s","start_date":"%s","estimated_completion_date":"%s","study_type":"%s",'
+    '"intervention_type":"%s","sample_size":%d,"countries":%s,"sponsor":%s,"collaborators":%s,'
+    '"indication_specifics":%s,"competitive_density_score_10":%d,"risk_of_late_stage_competitor":"%s",'
+    '"opportunity_relevance_score_10":%d,"notes":"%s"}'
+)
+
+
+def _trial_rows(rng: np.random.Generator, vocab: Vocabulary, start: int, n: int) -> List[str]:
+    mol = rng.integers(len(vocab.molecules), size=n)
+    ta = vocab.molecule_ta[mol]
+    phase = rng.choice(len(PHASES), size=n, p=[0.3, 0.35, 0.25, 0.1])
+    start_days = rng.integers(5000, 9600, size=n)
+    duration = rng.integers(180, 2200, size=n)
+    specifics = _encoded([
+        {"subtype": f"{area} cohort {k}", "primary_endpoint": ENDPOINTS[(i + k) % len(ENDPOINTS)],
+         "secondary_endpoints": [SECONDARY_ENDPOINTS[(i + k + j) % len(SECONDARY_ENDPOINTS)] for j in range(2)]}
+        for i, area in enumerate(THERAPY_AREAS) for k in range(4)
+    ])
+    columns = (
+        (2000 + start_days // 365).tolist(),
+        range(start, start + n),
+        _escaped(PHASE_TITLES)[phase].tolist(),
+        vocab.molecule_names[mol].tolist(),
+        vocab.therapy_areas[ta].tolist(),
+        vocab.molecule_names[mol].tolist(),
+        vocab.therapy_areas[ta].tolist(),
+        _escaped(PHASES)[phase].tolist(),
+        _escaped(TRIAL_STATUSES)[rng.integers(len(TRIAL_STATUSES), size=n)].tolist(),
+        _iso_dates(start_days),
+        _iso_dates(start_days + duration),
+        _escaped(STUDY_TYPES)[(rng.random(n) < 0.15).astype(np.int64)].tolist(),
+        _escaped(INTERVENTIONS)[rng.integers(len(INTERVENTIONS), size=n)].tolist(),
+        np.round(rng.lognormal(6.0, 1.0, size=n)).astype(np.int64).clip(20, 20000).tolist(),
+        _combos(rng, COUNTRIES, 64, 1, 6)[rng.integers(64, size=n)].tolist(),
+        _encoded([{"name": name, "type": kind} for name, kind in SPONSORS])[rng.integers(len(SPONSORS), size=n)].tolist(),
+        _combos(rng, COLLABORATORS, 32, 0, 3)[rng.integers(32, size=n)].tolist(),
+        specifics[ta * 4 + rng.integers(4, size=n)].tolist(),
+        rng.integers(1, 11, size=n).tolist(),
+        _escaped(RISK_LEVELS)[rng.integers(len(RISK_LEVELS), size=n)].tolist(),
+        rng.integers(1, 11, size=n).tolist(),
+        _escaped(TRIAL_NOTES)[rng.integers(len(TRIAL_NOTES), size=n)].tolist(),
+    )
+    return [_TRIAL_ROW % row for row in zip(*columns)]
+
+
+_PATENT_ROW = (
+    '{"molecule":"%s","therapy_area":"%s","patent_family_id":"PF-%08d","representative_patent":{'
+    '"country":"%s","application_number":"%s%02d/%03d,%03d","publication_number":"%s%d/%07d A1",'
+    '"patent_number":"%s%d","priority_date":"%s","filing_date":"%s","grant_date":"%s","claims_count":%d,'
+    '"ipc_codes":%s,"main_claim":"%s","legal_status":"%s"},"patent_types":%s,'
+    '"expiry_years":{"us":%d,"eu":%d,"jp":%d,"in":%d},"patent_strength_score_10":%d,'
+    '"innovation_trend_score_10":%d,"competitor_filings_count":%d,"litigation_flag":%s,'
+    '"freedom_to_operate_risk":"%s","remaining_exclusivity_years":%d}'
+)
+
+
+def _patent_rows(rng: np.random.Generator, vocab: Vocabulary, start: int, n: int) -> List[str]:
+    mol = rng.integers(len(vocab.molecules), size=n)
+    offices = ["US", "EP", "IN", "CN", "JP"]
+    office = rng.integers(len(offices), size=n)
+    priority = rng.integers(3000, 9000, size=n)
+    filing = priority + rng.integers(200, 1500, size=n)
+    grant = filing + rng.integers(400, 2200, size=n)
+    us_expiry = 2000 + (filing // 365) + 20 + rng.integers(0, 6, size=n)
+    this_year = date.today().year
+    columns = (
+        vocab.molecule_names[mol].tolist(),
+        vocab.therapy_areas[vocab.molecule_ta[mol]].tolist(),
+        range(start, start + n),
+        _escaped(offices)[office].tolist(),
+        _escaped(offices)[office].tolist(),
+        rng.integers(10, 18, size=n).tolist(),
+        rng.integers(0, 1000, size=n).tolist(),
+        rng.integers(0, 1000, size=n).tolist(),
+        _escaped(offices)[office].tolist(),
+        (2000 + filing // 365).tolist(),
+        rng.integers(0, 10_000_000, size=n).tolist(),
+        _escaped(offices)[office].tolist(),
+        rng.integers(5_000_000, 12_000_000, size=n).tolist(),
+        _iso_dates(priority),
+        _iso_dates(filing),
+        _iso_dates(grant),
+        rng.integers(5, 60, size=n).tolist(),
+        _combos(rng, IPC_CODES, 32, 1, 3)[rng.integers(32, size=n)].tolist(),
+        _escaped(MAIN_CLAIMS)[rng.integers(len(MAIN_CLAIMS), size=n)].tolist(),
+        _escaped(LEGAL_STATUSES)[rng.integers(len(LEGAL_STATUSES), size=n)].tolist(),
+        _combos(rng, PATENT_TYPES, 32, 1, 3)[rng.integers(32, size=n)].tolist(),
+        us_expiry.tolist(),
+        (us_expiry - rng.integers(0, 2, size=n)).tolist(),
+        (us_expiry - rng.integers(0, 3, size=n)).tolist(),
+        (us_expiry + rng.integers(0, 2, size=n)).tolist(),
+        rng.integers(1, 11, size=n).tolist(),
+        rng.integers(1, 11, size=n).tolist(),
+        rng.integers(0, 80, size=n).tolist(),
+        np.where(rng.random(n) < 0.2, "true", "false").tolist(),
+        _escaped(FTO_RISKS)[rng.integers(len(FTO_RISKS), size=n)].tolist(),
+        np.maximum(us_expiry - this_year, 0).tolist(),
+    )
+    return [_PATENT_ROW % row for row in zip(*columns)]
+
+
+def _yearwise(base: np.ndarray, growth: np.ndarray, years: int) -> np.ndarray:
+    """(n, years) compounding series from a base value and per-row growth rate"""
+    return np.round(base[:, None] * (1 + growth[:, None]) ** np.arange(years)[None, :]).astype(np.int64)
+
+
+def _cagr(series: np.ndarray) -> np.ndarray:
+    periods = series.shape[1] - 1
+    return np.round((np.power(series[:, -1] / np.maximum(series[:, 0], 1), 1 / periods) - 1) * 100, 1)
+
+
+_YEARS_2020 = '{"2020":%d,"2021":%d,"2022":%d,"2023":%d,"2024":%d}'
+
+_API_EXPORT_ROW = (
+    '{"molecule":"%s API","hs_code":"%d","ports":%s,"destination_countries":%s,'
+    '"yearwise_volume_tonnes":' + _YEARS_2020 + ',"export_value_usd_mn":' + _YEARS_2020 + ','
+    '"cagr_percent_2020_2024":%s,"import_dependency_percent":%d,"supply_risk_score_10":%d,'
+    '"opportunity_score_10":%d,"notes":"Synthetic API export row."}'
+)
+
+_API_IMPORT_ROW = (
+    '{"molecule":"%s API","hs_code":"%d","source_countries":%s,'
+    '"yearwise_import_volume_tonnes":' + _YEARS_2020 + ',"import_value_usd_mn":' + _YEARS_2020 + ','
+    '"china_dependence_percent":%d,"risk_level":"%s","supply_risk_score_10":%d,'
+    '"notes":"Synthetic API import row."}'
+)
+
+_FORMULATION_ROW = (
+    '{"formulation_name":"%s %d mg %s","dosage_form":"%s","destination_regions":%s,"ports":%s,'
+    '"yearwise_export_packs_mn":' + _YEARS_2020 + ',"export_value_usd_mn":' + _YEARS_2020 + ','
+    '"cagr_percent_2020_2024":%s,"opportunity_score_10":%d,"top_countries":%s}'
+)
+
+
+def _trade_series(rng: np.random.Generator, n: int, low: float, high: float):
+    volume = _yearwise(rng.uniform(low, high, size=n), rng.normal(0.06, 0.05, size=n), 5)
+    price = rng.uniform(2, 40, size=n)
+    value = np.round(volume * price[:, None] / 1000 * rng.uniform(0.9, 1.1, size=(n, 5))).astype(np.int64)
+    return volume, value
+
+
+def _api_export_rows(rng: np.random.Generator, vocab: Vocabulary, start: int, n: int) -> List[str]:
+    mol = rng.integers(len(vocab.molecules), size=n)
+    volume, value = _trade_series(rng, n, 500, 60000)
+    columns = (
+        vocab.molecule_names[mol].tolist(),
+        rng.integers(29000000, 30049999, size=n).tolist(),
+        _combos(rng, PORTS, 16, 1, 3)[rng.integers(16, size=n)].tolist(),
+        _combos(rng, COUNTRIES, 64, 2, 5)[rng.integers(64, size=n)].tolist(),
+        *volume.T.tolist(),
+        *value.T.tolist(),
+        _cagr(volume).tolist(),
+        rng.integers(0, 90, size=n).tolist(),
+        rng.integers(1, 11, size=n).tolist(),
+        rng.integers(1, 11, size=n).tolist(),
+    )
+    return [_API_EXPORT_ROW % row for row in zip(*columns)]
+
+
+def _api_import_rows(rng: np.random.Generator, vocab: Vocabulary, start: int, n: int) -> List[str]:
+    mol = rng.integers(len(vocab.molecules), size=n)
+    volume, value = _trade_series(rng, n, 200, 20000)
+    columns = (
+        vocab.molecule_names[mol].tolist(),
+        rng.integers(29000000, 30049999, size=n).tolist(),
+        _combos(rng, COUNTRIES, 64, 1, 3)[rng.integers(64, size=n)].tolist(),
+        *volume.T.tolist(),
+        *value.T.tolist(),
+        rng.integers(0, 100, size=n).tolist(),
+        _escaped(RISK_LEVELS)[rng.integers(len(RISK_LEVELS), size=n)].tolist(),
+        rng.integers(1, 11, size=n).tolist(),
+    )
+    return [_API_IMPORT_ROW % row for row in zip(*columns)]
+
+
+def _formulation_rows(rng: np.random.Generator, vocab: Vocabulary, start: int, n: int) -> List[str]:
+    mol = rng.integers(len(vocab.molecules), size=n)
+    form = rng.integers(len(FORM_NAMES), size=n)
+    packs, value = _trade_series(rng, n, 10, 2000)
+    columns = (
+        vocab.molecule_names[mol].tolist(),
+        (rng.integers(1, 40, size=n) * 25).tolist(),
+        _escaped(FORM_NAMES)[form].tolist(),
+        _escaped(DOSAGE_FORMS)[form % len(DOSAGE_FORMS)].tolist(),
+        _combos(rng, REGIONS, 32, 1, 3)[rng.integers(32, size=n)].tolist(),
+        _combos(rng, PORTS, 16, 1, 2)[rng.integers(16, size=n)].tolist(),
+        *packs.T.tolist(),
+        *value.T.tolist(),
+        _cagr(packs).tolist(),
+        rng.integers(1, 11, size=n).tolist(),
+        _combos(rng, COUNTRIES, 64, 2, 3)[rng.integers(64, size=n)].tolist(),
+    )
+    return [_FORMULATION_ROW % row for row in zip(*columns)]
+
+
+_MARKET_ROW = (
+    '"segment_%08d":{"therapy_area":"%s","country":"%s",'
+    '"historical_market_size_usd_mn":{"2019":%d,"2020":%d,"2021":%d,"2022":%d,"2023":%d,"2024":%d},'
+    '"forecast_market_size_usd_mn":{"2025":%d,"2026":%d,"2027":%d,"2028":%d},'
+    '"cagr_percent_2024_2028":%s,"competitor_count":%d,"brand_leaders":[%s],'
+    '"epi_data":{"prevalence_mn":%s,"incidence_mn":%s,"mortality_rate_per_100k":%s},'
+    '"drivers":%s,"barriers":%s,"rx_volume_mn":%s,"unmet_need_score":%s}'
+)
+
+
+def _market_rows(rng: np.random.Generator, vocab: Vocabulary, start: int, n: int) -> List[str]:
+    series = _yearwise(rng.uniform(50, 20000, size=n), rng.normal(0.09, 0.04, size=n), 10)
+    leaders = np.empty(n, dtype=object)
+    brand = rng.integers(len(vocab.brands), size=(n, 3))
+    company = rng.integers(len(COMPANIES), size=(n, 3))
+    share = np.sort(rng.integers(3, 40, size=(n, 3)), axis=1)[:, ::-1]
+    companies = _escaped(COMPANIES)
+    leaders[:] = [
+        ",".join('{"brand":"%s","company":"%s","market_share_percent":%d}' % (vocab.brands[b], companies[c], s)
+                 for b, c, s in zip(brand[i], company[i], share[i]))
+        for i in range(n)
+    ]
+    columns = (
+        range(start, start + n),
+        vocab.therapy_areas[rng.integers(len(THERAPY_AREAS), size=n)].tolist(),
+        _escaped(COUNTRIES + ["Global", "LATAM"])[rng.integers(len(COUNTRIES) + 2, size=n)].tolist(),
+        *series.T.tolist(),
+        _cagr(series[:, 5:]).tolist(),
+        rng.integers(3, 80, size=n).tolist(),
+        leaders.tolist(),
+        np.round(rng.uniform(0.5, 90, size=n), 1).tolist(),
+        np.round(rng.uniform(0.1, 8, size=n), 1).tolist(),
+        np.round(rng.uniform(0.5, 40, size=n), 1).tolist(),
+        _combos(rng, DRIVERS, 32, 2, 3)[rng.integers(32, size=n)].tolist(),
+        _combos(rng, BARRIERS, 16, 1, 2)[rng.integers(16, size=n)].tolist(),
+        np.round(rng.uniform(1, 400, size=n), 1).tolist(),
+        np.round(rng.uniform(3, 10, size=n), 1).tolist(),
+    )
+    return [_MARKET_ROW % row for row in zip(*columns)]
+
+
+# ---------------------------------------------------------------------------
+# Streaming writers
+# ---------------------------------------------------------------------------
+
+RowGenerator = Callable[[np.random.Generator, Vocabulary, int, int], List[str]]
+
+
+def _stream_rows(f: TextIO, rng: np.random.Generator, vocab: Vocabulary,
+                 generator: RowGenerator, total: int, chunk_size: int) -> None:
+    for start in range(0, total, chunk_size):
+        n = min(chunk_size, total - start)
+        if start:
+            f.write(",\n")
+        f.write(",\n".join(generator(rng, vocab, start, n)))
+
+
+def _write_document(path: str, metadata: Optional[Dict], sections: List[tuple],
+                    rng: np.random.Generator, vocab: Vocabulary, chunk_size: int,
+                    trailer: Optional[Dict] = None) -> None:
+    """Write {"metadata": ..., "<section>": [rows...], ...} without materializing it"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("{")
+        parts = 0
+        if metadata is not None:
+            f.write('"metadata":' + json.dumps(metadata))
+            parts += 1
+        for name, generator, total in sections:
+            f.write((",\n" if parts else "\n") + json.dumps(name) + ":[\n")
+            _stream_rows(f, rng, vocab, generator, total, chunk_size)
+            f.write("\n]")
+            parts += 1
+        for key, value in (trailer or {}).items():
+            f.write(",\n" + json.dumps(key) + ":" + json.dumps(value))
+        f.write("\n}\n")
+    os.replace(tmp_path, path)
+
+
+def _write_mapping(path: str, rng: np.random.Generator, vocab: Vocabulary,
+                   generator: RowGenerator, total: int, chunk_size: int) -> None:
+    """Write a segment mapping ({"segment_00000000": {...}, ...}) chunk by chunk"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        _stream_rows(f, rng, vocab, generator, total, chunk_size)
+        f.write("\n}\n")
+    os.replace(tmp_path, path)
+
+
+def generate_datasets(out_dir: str, trials: int = 0, patents: int = 0, trade: int = 0, markets: int = 0,
+                      molecules: int = 5000, seed: int = 7,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Dict]:
+    """Write the requested synthetic datasets into out_dir; returns per-file row counts and timings.
+
+    Files use the bundled file names so the directory can be served directly
+    (DATA_DIR=<out_dir>) or compiled with `python -m src.data compile`.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    vocab = Vocabulary(rng, molecules)
+    today = date.today().isoformat()
+    report = {}
+
+    def timed(filename: str, rows: int, write: Callable[[str], None]) -> None:
+        started = time.perf_counter()
+        write(os.path.join(out_dir, filename))
+        report[filename] = {"rows": rows, "seconds": round(time.perf_counter() - started, 2)}
+
+    if trials:
+        timed("clinical_trials_mock.json", trials, lambda path: _write_document(
+            path, {"dataset_name": "Synthetic Clinical Trials", "version": "1.0", "generated_date": today,
+                   "seed": seed}, [("trials", _trial_rows, trials)], rng, vocab, chunk_size))
+    if patents:
+        timed("uspto_patents_detailed.json", patents, lambda path: _write_document(
+            path, {"dataset_name": "Synthetic USPTO Patent Families", "version": "1.0", "generated_date": today,
+                   "seed": seed}, [("patent_families", _patent_rows, patents)], rng, vocab, chunk_size))
+    if trade:
+        exports, imports = trade // 2, trade // 4
+        timed("exim_data.json", trade, lambda path: _write_document(
+            path, {"source": "Synthetic EXIM Analytics", "years_covered": ["2020", "2021", "2022", "2023", "2024"],
+                   "regions_covered": REGIONS, "seed": seed},
+            [("api_exports", _api_export_rows, exports),
+             ("api_imports", _api_import_rows, imports),
+             ("formulation_exports", _formulation_rows, trade - exports - imports)],
+            rng, vocab, chunk_size))
+    if markets:
+        timed("market_overview.json", markets, lambda path: _write_mapping(
+            path, rng, vocab, _market_rows, markets, chunk_size))
+    return report
@@ -0,0 +1,224 @@
+"""Trade Analytics - Vectorized EXIM time-series metrics for every molecule at once
+
+Each exim_data.json section (api_exports, api_imports, formulation_exports)
+is loaded once per dataset version into year-aligned NumPy matrices, one row
+per record and one column per year (NaN where a year is missing):
+
+    volume      standardized units (tonnes -> kg, million packs -> packs)
+    value       USD million
+    unit price  USD per kg / per pack
+
+Year-over-year growth, CAGR, price erosion and outlier flags are then computed
+for the whole section in a few array operations, and tool results read the
+row of the matched record (see trade_analytics).
+
+Outliers are year-over-year moves more than 2 standard deviations away from
+the other records of the same section that year: a single five-year series
+is too short for a z-score against itself to ever exceed 2.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .columnar import ColumnarSection
+from .index import RecordRef
+from .registry import dataset_registry
+
+TRADE_FILE = "exim_data.json"
+OUTLIER_THRESHOLD = 2.0
+
+# Mass units -> kg
+UNIT_FACTORS = {"g": 0.001, "kg": 1.0, "mt": 1000.0, "metric_ton": 1000.0, "ton": 1000.0, "tonnes": 1000.0}
+
+# Section -> (volume series, value series, dataset unit, standard unit, factor to the standard unit)
+SECTIONS = {
+    "api_exports": ("yearwise_volume_tonnes", "export_value_usd_mn", "Tonnes", "kg", 1000.0),
+    "api_imports": ("yearwise_import_volume_tonnes", "import_value_usd_mn", "Tonnes", "kg", 1000.0),
+    "formulation_exports": ("yearwise_export_packs_mn", "export_value_usd_mn", "Packs Mn", "packs", 1e6),
+}
+
+METRICS = ("volume", "value", "unit_price")
+
+
+# ---------------------------------------------------------------------------
+# Array operations (rows = series, columns = years)
+# ---------------------------------------------------------------------------
+
+def convert_units(values: Any, from_unit: str, to_unit: str = "kg") -> np.ndarray:
+    """Mass values converted between g, kg and metric tons; unknown units are left unchanged"""
+    values = np.asarray(values, dtype=np.float64)
+    source, target = UNIT_FACTORS.get(from_unit.lower()), UNIT_FACTORS.get(to_unit.lower())
+    if source is None or target is None:
+        return values
+    return values * source / target
+
+
+def yoy_growth(matrix: np.ndarray) -> np.ndarray:
+    """Percent change from each year to the next (NaN where the earlier year is missing or not positive)"""
+    previous, current = matrix[:, :-1], matrix[:, 1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(previous > 0, (current - previous) / previous * 100, np.nan)
+
+
+def cagr(matrix: np.ndarray, years: np.ndarray) -> np.ndarray:
+    """Compound annual growth in percent between each row's first and last reported year"""
+    if matrix.shape[1] == 0:
+        return np.full(matrix.shape[0], np.nan)
+    rows = np.arange(matrix.shape[0])
+    present = ~np.isnan(matrix)
+    first = present.argmax(axis=1)
+    last = matrix.shape[1] - 1 - present[:, ::-1].argmax(axis=1)
+    start, end = matrix[rows, first], matrix[rows, last]
+    span = (years[last] - years[first]).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = ((end / start) ** (1 / span) - 1) * 100
+    return np.where((span > 0) & (start > 0) & (end >= 0), growth, np.nan)
+
+
+def zscores(matrix: np.ndarray, axis: int = 0) -> np.ndarray:
+    """Population z-scores along `axis`, ignoring NaN (0 where there is no spread)"""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    count = (~np.isnan(matrix)).sum(axis=axis, keepdims=True)
+    filled = np.where(np.isnan(matrix), 0.0, matrix)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = filled.sum(axis=axis, keepdims=True) / count
+        deviation = np.where(np.isnan(matrix), 0.0, matrix - mean)
+        std = np.sqrt((deviation ** 2).sum(axis=axis, keepdims=True) / count)
+        return np.where((std > 0) & ~np.isnan(matrix), (matrix - mean) / std, 0.0)
+
+
+def outlier_mask(matrix: np.ndarray, threshold: float = OUTLIER_THRESHOLD, axis: int = 0) -> np.ndarray:
+    """True where a value lies more than `threshold` standard deviations from the mean along `axis`"""
+    return np.abs(zscores(matrix, axis=axis)) > threshold
+
+
+# ---------------------------------------------------------------------------
+# Section series
+# ---------------------------------------------------------------------------
+
+class SectionSeries:
+    """Year-aligned series and derived metrics of every record in one exim section"""
+
+    def __init__(self, years: Sequence[int], volume: np.ndarray, value: np.ndarray, unit: str):
+        self.years = np.asarray(years, dtype=np.int64)
+        self.unit = unit
+        with np.errstate(divide="ignore", invalid="ignore"):
+            unit_price = np.where(volume > 0, value * 1e6 / volume, np.nan)
+        self.series = {"volume": volume, "value": value, "unit_price": unit_price}
+        self.yoy = {metric: yoy_growth(matrix) for metric, matrix in self.series.items()}
+        self.cagr = {metric: cagr(matrix, self.years) for metric, matrix in self.series.items()}
+        # Unit price falling over the covered years: generic competition / commoditization
+        self.price_erosion = self.cagr["unit_price"] < 0
+        # Peer comparison: each year's growth against the section's other records that year
+        self.outliers = {metric: outlier_mask(self.yoy[metric], axis=0) for metric in ("volume", "unit_price")}
+        self.outlier_z = {metric: zscores(self.yoy[metric], axis=0) for metric in ("volume", "unit_price")}
+        self._peers = self._peer_summary()
+
+    def __len__(self) -> int:
+        return len(self.series["volume"])
+
+    def row(self, pos: int) -> Dict[str, Any]:
+        years = self.years.tolist()
+        outliers = []
+        for metric, mask in self.outliers.items():
+            for col in np.flatnonzero(mask[pos]):
+                outliers.append({
+                    "year": years[col + 1],
+                    "metric": f"{metric}_yoy_growth",
+                    "growth_percent": _round(self.yoy[metric][pos, col]),
+                    "z_score": _round(self.outlier_z[metric][pos, col]),
+                })
+        return {
+            "years": years,
+            "volume_unit": self.unit,
+            "volume": _rounded(self.series["volume"][pos]),
+            "value_usd_mn": _rounded(self.series["value"][pos]),
+            "unit_price_usd": _rounded(self.series["unit_price"][pos], 4),
+            "yoy_growth_percent": {metric: _rounded(self.yoy[metric][pos]) for metric in METRICS},
+            "cagr_percent": {metric: _round(self.cagr[metric][pos]) for metric in METRICS},
+            "price_erosion": bool(self.price_erosion[pos]),
+            "outliers": sorted(outliers, key=lambda o: (o["year"], o["metric"])),
+            "peers": self._peers,
+        }
+
+    def _peer_summary(self) -> Dict[str, Any]:
+        """Section-wide context each row can be compared with"""
+        with np.errstate(invalid="ignore"):
+            return {
+                "records": len(self),
+                "median_cagr_percent": {
+                    metric: _round(np.nanmedian(values)) if np.isfinite(values).any() else None
+                    for metric, values in self.cagr.items()
+                },
+                "price_erosion_records": int(self.price_erosion.sum()),
+            }
+
+
+def _round(value: float, digits: int = 2) -> Optional[float]:
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def _rounded(values: np.ndarray, digits: int = 2) -> List[Optional[float]]:
+    return [_round(v, digits) for v in values]
+
+
+def _compiled_matrices(records: ColumnarSection, fields: Sequence[str]) -> Optional[Tuple[List[int], List[np.ndarray]]]:
+    """Matrices straight from the compiled `field.<year>` columns (no record decoding)"""
+    found = []
+    for field in fields:
+        prefix = f"{field}."
+        columns = {int(name[len(prefix):]): name for name in records.columns()
+                   if name.startswith(prefix) and name[len(prefix):].isdigit()}
+        if not columns or any(not isinstance(records.column(name), np.ndarray) for name in columns.values()):
+            return None
+        found.append(columns)
+    years = sorted(set().union(*found))
+    missing = np.full(len(records), np.nan)
+    return years, [np.column_stack([records.column(columns[year]) if year in columns else missing
+                                    for year in years]) for columns in found]
+
+
+def _year_matrices(records: Sequence[Dict], fields: Sequence[str]) -> Tuple[List[int], List[np.ndarray]]:
+    """One (records x years) matrix per year -> number field, NaN where a year is missing"""
+    if isinstance(records, ColumnarSection):
+        compiled = _compiled_matrices(records, fields)
+        if compiled is not None:
+            return compiled
+
+    series = [[] for _ in fields]
+    for record in records:
+        for i, field in enumerate(fields):
+            series[i].append(record.get(field) or {})
+    years = sorted({int(year) for rows in series for row in rows for year in row})
+    column = {year: i for i, year in enumerate(years)}
+    matrices = []
+    for rows in series:
+        matrix = np.full((len(rows), len(years)), np.nan)
+        for i, row in enumerate(rows):
+            for year, amount in row.items():
+                if isinstance(amount, (int, float)):
+                    matrix[i, column[int(year)]] = amount
+        matrices.append(matrix)
+    return years, matrices
+
+
+def build_trade_analytics(doc: Dict) -> Dict[str, SectionSeries]:
+    sections = {}
+    for section, (volume_field, value_field, _, unit, factor) in SECTIONS.items():
+        years, (volume, value) = _year_matrices(doc.get(section, []), (volume_field, value_field))
+        sections[section] = SectionSeries(years, volume * factor, value, unit)
+    return sections
+
+
+def section_analytics() -> Dict[str, SectionSeries]:
+    """Analytics of every exim section for the current dataset version (built once per version)"""
+    return dataset_registry.derive(TRADE_FILE, "trade_analytics", build_trade_analytics)
+
+
+def trade_analytics(ref: RecordRef) -> Optional[Dict[str, Any]]:
+    """Series and metrics of one exim record, with its section's peer context"""
+    section, pos = ref
+    series = section_analytics().get(section)
+    if series is None or not 0 <= pos < len(series):
+        return None
+    return series.row(pos)
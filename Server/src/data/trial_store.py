@@ -0,0 +1,239 @@
+"""Trial Store - Embedded SQLite copy of clinical_trials_mock.json with secondary indexes
+
+The trials are loaded once per dataset version into a SQLite file next to the
+compiled datasets. Filtering and grouping run as indexed SQL, so pipeline
+questions ("recruiting Phase 3 oncology trials completing before 2027, by
+sponsor") do not scan or regroup the trial list in Python.
+
+Each thread reads through its own read-only connection; the database is
+written once in WAL mode by whichever process finds it missing or stale and
+swapped into place atomically. Every version of the source file gets its own
+database file, so requests still reading an older data snapshot keep seeing
+the matching trials after a refresh.
+"""
+import glob
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.config import TRIAL_STORE_PATH
+from .index import tokenize
+from .registry import dataset_registry
+
+TRIALS_FILE = "clinical_trials_mock.json"
+
+# Columns a caller may filter or group by, mapped to their SQL column
+GROUP_COLUMNS = {
+    "molecule": "molecule",
+    "therapy_area": "therapy_area",
+    "phase": "phase",
+    "status": "status",
+    "sponsor": "sponsor",
+    "completion_year": "substr(completion_date, 1, 4)",
+}
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE trials (
+    id INTEGER PRIMARY KEY,
+    trial_id TEXT,
+    molecule TEXT,
+    therapy_area TEXT,
+    phase TEXT COLLATE NOCASE,
+    status TEXT COLLATE NOCASE,
+    sponsor TEXT COLLATE NOCASE,
+    start_date TEXT,
+    completion_date TEXT,
+    sample_size INTEGER,
+    record TEXT
+);
+CREATE TABLE molecule_tokens (token TEXT, trial INTEGER);
+"""
+
+_INDEXES = """
+CREATE INDEX idx_molecule_tokens ON molecule_tokens (token, trial);
+CREATE INDEX idx_trials_molecule ON trials (molecule);
+CREATE INDEX idx_trials_phase ON trials (phase);
+CREATE INDEX idx_trials_status ON trials (status);
+CREATE INDEX idx_trials_therapy_area ON trials (therapy_area);
+CREATE INDEX idx_trials_sponsor ON trials (sponsor);
+CREATE INDEX idx_trials_completion ON trials (completion_date);
+CREATE INDEX idx_trials_pipeline ON trials (status, phase, completion_date, therapy_area, sponsor, sample_size);
+"""
+
+
+def _trial_row(ordinal: int, trial: Dict) -> Tuple:
+    sponsor = trial.get("sponsor")
+    return (
+        ordinal,
+        trial.get("trial_id"),
+        trial.get("molecule"),
+        trial.get("therapy_area"),
+        trial.get("phase"),
+        trial.get("status"),
+        sponsor.get("name") if isinstance(sponsor, dict) else sponsor,
+        trial.get("start_date"),
+        trial.get("estimated_completion_date"),
+        trial.get("sample_size"),
+        json.dumps(trial, separators=(",", ":"), ensure_ascii=False),
+    )
+
+
+def build_trial_store(trials: Iterable[Dict], path: str, signature: Sequence[int]) -> None:
+    """Write the trials into a fresh database at `path` (atomically replaced)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(tmp_path + suffix):
+            os.remove(tmp_path + suffix)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(_SCHEMA)
+        trial_rows: List[Tuple] = []
+        token_rows: List[Tuple[str, int]] = []
+        for ordinal, trial in enumerate(trials):
+            trial_rows.append(_trial_row(ordinal, trial))
+            token_rows.extend((token, ordinal) for token in dict.fromkeys(tokenize(trial.get("molecule") or "")))
+            if len(trial_rows) >= 10_000:
+                conn.executemany("INSERT INTO trials VALUES (?,?,?,?,?,?,?,?,?,?,?)", trial_rows)
+                conn.executemany("INSERT INTO molecule_tokens VALUES (?,?)", token_rows)
+                trial_rows, token_rows = [], []
+        conn.executemany("INSERT INTO trials VALUES (?,?,?,?,?,?,?,?,?,?,?)", trial_rows)
+        conn.executemany("INSERT INTO molecule_tokens VALUES (?,?)", token_rows)
+        conn.executescript(_INDEXES)
+        conn.execute("INSERT INTO meta VALUES ('source_signature', ?)", (json.dumps(list(signature)),))
+        conn.commit()
+        conn.execute("ANALYZE")
+        # Fold the WAL into the main file so the database is a single file when renamed
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(tmp_path + suffix):
+            os.remove(tmp_path + suffix)
+
+
+def _stored_signature(path: str) -> Optional[Tuple[int, ...]]:
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'source_signature'").fetchone()
+        finally:
+            conn.close()
+        return tuple(json.loads(row[0])) if row else None
+    except sqlite3.Error:
+        return None
+
+
+class TrialStore:
+    """Indexed, read-only queries over one built trial database"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _where(molecule: str = "", phase: Optional[Sequence[str]] = None, status: Optional[Sequence[str]] = None,
+               therapy_area: str = "", sponsor: str = "", completion_after: str = "",
+               completion_before: str = "") -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        tokens = list(dict.fromkeys(tokenize(molecule)))
+        if molecule and not tokens:
+            clauses.append("0")
+        if tokens:
+            # Same semantics as the molecule index: every query token must occur in the name
+            clauses.append("t.id IN (" + " INTERSECT ".join(
+                "SELECT trial FROM molecule_tokens WHERE token = ?" for _ in tokens) + ")")
+            params.extend(tokens)
+        for column, values in (("phase", phase), ("status", status)):
+            values = [v for v in (values or []) if v]
+            if values:
+                clauses.append(f"t.{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        if therapy_area:
+            clauses.append("t.therapy_area LIKE ?")
+            params.append(f"%{therapy_area}%")
+        if sponsor:
+            clauses.append("t.sponsor = ?")
+            params.append(sponsor)
+        if completion_after:
+            clauses.append("t.completion_date >= ?")
+            params.append(completion_after)
+        if completion_before:
+            clauses.append("t.completion_date < ?")
+            params.append(completion_before)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def trials(self, limit: Optional[int] = None, offset: int = 0, **filters) -> List[Dict]:
+        """Matching trial records in dataset order"""
+        where, params = self._where(**filters)
+        sql = f"SELECT t.record FROM trials t{where} ORDER BY t.id"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        return [json.loads(row["record"]) for row in self._conn().execute(sql, params)]
+
+    def count(self, **filters) -> int:
+        where, params = self._where(**filters)
+        return self._conn().execute(f"SELECT COUNT(*) FROM trials t{where}", params).fetchone()[0]
+
+    def group_counts(self, group_by: str, **filters) -> Dict[str, int]:
+        """Number of matching trials per value of one column, largest first"""
+        column = GROUP_COLUMNS[group_by]
+        where, params = self._where(**filters)
+        # "+value" keeps the planner on the filter indexes instead of walking the group column's index
+        sql = (f"SELECT {column} AS value, COUNT(*) AS n FROM trials t{where} "
+               f"GROUP BY +value ORDER BY n DESC, value")
+        return {row["value"] or "Unknown": row["n"] for row in self._conn().execute(sql, params)}
+
+    def enrollment(self, **filters) -> Dict[str, Any]:
+        where, params = self._where(**filters)
+        row = self._conn().execute(
+            f"SELECT COUNT(*) AS trials, SUM(sample_size) AS total, AVG(sample_size) AS average "
+            f"FROM trials t{where}", params).fetchone()
+        return {"total": row["total"] or 0, "average": round(row["average"] or 0, 1)}
+
+
+def _prune(root: str, ext: str, keep: Sequence[str]) -> None:
+    """Delete store versions other than `keep` and the newest previous one"""
+    paths = sorted((p for p in glob.glob(f"{root}-*{ext}") if p not in keep), key=os.path.getmtime)
+    for path in paths[:-1]:
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(path + suffix)
+            except OSError:
+                pass
+
+
+def _open_store(document: Dict) -> TrialStore:
+    base = TRIAL_STORE_PATH or os.path.join(dataset_registry.compiled_dir, "trials.sqlite")
+    stat = os.stat(os.path.join(dataset_registry.data_dir, TRIALS_FILE))
+    signature = (stat.st_mtime_ns, stat.st_size)
+    root, ext = os.path.splitext(base)
+    path = f"{root}-{signature[0]}-{signature[1]}{ext}"
+    if _stored_signature(path) != signature:
+        print(f"DEBUG: Building trial store {path}")
+        build_trial_store(document.get("trials", []), path, signature)
+        _prune(root, ext, keep=[path])
+    return TrialStore(path)
+
+
+def trial_store() -> TrialStore:
+    """Store for the current version of the trials dataset (built on first use)"""
+    return dataset_registry.derive(TRIALS_FILE, "trial_store", _open_store)
@@ -0,0 +1,161 @@
+"""Web Result Cache - Persistent TTL + LRU cache for web intelligence results
+
+Web search goes through the data source adapters as the "web" source, so with
+DATA_SOURCE_MODE=http it calls a real search API (or the local stand-in,
+`python -m src.data standin`). Those answers are kept in one SQLite file:
+
+    key        normalized query: lowercase words, stopwords dropped, sorted,
+               so "NICE guidelines for asthma 2024" and "asthma 2024 NICE
+               guidelines" share an entry
+    expires    stored time + the TTL of the query's source type; news goes
+               stale sooner than guidelines (WEB_CACHE_TTLS)
+    accessed   last hit; once the file holds more than WEB_CACHE_MAX_MB of
+               results, the least recently used entries are evicted (see
+               src.data.sqlite_lru)
+
+The file survives restarts and is shared by every worker process. Bundled
+(local) results are never cached: they are generated in microseconds and would
+otherwise outlive a switch to a real API. Failed remote searches fall back to
+the bundled result without caching it.
+"""
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from src.config import WEB_CACHE_ENABLED, WEB_CACHE_MAX_MB, WEB_CACHE_PATH, WEB_CACHE_TTLS
+from .adapters import DataSourceError, HttpAdapter, data_source_adapter, fetch_source
+from .index import tokenize
+from .registry import dataset_registry
+from .sqlite_lru import SQLiteLRU
+
+_STOPWORDS = frozenset("a an and are at by for from in is of on or the to what which with".split())
+
+# Source type -> query words that mark it; checked in this order (freshest first)
+SOURCE_TYPES = (
+    ("news", frozenset("news latest recent today announced announcement approval approved approves launch "
+                       "launched recall alert alerts acquisition merger deal deals shortage".split())),
+    ("guidelines", frozenset("guideline guidelines recommendation recommendations nice label labeling "
+                             "standard care first line second line algorithm consensus".split())),
+    ("research", frozenset("study studies trial trials meta analysis journal publication publications review "
+                           "efficacy safety evidence paper papers".split())),
+)
+
+
+def parse_ttls(spec: str) -> Dict[str, float]:
+    """"news=3600,guidelines=604800" -> {source type: seconds}"""
+    ttls = {}
+    for item in spec.split(","):
+        name, _, seconds = item.partition("=")
+        try:
+            ttls[name.strip()] = float(seconds)
+        except ValueError:
+            continue
+    return ttls
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(sorted({token for token in tokenize(query) if token not in _STOPWORDS}))
+
+
+def source_type(query: str) -> str:
+    """Kind of result a query asks for, which decides how long its answer stays fresh"""
+    tokens = set(tokenize(query))
+    for name, markers in SOURCE_TYPES:
+        if tokens & markers:
+            return name
+    return "general"
+
+
+def result_ttl(query: str) -> float:
+    """Seconds a web result for this query stays fresh (WEB_CACHE_TTLS of its source type)"""
+    ttls = parse_ttls(WEB_CACHE_TTLS)
+    return ttls.get(source_type(query), ttls.get("general", 6 * 3600.0))
+
+
+class WebResultCache:
+    """Web results in SQLite, keyed by normalized query, with per-type TTLs and LRU eviction by size"""
+
+    def __init__(self, path: str, ttls: Optional[Dict[str, float]] = None, max_bytes: int = 64 << 20):
+        self.path = path
+        self.ttls = {"general": 6 * 3600.0, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self._store = SQLiteLRU(path, max_bytes)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stores": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def ttl(self, kind: str) -> float:
+        return self.ttls.get(kind, self.ttls["general"])
+
+    def get(self, query: str, now: Optional[float] = None) -> Optional[Dict]:
+        entry = self._store.get(normalize_query(query), now)
+        if entry is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return json.loads(zlib.decompress(entry[0]))
+
+    def put(self, query: str, result: Dict, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        kind = source_type(query)
+        payload = zlib.compress(json.dumps(result, separators=(",", ":")).encode("utf-8"))
+        self._store.put(normalize_query(query), payload, now + self.ttl(kind), tag=kind, now=now)
+        self._count("stores")
+
+    def clear(self) -> None:
+        self._store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        return {**self._store.stats(), "hit_rate": round(counters["hits"] / lookups, 3) if lookups else None,
+                **counters}
+
+
+_cache: Dict[str, Optional[WebResultCache]] = {"current": None}
+
+
+def web_cache() -> WebResultCache:
+    """Process-wide cache at WEB_CACHE_PATH (default: <compiled dir>/web_cache.sqlite)"""
+    if _cache["current"] is None:
+        path = WEB_CACHE_PATH or os.path.join(dataset_registry.compiled_dir, "web_cache.sqlite")
+        _cache["current"] = WebResultCache(path, parse_ttls(WEB_CACHE_TTLS), int(WEB_CACHE_MAX_MB * (1 << 20)))
+    return _cache["current"]
+
+
+def current_web_cache() -> Optional[WebResultCache]:
+    """The process-wide cache if it has been opened, without opening it"""
+    return _cache["current"]
+
+
+def set_web_cache(cache: WebResultCache) -> None:
+    _cache["current"] = cache
+
+
+def cached_web_search(query: str) -> Dict:
+    """Web results for a query: from the cache when fresh, else from the configured web source"""
+    from . import MockDataSources
+
+    adapter = data_source_adapter()
+    if not (isinstance(adapter, HttpAdapter) and "web" in adapter.urls):
+        return MockDataSources.web_search(query)
+    cache = web_cache() if WEB_CACHE_ENABLED else None
+    if cache is not None:
+        hit = cache.get(query)
+        if hit is not None:
+            return hit
+    try:
+        result = fetch_source("web", query, fallback=False)
+    except DataSourceError as e:
+        print(f"DEBUG: web search failed, using bundled results: {e}")
+        return MockDataSources.web_search(query)
+    if cache is not None:
+        cache.put(query, result)
+    return result
@@ -27,10 +27,14 @@ from src.agents import (
     create_web_intelligence_agent,
     create_report_generator_agent
 )
-from src.config import GEMINI_API_KEY, GEMINI_MODEL, GEMINI_TEMPERATURE
+from src.config import CREW_PREFETCH, GEMINI_API_KEY, GEMINI_MODEL, GEMINI_TEMPERATURE
 from src.utils import generate_pdf_report
 from src.utils.chart_utils import generate_charts_from_data
-from src.data import MockDataSources
+from src.utils.chat_cache import chat_cache, chat_cache_key, chat_request_key
+from src.utils.prefetch import prefetch_context, prefetch_tool_results
+from src.data.adapters import fetch_sources
+from src.data.aggregates import molecule_aggregates
+from src.data.resolver import canonical_molecule
 
 # Chat blueprint
 chat_bp = Blueprint('chat', __name__, url_prefix='/api/v1')
@@ -43,7 +47,8 @@ AGENT_REGISTRY = {
     'market': {
         'name': 'IQVIA Market Analysis',
         'factory': create_iqvia_agent,
-        'keywords': ['market', 'tam', 'cagr', 'revenue', 'sales', 'competitors', 'market share', 'pricing']
+        'keywords': ['market', 'tam', 'cagr', 'revenue', 'sales', 'competitors', 'market share', 'pricing',
+                     'opportunit', 'unmet need', 'therapy class', 'landscape']
     },
     'patent': {
         'name': 'Patent Landscape',
@@ -93,7 +98,14 @@ def determine_required_agents(user_query: str, molecule: str) -> list:
     if matched_agents:
         return matched_agents
     
-    # Otherwise, use LLM to determine which agents are needed
+    # Otherwise, use LLM to determine which agents are needed (remembered per query and molecule)
+    cache = chat_cache()
+    route_key = chat_cache_key("route", user_query, molecule, GEMINI_MODEL)
+    if cache is not None:
+        routed, _ = cache.lookup(route_key)
+        if routed:
+            return routed
+
     llm = LLM(
         model=f"gemini/{GEMINI_MODEL}",
         temperature=0.1,  # Low temperature for deterministic output
@@ -109,7 +121,7 @@ User Query: "{user_query}"
 Molecule: "{molecule}"
 
 Available agents:
-- market: For market analysis, TAM, CAGR, revenue, competitors, market share
+- market: For market analysis, TAM, CAGR, revenue, competitors, market share, opportunity scores, class trends
 - patent: For patent landscape, IP, FTO, expiry dates, litigation
 - trials: For clinical trials, pipeline, phases, FDA approvals
 - trade: For import/export data, supply chain, suppliers
@@ -141,6 +153,8 @@ Return ONLY the JSON array, nothing else.""",
             agents_list = json.loads(result_str[start:end])
             valid_agents = [a for a in agents_list if a in AGENT_REGISTRY]
             if valid_agents:
+                if cache is not None:
+                    cache.store(route_key, valid_agents)
                 return valid_agents
     except Exception as e:
         print(f"Agent routing failed: {e}, using all agents")
@@ -149,8 +163,8 @@ Return ONLY the JSON array, nothing else.""",
     return list(AGENT_REGISTRY.keys())
 
 
-def create_task_for_agent(agent_key: str, agent, molecule: str) -> Task:
-    """Create a task for the specified agent type."""
+def create_task_for_agent(agent_key: str, agent, molecule: str, prefetched: list = None) -> Task:
+    """Create a task for the specified agent type, with any prefetched tool results embedded."""
     task_configs = {
         'market': {
             'description': f"""Conduct comprehensive market analysis for {molecule} using IQVIA data:
@@ -199,13 +213,138 @@ def create_task_for_agent(agent_key: str, agent, molecule: str) -> Task:
     
     config = task_configs[agent_key]
     return Task(
-        description=config['description'],
+        description=config['description'] + prefetch_context(prefetched or []),
         agent=agent,
         expected_output=config['expected_output'],
         async_execution=True  # Run in parallel
     )
 
 
+def run_research(user_query: str, molecule: str, required_agent_keys: list) -> dict:
+    """Run the crew for the selected agents and build the chat response body.
+
+    `molecule` is the canonical name chat() resolved; prefetch, crew, source
+    fetches and chart aggregates all use it as is.
+    """
+    # Step 2: Create only the required agents and their tasks, with the data each
+    # agent starts from fetched up front (all sources concurrently)
+    prefetched = prefetch_tool_results(required_agent_keys, molecule, user_query) if CREW_PREFETCH else {}
+    agents = []
+    tasks = []
+
+    for agent_key in required_agent_keys:
+        agent_info = AGENT_REGISTRY[agent_key]
+        agent = agent_info['factory']()
+        agents.append(agent)
+        task = create_task_for_agent(agent_key, agent, molecule, prefetched.get(agent_key))
+        tasks.append(task)
+
+    # Step 3: Create report agent to synthesize results
+    report_agent = create_report_generator_agent()
+    agents.append(report_agent)
+
+    # Create report task with context from all worker tasks
+    report_task = Task(
+        description=f"""Synthesize findings from the selected research agents into a professional report.
+
+        User Query: {user_query}
+        Molecule: {molecule}
+
+        Create a focused report covering only the sections for which data was gathered.
+        Structure the report with:
+        1. Executive Summary
+        2. Detailed findings from each agent
+        3. Actionable recommendations
+
+        Note: Only include sections for agents that were actually used.""",
+        agent=report_agent,
+        expected_output="""Professional report synthesizing findings from selected agents with actionable recommendations""",
+        context=tasks,  # Wait for all worker tasks
+        async_execution=False
+    )
+    tasks.append(report_task)
+
+    # Step 4: Run the crew with selected agents
+    crew = Crew(
+        agents=agents,
+        tasks=tasks,
+        process=Process.sequential,  # Async tasks run in parallel, report waits
+        verbose=True
+    )
+
+    result = crew.kickoff()
+
+    # Extract clean text
+    final_answer = ""
+    if hasattr(result, 'raw'):
+        final_answer = result.raw
+    else:
+        final_answer = str(result)
+
+    # Compile research data (only for requested agents)
+    research_data = {
+        'summary': final_answer,
+        'agents_used': [AGENT_REGISTRY[k]['name'] for k in required_agent_keys],
+        'timestamp': datetime.now().isoformat()
+    }
+
+    # Add data for each agent that was used (fetched concurrently from the configured sources)
+    source_keys = [
+        ('market', 'market_data', 'iqvia'),
+        ('patent', 'patent_data', 'patents'),
+        ('trials', 'clinical_trials', 'clinical_trials'),
+        ('trade', 'trade_data', 'exim'),
+    ]
+    used = [(key, source) for agent, key, source in source_keys if agent in required_agent_keys]
+    for (key, _), result in zip(used, fetch_sources([(source, molecule) for _, source in used])):
+        research_data[key] = result
+    # Chart series materialized per molecule at data load
+    research_data['aggregates'] = molecule_aggregates(molecule)
+
+    # Insert chart placeholders into the final answer for professional layout
+    enhanced_answer = final_answer
+
+    # Add chart placeholders after relevant sections
+    chart_insertions = [
+        ('Market', '{{CHART:revenue_forecast}}'),
+        ('Revenue', '{{CHART:revenue_forecast}}'),
+        ('Competitive', '{{CHART:market_share}}'),
+        ('Competitor', '{{CHART:market_share}}'),
+        ('Clinical', '{{CHART:pipeline_summary}}'),
+        ('Pipeline', '{{CHART:pipeline_summary}}'),
+        ('Trade', '{{CHART:trade_trends}}'),
+        ('Import', '{{CHART:trade_trends}}'),
+        ('Export', '{{CHART:trade_trends}}'),
+    ]
+
+    # Smart insertion: add chart after first paragraph containing keyword
+    for keyword, placeholder in chart_insertions:
+        if keyword in enhanced_answer and placeholder not in enhanced_answer:
+            idx = enhanced_answer.find(keyword)
+            if idx != -1:
+                next_section = enhanced_answer.find('\n\n', idx)
+                if next_section != -1:
+                    enhanced_answer = enhanced_answer[:next_section] + f'\n\n{placeholder}\n' + enhanced_answer[next_section:]
+
+    # Generate PDF report
+    pdf_base64 = generate_pdf_report(research_data, molecule)
+
+    # Generate Charts for Frontend
+    frontend_charts = generate_charts_from_data(research_data)
+
+    return {
+        'status': 'success',
+        'response': enhanced_answer,  # With chart placeholders
+        'content': enhanced_answer,
+        'agents_used': [AGENT_REGISTRY[k]['name'] for k in required_agent_keys],
+        'research_data': research_data,
+        'report_pdf': pdf_base64,
+        'molecule': molecule,
+        'timestamp': datetime.now().isoformat(),
+        'charts': frontend_charts
+    }
+
+
 @chat_bp.route('/chat', methods=['POST'])
 @chat_bp.route('/chat/generate', methods=['POST'])
 def chat():
@@ -217,7 +356,8 @@ def chat():
         data = request.get_json()
         print(f"Request data: {data}")
         user_query = data.get('query') or data.get('prompt', '')
-        molecule = data.get('molecule', '')
+        # Spelling variants, synonyms and brands share routing, cache entries and data
+        molecule = canonical_molecule(data.get('molecule', ''))
         
         print(f"User query: {user_query}")
         print(f"Molecule: {molecule}")
@@ -231,118 +371,18 @@ def chat():
         
         print(f"[AGENTS] Selected agents for query: {required_agent_keys}")
 
-        # Step 2: Create only the required agents and their tasks
-        agents = []
-        tasks = []
-        
-        for agent_key in required_agent_keys:
-            agent_info = AGENT_REGISTRY[agent_key]
-            agent = agent_info['factory']()
-            agents.append(agent)
-            task = create_task_for_agent(agent_key, agent, molecule)
-            tasks.append(task)
-
-        # Step 3: Create report agent to synthesize results
-        report_agent = create_report_generator_agent()
-        agents.append(report_agent)
-        
-        # Create report task with context from all worker tasks
-        report_task = Task(
-            description=f"""Synthesize findings from the selected research agents into a professional report.
-            
-            User Query: {user_query}
-            Molecule: {molecule}
-            
-            Create a focused report covering only the sections for which data was gathered.
-            Structure the report with:
-            1. Executive Summary
-            2. Detailed findings from each agent
-            3. Actionable recommendations
-            
-            Note: Only include sections for agents that were actually used.""",
-            agent=report_agent,
-            expected_output="""Professional report synthesizing findings from selected agents with actionable recommendations""",
-            context=tasks,  # Wait for all worker tasks
-            async_execution=False
-        )
-        tasks.append(report_task)
-
-        # Step 4: Run the crew with selected agents
-        crew = Crew(
-            agents=agents,
-            tasks=tasks,
-            process=Process.sequential,  # Async tasks run in parallel, report waits
-            verbose=True
-        )
-        
-        result = crew.kickoff()
-        
-        # Extract clean text
-        final_answer = ""
-        if hasattr(result, 'raw'):
-            final_answer = result.raw
-        else:
-            final_answer = str(result)
-
-        # Compile research data (only for requested agents)
-        research_data = {
-            'summary': final_answer,
-            'agents_used': [AGENT_REGISTRY[k]['name'] for k in required_agent_keys],
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        # Add data for each agent that was used
-        if 'market' in required_agent_keys:
-            research_data['market_data'] = MockDataSources.search_iqvia(molecule)
-        if 'patent' in required_agent_keys:
-            research_data['patent_data'] = MockDataSources.search_patents(molecule)
-        if 'trials' in required_agent_keys:
-            research_data['clinical_trials'] = MockDataSources.search_clinical_trials(molecule)
-        if 'trade' in required_agent_keys:
-            research_data['trade_data'] = MockDataSources.search_exim(molecule)
-
-        # Insert chart placeholders into the final answer for professional layout
-        enhanced_answer = final_answer
-        
-        # Add chart placeholders after relevant sections
-        chart_insertions = [
-            ('Market', '{{CHART:revenue_forecast}}'),
-            ('Revenue', '{{CHART:revenue_forecast}}'),
-            ('Competitive', '{{CHART:market_share}}'),
-            ('Competitor', '{{CHART:market_share}}'),
-            ('Clinical', '{{CHART:pipeline_summary}}'),
-            ('Pipeline', '{{CHART:pipeline_summary}}'),
-            ('Trade', '{{CHART:trade_trends}}'),
-            ('Import', '{{CHART:trade_trends}}'),
-            ('Export', '{{CHART:trade_trends}}'),
-        ]
-        
-        # Smart insertion: add chart after first paragraph containing keyword
-        for keyword, placeholder in chart_insertions:
-            if keyword in enhanced_answer and placeholder not in enhanced_answer:
-                idx = enhanced_answer.find(keyword)
-                if idx != -1:
-                    next_section = enhanced_answer.find('\n\n', idx)
-                    if next_section != -1:
-                        enhanced_answer = enhanced_answer[:next_section] + f'\n\n{placeholder}\n' + enhanced_answer[next_section:]
-
-        # Generate PDF report
-        pdf_base64 = generate_pdf_report(research_data, molecule)
-        
-        # Generate Charts for Frontend
-        frontend_charts = generate_charts_from_data(research_data)
-
-        return jsonify({
-            'status': 'success',
-            'response': enhanced_answer,  # With chart placeholders
-            'content': enhanced_answer,
-            'agents_used': [AGENT_REGISTRY[k]['name'] for k in required_agent_keys],
-            'research_data': research_data,
-            'report_pdf': pdf_base64,
-            'molecule': molecule,
-            'timestamp': datetime.now().isoformat(),
-            'charts': frontend_charts
-        })
+        # Identical requests (same query, molecule, agents, model, tool output mode and data) are answered
+        # from the cache; a stale answer is returned at once and recomputed in the background
+        cache = chat_cache()
+        if cache is None:
+            return jsonify(run_research(user_query, molecule, required_agent_keys))
+        key = chat_request_key(user_query, molecule, required_agent_keys)
+        body, state, age = cache.get_or_compute(key, lambda: run_research(user_query, molecule, required_agent_keys))
+        print(f"[CACHE] Chat result: {state} (age {age:.0f}s)")
+        response = jsonify(body)
+        response.headers['X-Cache'] = state.upper()
+        response.headers['Age'] = str(int(age))
+        return response
 
     except Exception as e:
         return jsonify({
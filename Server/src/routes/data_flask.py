@@ -0,0 +1,174 @@
+"""Flask Data Routes - Direct access to the data layer without running a crew"""
+import json
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from src.config import BATCH_MAX_MOLECULES
+from src.data import MockDataSources
+from src.data.index import RECORD_EXTRACTORS
+from src.data.patent_expiry import search_patent_expiry
+from src.data.quality import quality_report
+from src.data.resolver import canonical_molecule
+from src.routes.auth_flask import require_auth
+
+bp = Blueprint('data', __name__, url_prefix='/api/v1/data')
+
+
+@bp.route('/batch', methods=['POST'])
+@require_auth
+def batch_search():
+    """Market, trade, patent and trial data for many molecules, streamed as NDJSON.
+
+    One line per distinct molecule as soon as it is formatted, then a summary line.
+    """
+    data = request.get_json(silent=True) or {}
+    molecules = data.get('molecules')
+    sources = data.get('sources') or list(MockDataSources.BATCH_SOURCES)
+
+    if not isinstance(molecules, list) or not molecules:
+        return jsonify({"detail": "molecules must be a non-empty list"}), 400
+    if len(molecules) > BATCH_MAX_MOLECULES:
+        return jsonify({"detail": f"At most {BATCH_MAX_MOLECULES} molecules per batch"}), 400
+    unknown = [s for s in sources if s not in MockDataSources.BATCH_SOURCES]
+    if unknown:
+        return jsonify({"detail": f"Unknown source(s): {', '.join(map(str, unknown))}"}), 400
+
+    # Spelling variants, synonyms and brands share one lookup
+    requested = {}
+    for molecule in molecules:
+        if isinstance(molecule, str) and molecule.strip():
+            requested.setdefault(canonical_molecule(molecule), []).append(molecule)
+
+    def generate():
+        count = 0
+        for molecule, results in MockDataSources.iter_search_many(requested, sources):
+            count += 1
+            yield json.dumps({
+                "type": "result",
+                "molecule": molecule,
+                "requested_as": requested[molecule],
+                "results": results
+            }) + "\n"
+        yield json.dumps({"type": "summary", "molecules": count, "sources": sources}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def _segment_query_args():
+    """Common query-string arguments of the segment lookups"""
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        limit = 10
+    return {
+        "query": request.args.get('q', ''),
+        "therapy_area": request.args.get('therapy_area', ''),
+        "limit": max(1, min(limit, 100))
+    }
+
+
+@bp.route('/opportunities', methods=['GET'])
+@require_auth
+def opportunities():
+    """Opportunity scores for a therapy area / country, best first"""
+    return jsonify(MockDataSources.search_opportunities(
+        country=request.args.get('country', ''), **_segment_query_args()
+    )), 200
+
+
+@bp.route('/class-trends', methods=['GET'])
+@require_auth
+def class_trends():
+    """Drug class market trends for a therapy area / country"""
+    return jsonify(MockDataSources.search_class_trends(
+        country=request.args.get('country', ''), **_segment_query_args()
+    )), 200
+
+
+@bp.route('/competitors', methods=['GET'])
+@require_auth
+def competitors():
+    """Competitor landscape for a therapy area, molecule, brand or company"""
+    return jsonify(MockDataSources.search_competitor_landscape(**_segment_query_args())), 200
+
+
+@bp.route('/patent-expiry', methods=['GET'])
+@require_auth
+def patent_expiry():
+    """Patent families expiring in (or protected during) a date window in one jurisdiction"""
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 1000)
+    except ValueError:
+        return jsonify({"detail": "limit must be an integer"}), 400
+    try:
+        result = search_patent_expiry(
+            request.args.get('jurisdiction', 'us'),
+            request.args.get('start', ''),
+            request.args.get('end', ''),
+            mode=request.args.get('mode', 'expiring'),
+            molecule=request.args.get('molecule', ''),
+            limit=limit
+        )
+    except ValueError as e:
+        return jsonify({"detail": str(e)}), 400
+    return jsonify(result), 200
+
+
+@bp.route('/quality', methods=['GET'])
+@require_auth
+def quality():
+    """Data quality per dataset: completeness, YTD / estimated / partial records and staleness
+
+    dataset: comma-separated file names (default: every bundled dataset)
+    """
+    datasets = [d.strip() for d in request.args.get('dataset', '').split(',') if d.strip()]
+    unknown = [d for d in datasets if d not in RECORD_EXTRACTORS]
+    if unknown:
+        return jsonify({"detail": f"Unknown dataset(s): {', '.join(unknown)}"}), 400
+    return jsonify({"datasets": quality_report(datasets)}), 200
+
+
+@bp.route('/trials', methods=['GET'])
+@require_auth
+def trials():
+    """Filtered clinical trial pipeline with grouped counts, answered by the indexed trial store
+
+    Filters: molecule, phase, status (comma-separated lists), therapy_area, sponsor,
+    completion_after, completion_before (ISO dates). group_by: one or more of
+    molecule, therapy_area, phase, status, sponsor, completion_year.
+    """
+    from src.data.trial_store import GROUP_COLUMNS
+
+    store = MockDataSources._trial_store()
+    if store is None:
+        return jsonify({"detail": "Trial store is disabled or unavailable"}), 503
+
+    def listed(name):
+        return [v.strip() for v in request.args.get(name, '').split(',') if v.strip()]
+
+    filters = {
+        "molecule": request.args.get('molecule', ''),
+        "phase": listed('phase'),
+        "status": listed('status'),
+        "therapy_area": request.args.get('therapy_area', ''),
+        "sponsor": request.args.get('sponsor', ''),
+        "completion_after": request.args.get('completion_after', ''),
+        "completion_before": request.args.get('completion_before', ''),
+    }
+    group_by = listed('group_by') or ['phase', 'status']
+    unknown = [g for g in group_by if g not in GROUP_COLUMNS]
+    if unknown:
+        return jsonify({"detail": f"Cannot group by: {', '.join(unknown)}"}), 400
+    try:
+        limit = max(0, min(int(request.args.get('limit', 50)), 1000))
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        return jsonify({"detail": "limit and offset must be integers"}), 400
+
+    return jsonify({
+        "filters": filters,
+        "total": store.count(**filters),
+        "enrollment": store.enrollment(**filters),
+        "groups": {g: store.group_counts(g, **filters) for g in group_by},
+        "trials": store.trials(limit=limit, offset=offset, **filters)
+    }), 200
@@ -1,13 +1,35 @@
 """Health Check Routes"""
 from flask import Blueprint, jsonify
+from src.config import CHAT_CACHE_ENABLED
+from src.data.adapters import current_data_source_adapter
+from src.data.knowledge import current_knowledge_index
+from src.data.registry import dataset_registry
+from src.data.web_cache import current_web_cache
+from src.utils.chat_cache import current_chat_cache
+from src.utils.tool_cache import current_tool_cache
 
 health_bp = Blueprint('health', __name__, url_prefix='/api/v1')
 
 
+def _stats(component) -> dict:
+    # Probes only report on what requests have opened; they never create indexes or cache files
+    return component.stats() if component is not None else {'initialized': False}
+
+
 @health_bp.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'service': 'Pharma Innovation AI Agent'})
+    chat_cache = current_chat_cache()
+    return jsonify({
+        'status': 'healthy',
+        'service': 'Pharma Innovation AI Agent',
+        'data_cache': dataset_registry.stats(),
+        'data_sources': _stats(current_data_source_adapter()),
+        'knowledge_base': _stats(current_knowledge_index()),
+        'web_cache': _stats(current_web_cache()),
+        'tool_cache': _stats(current_tool_cache()),
+        'chat_cache': _stats(chat_cache) if CHAT_CACHE_ENABLED else {'enabled': False}
+    })
 
 
 @health_bp.route('/', methods=['GET'])
@@ -1,74 +1,59 @@
 """Tool definitions for agents"""
 
 import json
-from difflib import SequenceMatcher
+import numpy as np
 from typing import Dict, List, Any
 from typing import Dict, List, Any
 from src.data import MockDataSources
+from src.data.adapters import fetch_source
+from src.data.knowledge import knowledge_index
+from src.data.web_cache import cached_web_search, result_ttl
+from src.data.patent_expiry import search_patent_expiry
+from src.data.quality import gap_flags, profile_record
+from src.data.resolver import resolve_tool_input, trigram_similarity
+from src.data.trade_analytics import convert_units, outlier_mask
+from src.utils.tool_cache import cached_tool
+from src.utils.tool_output import format_tool_result
 from crewai.tools import tool
 
 
 def fuzzy_match(a: str, b: str, threshold: float = 0.6) -> bool:
-    """Check if two strings are similar using fuzzy matching"""
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio() >= threshold
+    """Check if two strings are similar using fuzzy matching (trigram Dice coefficient)"""
+    return trigram_similarity(a, b) >= threshold
 
 
 def standardize_units(value: float, from_unit: str, to_unit: str = "kg") -> float:
-    """Convert between pharmaceutical units (grams, kg, metric tons)"""
-    unit_map = {
-        "g": 0.001,
-        "kg": 1,
-        "mt": 1000,
-        "metric_ton": 1000,
-        "ton": 1000
-    }
-    from_unit_lower = from_unit.lower()
-    to_unit_lower = to_unit.lower()
-    
-    if from_unit_lower in unit_map and to_unit_lower in unit_map:
-        base_value = value * unit_map[from_unit_lower]
-        return base_value / unit_map[to_unit_lower]
-    return value
+    """Convert between pharmaceutical units (grams, kg, metric tons); also accepts a list/array of values"""
+    converted = convert_units(value, from_unit, to_unit)
+    return float(converted) if converted.ndim == 0 else converted
 
 
 def detect_data_gaps(data: Dict) -> Dict[str, Any]:
-    """Detect data gaps and flag YTD or partial data"""
-    flags = {
-        "is_yyd": False,
-        "is_partial": False,
-        "flags": []
-    }
-    
-    if "yty_data" in str(data).lower() or "year_to_date" in str(data).lower():
-        flags["is_yyd"] = True
-        flags["flags"].append("⚠️ Year-to-Date (YTD) data detected - full-year estimates may be annualized from Q1-Q3")
-    
-    if "estimated" in str(data).lower() or "partial" in str(data).lower():
-        flags["is_partial"] = True
-        flags["flags"].append("⚠️ Partial or estimated data - verify with additional sources")
-    
-    return flags
+    """Detect data gaps and flag YTD, partial or stale data.
+
+    Uses the quality profile the data layer stored for the matched record;
+    results without one (synthetic fallbacks) are profiled in a single pass.
+    """
+    profile = (data.get("_data_quality") or {}).get("profile") or profile_record(data)
+    return gap_flags(profile)
+
+
+def _knowledge_index_build() -> str:
+    """Build the internal knowledge tool answers from (cache version of its results)"""
+    return knowledge_index().stats().get("index") or "synthetic"
 
 
 def detect_outliers(values: List[float], threshold: float = 2.0) -> List[int]:
     """Detect outlier values (>2 std deviations from mean)"""
     if len(values) < 2:
         return []
-    
-    mean = sum(values) / len(values)
-    variance = sum((x - mean) ** 2 for x in values) / len(values)
-    std_dev = variance ** 0.5
-    
-    if std_dev == 0:
-        return []
-    
-    outliers = [i for i, v in enumerate(values) if abs(v - mean) > threshold * std_dev]
-    return outliers
+    return np.flatnonzero(outlier_mask(np.asarray(values, dtype=np.float64), threshold)).tolist()
 
 
 def create_iqvia_tool():
     """Create IQVIA market data tool with data gap handling"""
     @tool("IQVIA_Market_Data")
+    @cached_tool("IQVIA_Market_Data")
     def search_iqvia(molecule: str) -> str:
         """Query IQVIA database for high-fidelity market data including:
         - Total Addressable Market (TAM) and CAGR calculations
@@ -78,7 +63,8 @@ def create_iqvia_tool():
         - Data gap detection and YTD flagging
         - Therapeutic class generalization for sparse data
         Input: molecule name (handles fuzzy matching for spelling variations)"""
-        data = MockDataSources.search_iqvia(molecule)
+        resolved, suggestions = resolve_tool_input(molecule)
+        data = fetch_source("iqvia", resolved)
         
         # Check for data gaps and currency normalization
         gap_flags = detect_data_gaps(data)
@@ -86,12 +72,17 @@ def create_iqvia_tool():
         # Add fuzzy matching for name variations
         data["_metadata"] = {
             "search_term": molecule,
-            "data_quality_flags": gap_flags,
+            "resolved_molecule": resolved,
+            "data_quality_flags": gap_flags
+        }
+        if suggestions:
+            data["_metadata"]["suggestions"] = suggestions
+        notes = {
             "currency_normalized": "USD",
             "note": "All revenue figures normalized to USD using average annual exchange rates"
         }
         
-        return json.dumps(data, indent=2)
+        return format_tool_result(data, notes)
 
     return search_iqvia
 
@@ -99,6 +90,7 @@ def create_iqvia_tool():
 def create_exim_tool():
     """Create EXIM trade data tool with unit conversion and anomaly detection"""
     @tool("EXIM_Trade_Data")
+    @cached_tool("EXIM_Trade_Data")
     def search_exim(molecule: str) -> str:
         """Extract export-import data for APIs/formulations with advanced analysis:
         - Volume vs. Value Analysis (detects price erosion)
@@ -108,17 +100,22 @@ def create_exim_tool():
         - HS Code Navigation (warns on basket codes covering similar molecules)
         - Trend Detection (spikes indicating launches or shortages)
         Input: molecule name or HS code"""
-        data = MockDataSources.search_exim(molecule)
+        resolved, suggestions = resolve_tool_input(molecule)
+        data = fetch_source("exim", resolved)
         
         # Add unit standardization metadata
-        data["_metadata"] = {
-            "units_standardized_to": "kg",
-            "anomaly_detection": "Enabled - flags outliers >2 std dev from mean",
+        data["_metadata"] = {"resolved_molecule": resolved}
+        if suggestions:
+            data["_metadata"]["suggestions"] = suggestions
+        notes = {
+            "units_standardized_to": "kg (API volumes), packs (formulations) - see analytics.volume_unit",
+            "anomaly_detection": "Enabled - analytics.outliers flags YoY moves >2 std dev from peers in the same year",
+            "price_erosion": "analytics.price_erosion is set when the unit price CAGR is negative",
             "hs_code_note": "If basket code used, results may include similar molecules",
             "supply_chain_risk": "Assess for sudden import spikes indicating launches or shortages"
         }
         
-        return json.dumps(data, indent=2)
+        return format_tool_result(data, notes)
 
     return search_exim
 
@@ -126,6 +123,7 @@ def create_exim_tool():
 def create_patent_tool():
     """Create patent search tool with FTO and LoE analysis"""
     @tool("Patent_Search")
+    @cached_tool("Patent_Search")
     def search_patents(molecule: str) -> str:
         """Search patent landscapes and evaluate Freedom to Operate (FTO):
         - Patent Family Analysis (CoM > Process > Formulation > Use)
@@ -137,7 +135,8 @@ def create_patent_tool():
         - Jurisdiction prioritization (US, EU5, Japan > Rest of World)
         - Risk Flags (🔴 High, 🟡 Medium, 🟢 Low)
         Input: molecule name, optional jurisdiction"""
-        data = MockDataSources.search_patents(molecule)
+        resolved, suggestions = resolve_tool_input(molecule)
+        data = fetch_source("patents", resolved)
         
         # Add risk assessment metadata
         for patent in data if isinstance(data, list) else [data]:
@@ -147,7 +146,10 @@ def create_patent_tool():
                     patent["_risk_flag"] = "🔴 HIGH RISK" if "Active" in patent.get("status", "") else "🟡 MEDIUM RISK"
                 patent["_patent_type_note"] = "Composition of Matter patents provide strongest FTO barriers"
         
-        metadata = {
+        metadata = {"resolved_molecule": resolved}
+        if suggestions:
+            metadata["suggestions"] = suggestions
+        notes = {
             "jurisdiction": "US (primary focus)",
             "includes": "Composition of Matter, Process, Formulation, Use patents",
             "litigation_check": "Cross-referenced with Orange Book and legal dockets",
@@ -156,10 +158,10 @@ def create_patent_tool():
         }
         
         if isinstance(data, list):
-            return json.dumps({"patents": data, "_metadata": metadata}, indent=2)
+            return format_tool_result({"patents": data, "_metadata": metadata}, notes)
         else:
             data["_metadata"] = metadata
-            return json.dumps(data, indent=2)
+            return format_tool_result(data, notes)
 
     return search_patents
 
@@ -167,6 +169,7 @@ def create_patent_tool():
 def create_clinical_trials_tool():
     """Create clinical trials search tool with MeSH mapping and multi-indication grouping"""
     @tool("Clinical_Trials_Search")
+    @cached_tool("Clinical_Trials_Search")
     def search_trials(molecule: str) -> str:
         """Analyze clinical development pipelines with advanced filtering:
         - Pipeline Filtering (Recruiting + Active, not recruiting)
@@ -177,7 +180,8 @@ def create_clinical_trials_tool():
         - Trial Status Clarity (distinguishes Terminated/Withdrawn from Completed)
         - Termination Reasons (fetches when available)
         Input: molecule name, optional indication or MoA"""
-        data = MockDataSources.search_clinical_trials(molecule)
+        resolved, suggestions = resolve_tool_input(molecule)
+        data = fetch_source("clinical_trials", resolved)
         
         # Group by indication and add MeSH mapping
         trials_by_indication = {}
@@ -193,7 +197,10 @@ def create_clinical_trials_tool():
                 trial["_endpoint_types"] = ["OS", "PFS", "HbA1c reduction", "Safety/Tolerability"]
                 trial["_mesh_synonyms_checked"] = True
         
-        metadata = {
+        metadata = {"resolved_molecule": resolved}
+        if suggestions:
+            metadata["suggestions"] = suggestions
+        notes = {
             "filters_applied": "Recruiting + Active, not recruiting",
             "endpoint_extraction": "Enabled",
             "timeline_estimation": "Based on phase duration and enrollment",
@@ -202,40 +209,53 @@ def create_clinical_trials_tool():
             "status_clarity": "Terminated/Withdrawn vs Completed distinguished"
         }
         
-        return json.dumps({
+        return format_tool_result({
             "trials_by_indication": trials_by_indication,
             "_metadata": metadata
-        }, indent=2)
+        }, notes)
 
     return search_trials
 
 
 def create_internal_knowledge_tool():
-    """Create internal knowledge base tool with OCR and citation support"""
+    """Create internal knowledge base tool over the indexed internal PDFs, with page citations"""
     @tool("Internal_Knowledge_Base")
+    @cached_tool("Internal_Knowledge_Base", version=_knowledge_index_build)
     def search_internal(query: str) -> str:
         """Secure RAG system for proprietary documents:
         - Contextual Extraction (natural language Q&A on PDFs)
         - Cross-Document Synthesis (aggregate from multiple sources)
         - Citation Accuracy (source filename + page number)
-        - OCR Processing (for scanned PDFs)
+        - Page-level text extraction (scanned pages without a text layer are skipped)
         - Conflict Resolution (reports conflicting info with dates)
         - Strict Boundaries (refuses hallucination; returns "Not found")
         - Confidentiality (maintains data integrity)
         Input: Natural language query or topic"""
         data = MockDataSources.search_internal_docs(query)
-        
+        indexed = "total_chunks_searched" in data
+
         # Add RAG-specific metadata
         metadata = {
             "query": query,
-            "retrieval_method": "Semantic search with RAG",
-            "ocr_processing": "Enabled for scanned PDFs",
+            "retrieval_method": ("Hashed-vector similarity over indexed internal PDF pages" if indexed
+                                 else "Synthetic documents (no internal PDFs indexed)")
+        }
+        notes = {
             "citation_format": "Source: [Filename, Page #]",
             "hallucination_guard": "Strict - unknown info flagged as 'Not found'"
         }
-        
-        # Add citation fields to each insight
-        if isinstance(data, dict) and "key_insights" in data:
+
+        if indexed:
+            data["key_insights_with_citations"] = [
+                {
+                    "insight": hit["excerpt"],
+                    "source": f"{hit['filename']}, Page {hit['page']}",
+                    "relevance_score": hit["relevance_score"]
+                }
+                for hit in data["relevant_documents"]
+            ]
+        elif isinstance(data, dict) and "key_insights" in data:
+            # Add citation fields to each insight
             data["key_insights_with_citations"] = [
                 {
                     "insight": data["key_insights"],
@@ -245,7 +265,7 @@ def create_internal_knowledge_tool():
             ]
         
         data["_metadata"] = metadata
-        return json.dumps(data, indent=2)
+        return format_tool_result(data, notes)
 
     return search_internal
 
@@ -253,6 +273,7 @@ def create_internal_knowledge_tool():
 def create_web_search_tool():
     """Create web search tool with source filtering and date verification"""
     @tool("Web_Intelligence")
+    @cached_tool("Web_Intelligence", ttl=result_ttl)
     def web_search(query: str) -> str:
         """Fetch external context from high-credibility sources:
         - Source Filtering (whitelists FDA, EMA, NIH, major journals; blacklists social media)
@@ -262,7 +283,7 @@ def create_web_search_tool():
         - Date Verification (ensures "latest" guidelines are actually current)
         - Credibility Scoring (assesses source reliability)
         Input: Natural language query (e.g., "NICE guidelines for asthma 2024")"""
-        data = MockDataSources.web_search(query)
+        data = cached_web_search(query)
         
         # Add source credibility assessment
         trusted_domains = {
@@ -280,7 +301,7 @@ def create_web_search_tool():
                 result["_credibility_score"] = trusted_domains.get(source, 5)
                 result["_source_type"] = "HIGH-CREDIBILITY" if result.get("_credibility_score", 0) >= 8 else "VERIFY"
         
-        metadata = {
+        notes = {
             "source_filter": "Whitelisted (FDA, EMA, NIH, major journals)",
             "guidelines_extraction": "First-line vs second-line treatments",
             "news_freshness": "Last 6 months",
@@ -288,10 +309,76 @@ def create_web_search_tool():
             "date_verification": "Ensures current guidance (flags if outdated)"
         }
         
-        return json.dumps({
-            "results": data,
-            "_metadata": metadata
-        }, indent=2)
+        return format_tool_result({"results": data}, notes)
 
     return web_search
 
+
+
+def create_opportunity_tool():
+    """Create opportunity scoring tool over the indexed therapy-area/country segments"""
+    @tool("Opportunity_Scores")
+    @cached_tool("Opportunity_Scores")
+    def search_opportunities(query: str) -> str:
+        """Rank innovation opportunities by therapy area and country:
+        - Opportunity score (0-10) and priority per segment, best first
+        - Drivers, barriers, adherence and payer coverage
+        - Trial signal (local Phase 2 / global Phase 3, patent blockers)
+        - Estimated ROI band, risk level and recommended innovations
+        Input: therapy area and/or country (e.g., "respiratory India"); empty for all segments"""
+        data = MockDataSources.search_opportunities(query)
+        return format_tool_result(data)
+
+    return search_opportunities
+
+
+def create_class_trends_tool():
+    """Create therapy class trends tool over the indexed therapy-area/country segments"""
+    @tool("Therapy_Class_Trends")
+    @cached_tool("Therapy_Class_Trends")
+    def search_class_trends(query: str) -> str:
+        """Market trends of drug classes within a therapy area:
+        - Historical (2019-2024) and forecast (2025-2028) class market size
+        - CAGR 2024-2028, Rx volume and competitor count per class
+        - Dosage gaps, repurposing potential and innovation opportunities
+        Input: therapy area, drug class and/or country (e.g., "GLP-1 USA", "CKD")"""
+        data = MockDataSources.search_class_trends(query)
+        return format_tool_result(data)
+
+    return search_class_trends
+
+
+def create_competitor_landscape_tool():
+    """Create competitor landscape tool over the indexed therapy-area segments"""
+    @tool("Competitor_Landscape")
+    @cached_tool("Competitor_Landscape")
+    def search_competitor_landscape(query: str) -> str:
+        """Competitive landscape of a therapy area:
+        - Competing molecules ranked by 2024 market share
+        - Brands, manufacturers, dosage forms and pricing tier
+        - Patent expiry by region and Phase 3 pipeline competitors
+        - Formulation gaps and repurposing activity
+        Input: therapy area, molecule, brand or company (e.g., "type 2 diabetes", "Ozempic")"""
+        data = MockDataSources.search_competitor_landscape(query)
+        return format_tool_result(data)
+
+    return search_competitor_landscape
+
+
+def create_patent_expiry_tool():
+    """Create patent expiry window tool over the per-jurisdiction expiry index"""
+    @tool("Patent_Expiry_Window")
+    @cached_tool("Patent_Expiry_Window")
+    def search_patent_expiry_window(jurisdiction: str, start: str, end: str, mode: str = "expiring") -> str:
+        """Patent families by expiry date within a time window in one jurisdiction:
+        - mode "expiring": families whose term ends inside the window (LoE / generic entry)
+        - mode "protected": families still in force at any time during the window (FTO barriers)
+        - Expiry date, patent types, FTO risk, litigation flag and generic entry estimate
+        Input: jurisdiction (us, eu, jp, cn, in), start and end as YYYY, YYYY-MM or YYYY-MM-DD"""
+        try:
+            data = search_patent_expiry(jurisdiction, start, end, mode=mode)
+        except ValueError as e:
+            return json.dumps({"error": str(e)})
+        return format_tool_result(data)
+
+    return search_patent_expiry_window
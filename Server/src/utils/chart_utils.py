@@ -4,19 +4,28 @@ def generate_charts_from_data(research_data: Dict[str, Any]) -> List[Dict[str, A
     """
     Convert raw research data into structured JSON for Chart.js frontend.
     Returns a list of chart configuration objects.
+
+    Series precomputed by the data layer (research_data['aggregates'], see
+    src.data.aggregates) are used as-is for the sections present in
+    research_data; raw tool results are only sorted and aggregated here when
+    no precomputed series exists (e.g. synthetic data).
     """
     charts = []
+    aggregates = research_data.get('aggregates') or {}
     
     # 1. Revenue Forecast (Line Chart)
     try:
         market_data = research_data.get('market_data', {})
         history = market_data.get('historical_data', [])
-        if history:
+        series = aggregates.get('revenue_series') if market_data else None
+        if series:
+            labels, values = series['labels'], series['values']
+        elif history:
             # Sort by year just in case
             history = sorted(history, key=lambda x: x.get('year', 0))
             labels = [str(h.get('year')) for h in history]
             values = [h.get('revenue_usd_million', 0) for h in history]
-            
+        if series or history:
             charts.append({
                 "id": "revenue_forecast",
                 "title": f"Revenue Forecast: {market_data.get('molecule', 'Molecule')}",
@@ -38,15 +47,18 @@ def generate_charts_from_data(research_data: Dict[str, Any]) -> List[Dict[str, A
     try:
         comp_landscape = research_data.get('market_data', {}).get('competitive_landscape', {})
         competitors = comp_landscape.get('top_10_manufacturers', [])
-        if competitors:
+        share = aggregates.get('market_share') if comp_landscape else None
+        if share:
+            labels, values = share['labels'], share['values']
+        elif competitors:
             # Take top 5 for cleaner chart
             top_5 = sorted(competitors, key=lambda x: x.get('market_share_percent', 0), reverse=True)[:5]
             labels = [c.get('manufacturer') for c in top_5]
             values = [c.get('market_share_percent', 0) for c in top_5]
-            
+        if share or competitors:
             charts.append({
                 "id": "market_share",
-                "title": f"Top {len(top_5)} Competitors by Market Share",
+                "title": f"Top {len(labels)} Competitors by Market Share",
                 "type": "pie",
                 "labels": labels,
                 "values": values,
@@ -64,15 +76,19 @@ def generate_charts_from_data(research_data: Dict[str, Any]) -> List[Dict[str, A
     # 3. Clinical Pipeline Summary (Bar Chart)
     try:
         pipeline = research_data.get('clinical_trials', {}).get('pipeline_summary', {})
-        if pipeline:
+        series = aggregates.get('pipeline') if pipeline else None
+        if series:
+            labels, values = series['labels'], series['values']
+        elif pipeline:
             labels = ["Phase 1", "Phase 2", "Phase 3", "Phase 4"]
+            by_phase = pipeline.get("by_phase", {})
             values = [
-                pipeline.get("phase_1_count", 0),
-                pipeline.get("phase_2_count", 0),
-                pipeline.get("phase_3_count", 0),
-                pipeline.get("phase_4_count", 0)
+                by_phase.get("Phase 1", pipeline.get("phase_1_count", 0)),
+                by_phase.get("Phase 2", pipeline.get("phase_2_count", 0)),
+                by_phase.get("Phase 3", pipeline.get("phase_3_count", 0)),
+                by_phase.get("Phase 4", pipeline.get("phase_4_count", 0))
             ]
-            
+        if series or pipeline:
             charts.append({
                 "id": "pipeline_summary",
                 "title": "Clinical Pipeline by Phase",
@@ -91,7 +107,21 @@ def generate_charts_from_data(research_data: Dict[str, Any]) -> List[Dict[str, A
     # 4. Import/Export Trends (Bar Chart)
     try:
         trade = research_data.get('trade_data', {}).get('quarterly_trends', [])
-        if trade:
+        series = aggregates.get('trade_series') if research_data.get('trade_data') else None
+        if series:
+            charts.append({
+                "id": "trade_trends",
+                "title": f"Yearly Trade Volume ({series['unit']})",
+                "type": "line",
+                "labels": series['labels'],
+                "values": series['volume'],
+                "datasets": [{
+                    "label": f"Volume ({series['unit']})",
+                    "data": series['volume'],
+                    "backgroundColor": "#10B981" # Emerald-500
+                }]
+            })
+        elif trade:
             labels = [t.get('quarter') for t in trade]
             imports = [t.get('import_volume_kg', 0) for t in trade]
             exports = [t.get('export_volume_kg', 0) for t in trade]
@@ -0,0 +1,204 @@
+"""Chat Cache - Exact-match cache of full chat research results
+
+/api/v1/chat runs a whole crew (minutes of LLM calls) per request, while the
+same question about the same molecule is asked again and again. Complete
+responses are kept by:
+
+    key      normalized query and molecule (case and whitespace folded), the
+             selected agents, the LLM model, TOOL_OUTPUT_MODE (what the agents
+             read) and the data version (dataset_registry.fingerprint(), the
+             same in every worker)
+
+in two tiers:
+
+    memory   the most recently used CHAT_CACHE_MEMORY_ENTRIES responses of
+             this process
+    disk     one SQLite file shared by all workers and kept across restarts
+             (CHAT_CACHE_PATH); least recently used entries are evicted above
+             CHAT_CACHE_MAX_MB
+
+An entry is fresh for CHAT_CACHE_TTL seconds. For CHAT_CACHE_MAX_STALE seconds
+after that it is still served immediately, while the crew runs again in the
+background to replace it (stale-while-revalidate). Concurrent identical
+misses are coalesced into one crew run.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.config import (CHAT_CACHE_ENABLED, CHAT_CACHE_MAX_MB, CHAT_CACHE_MAX_STALE, CHAT_CACHE_MEMORY_ENTRIES,
+                        CHAT_CACHE_PATH, CHAT_CACHE_TTL, GEMINI_MODEL, TOOL_OUTPUT_MODE)
+from src.data.registry import dataset_registry
+from src.data.singleflight import single_flight
+from src.data.sqlite_lru import SQLiteLRU
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, (list, tuple, set)):
+        return sorted(_normalize(item) for item in value)
+    return value
+
+
+def chat_cache_key(*parts: Any) -> str:
+    """Cache key of normalized request parts (strings case/whitespace folded, lists sorted)"""
+    return hashlib.sha256(json.dumps([_normalize(part) for part in parts], default=str)
+                          .encode("utf-8")).hexdigest()
+
+
+def chat_request_key(user_query: str, molecule: str, agent_keys: Any) -> str:
+    """Key of a full chat result: the request plus the model, tool output mode and data it was computed with"""
+    return chat_cache_key(user_query, molecule, agent_keys, GEMINI_MODEL, TOOL_OUTPUT_MODE,
+                          dataset_registry.fingerprint())
+
+
+class ChatResultCache:
+    """Chat responses in an in-process LRU backed by a shared SQLite file, served stale while revalidating"""
+
+    def __init__(self, path: str, ttl: float = 6 * 3600.0, max_stale: float = 7 * 86400.0,
+                 memory_entries: int = 128, max_bytes: int = 256 << 20):
+        self.path = path
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self._memory: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "stale_hits": 0, "misses": 0,
+                          "stores": 0, "refreshes": 0, "refresh_failures": 0}
+        # Entries stay on disk while they can still be served stale
+        self._store = SQLiteLRU(path, max_bytes)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _remember(self, key: str, value: Any, created: float) -> None:
+        with self._lock:
+            self._memory[key] = (value, created)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def lookup(self, key: str, now: Optional[float] = None) -> Tuple[Any, Optional[float]]:
+        """(value, age in seconds) from the memory tier, else the disk tier; (None, None) when
+        missing or too old to serve"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is not None and now - entry[1] < self.ttl:
+            self._count("memory_hits")
+            return entry[0], now - entry[1]
+
+        # Missing or stale here: another worker may have stored a newer copy
+        row = self._store.get(key, now)
+        if row is not None and (entry is None or row[1] > entry[1]):
+            value = json.loads(zlib.decompress(row[0]))
+            self._remember(key, value, row[1])
+            self._count("disk_hits")
+            return value, now - row[1]
+        if entry is not None and now - entry[1] < self.ttl + self.max_stale:
+            self._count("memory_hits")
+            return entry[0], now - entry[1]
+        self._count("misses")
+        return None, None
+
+    def store(self, key: str, value: Any, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        self._remember(key, value, now)
+        payload = zlib.compress(json.dumps(value, separators=(",", ":"), default=str).encode("utf-8"))
+        self._store.put(key, payload, now + self.ttl + self.max_stale, now=now)
+        self._count("stores")
+
+    def _compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = compute()
+        if value is not None:
+            self.store(key, value)
+        return value
+
+    def refresh(self, key: str, compute: Callable[[], Any]) -> bool:
+        """Recompute an entry in a background thread; False if a refresh of it is already running"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+
+        def run() -> None:
+            try:
+                single_flight.do(("chat", key), lambda: self._compute(key, compute))
+                self._count("refreshes")
+            except Exception as e:
+                self._count("refresh_failures")
+                print(f"DEBUG: Background refresh of a cached chat result failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name="chat-cache-refresh", daemon=True).start()
+        return True
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Tuple[Any, str, float]:
+        """(value, "hit" | "stale" | "miss", age in seconds).
+
+        A stale entry is returned as is and recomputed in the background; on a
+        miss, compute() runs once for all concurrent callers and a None result
+        is not stored.
+        """
+        value, age = self.lookup(key)
+        if value is not None:
+            if age < self.ttl:
+                return value, "hit", age
+            self._count("stale_hits")
+            self.refresh(key, compute)
+            return value, "stale", age
+        return single_flight.do(("chat", key), lambda: self._compute(key, compute)), "miss", 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        self._store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        disk = self._store.stats()
+        with self._lock:
+            counters = dict(self._counters)
+            memory = len(self._memory)
+            refreshing = len(self._refreshing)
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        lookups = hits + counters["misses"]
+        return {"path": self.path, "ttl_seconds": self.ttl, "max_stale_seconds": self.max_stale,
+                "memory_entries": memory, "disk_entries": disk["entries"], "bytes": disk["bytes"],
+                "max_bytes": self.max_bytes, "evictions": disk["evictions"],
+                "hit_rate": round(hits / lookups, 3) if lookups else None, "refreshing": refreshing, **counters}
+
+
+_cache: Dict[str, Optional[ChatResultCache]] = {}
+
+
+def chat_cache() -> Optional[ChatResultCache]:
+    """Process-wide cache at CHAT_CACHE_PATH (default: <compiled dir>/chat_cache.sqlite); None when disabled"""
+    if "current" not in _cache:
+        _cache["current"] = None
+        if CHAT_CACHE_ENABLED:
+            path = CHAT_CACHE_PATH or os.path.join(dataset_registry.compiled_dir, "chat_cache.sqlite")
+            _cache["current"] = ChatResultCache(path, CHAT_CACHE_TTL, CHAT_CACHE_MAX_STALE,
+                                                CHAT_CACHE_MEMORY_ENTRIES, int(CHAT_CACHE_MAX_MB * (1 << 20)))
+    return _cache["current"]
+
+
+def current_chat_cache() -> Optional[ChatResultCache]:
+    """The process-wide cache if it has been opened, without opening it"""
+    return _cache.get("current")
+
+
+def set_chat_cache(cache: Optional[ChatResultCache]) -> None:
+    _cache["current"] = cache
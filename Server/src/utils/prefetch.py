@@ -0,0 +1,92 @@
+"""Crew Prefetch - Tool results fetched before kickoff and embedded in task descriptions
+
+chat() knows the molecule and the selected agents before crew.kickoff(). With
+CREW_PREFETCH, the lookup each worker agent would start with is run up front,
+for all agents concurrently, through the same tools the agent holds (so results
+are cached and compact-serialized as usual). The results are appended to the
+agent's task description, so the agent analyzes them straight away instead of
+spending one LLM round-trip choosing the tool call and another reading its
+result. Agents keep their tools for follow-up lookups.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from src.tools import (
+    create_clinical_trials_tool,
+    create_exim_tool,
+    create_internal_knowledge_tool,
+    create_iqvia_tool,
+    create_patent_tool,
+    create_web_search_tool,
+)
+
+# Agent key -> (tool factory, argument) of the lookups its task starts with;
+# "molecule" tools get the molecule, "query" tools the molecule and the user query
+PREFETCH_TOOLS: Dict[str, List[Tuple[Callable, str]]] = {
+    'market': [(create_iqvia_tool, 'molecule')],
+    'patent': [(create_patent_tool, 'molecule')],
+    'trials': [(create_clinical_trials_tool, 'molecule')],
+    'trade': [(create_exim_tool, 'molecule')],
+    'internal': [(create_internal_knowledge_tool, 'query')],
+    'web': [(create_web_search_tool, 'query')],
+}
+
+PREFETCH_HEADER = "Data already retrieved for this task with your tools"
+
+# (tool name, arguments, result string)
+Prefetched = Tuple[str, Dict[str, str], str]
+
+_tools: Dict[Callable, Any] = {}
+_tools_lock = threading.Lock()
+
+
+def shared_tool(factory: Callable) -> Any:
+    """One tool instance per factory, reused by every prefetch (safe to call from concurrent requests)"""
+    with _tools_lock:
+        if factory not in _tools:
+            _tools[factory] = factory()
+        return _tools[factory]
+
+
+def prefetch_tool_results(agent_keys: Iterable[str], molecule: str, query: str = "") -> Dict[str, List[Prefetched]]:
+    """Run every selected agent's initial lookups concurrently; failed lookups are left to the agent"""
+    values = {'molecule': molecule, 'query': " ".join(part for part in (molecule, query) if part)}
+    calls = [(key, shared_tool(factory), {argument: values[argument]})
+             for key in agent_keys for factory, argument in PREFETCH_TOOLS.get(key, [])
+             if values[argument]]
+    if not calls:
+        return {}
+
+    def run(call) -> Any:
+        _, tool, kwargs = call
+        try:
+            return tool.run(**kwargs)
+        except Exception as e:
+            print(f"DEBUG: Prefetch of {tool.name} failed: {e}")
+            return None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        results = list(pool.map(run, calls))
+    prefetched: Dict[str, List[Prefetched]] = {}
+    for (key, tool, kwargs), result in zip(calls, results):
+        if isinstance(result, str):
+            prefetched.setdefault(key, []).append((tool.name, kwargs, result))
+    print(f"[OK] Prefetched {sum(map(len, prefetched.values()))}/{len(calls)} tool results "
+          f"in {time.perf_counter() - started:.2f}s")
+    return prefetched
+
+
+def prefetch_context(results: List[Prefetched]) -> str:
+    """Task description suffix holding prefetched tool results"""
+    if not results:
+        return ""
+    lines = ["", "",
+             f"{PREFETCH_HEADER} (analyze it directly; "
+             "call a tool only for information it does not cover):"]
+    for name, kwargs, result in results:
+        arguments = ", ".join(f'{argument}="{value}"' for argument, value in kwargs.items())
+        lines += ["", f"{name}({arguments}):", result]
+    return "\n".join(lines)
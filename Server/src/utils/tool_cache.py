@@ -0,0 +1,238 @@
+"""Tool Cache - Cross-request cache of agent tool results
+
+Every tool in src.tools is wrapped with @cached_tool, so the same call made
+again (within a crew, by another crew or by another user) returns the stored
+result string instead of repeating the lookup, post-processing and encoding.
+
+    key      tool name, normalized arguments (case and whitespace folded), the
+             data version the result was computed from and TOOL_OUTPUT_MODE
+    version  dataset_registry.fingerprint() by default (data files' names,
+             mtimes and sizes), so refreshed datasets are never served stale
+             and every worker process computes the same key; tools backed by
+             other data pass their own (e.g. the knowledge index build)
+
+Backends (TOOL_CACHE_BACKEND):
+
+    memory   in-process LRU
+    sqlite   one file shared by all worker processes, memory-mapped for reads,
+             evicting least recently used entries
+    off      no caching
+
+Both expire entries after TOOL_CACHE_TTL seconds (or a per-tool TTL) and hold
+at most TOOL_CACHE_MAX_MB of results. Concurrent identical calls that miss
+are coalesced, so only one of them runs the tool.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from src.config import TOOL_CACHE_BACKEND, TOOL_CACHE_MAX_MB, TOOL_CACHE_PATH, TOOL_CACHE_TTL, TOOL_OUTPUT_MODE
+from src.data.registry import dataset_registry
+from src.data.singleflight import single_flight
+from src.data.sqlite_lru import SQLiteLRU
+
+
+class ToolCacheBackend(ABC):
+    """Interface of a tool result store (keys and values are strings)"""
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """The stored value, or None if missing or expired"""
+
+    @abstractmethod
+    def put(self, key: str, tool: str, value: str, ttl: float) -> None:
+        """Store a value for ttl seconds"""
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryBackend(ToolCacheBackend):
+    """In-process LRU with expiry"""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, tool: str, value: str, ttl: float) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.time() + ttl)
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                "evictions": self.evictions}
+
+
+class SQLiteBackend(ToolCacheBackend):
+    """One SQLite file shared by every worker process (WAL, reads memory-mapped)"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._store = SQLiteLRU(path, max_bytes, mmap_bytes=max(max_bytes * 2, 1 << 26))
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._store.get(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: str, tool: str, value: str, ttl: float) -> None:
+        self._store.put(key, value, time.time() + ttl, tag=tool)
+
+    def clear(self) -> None:
+        self._store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._store.stats()
+
+
+def create_backend(kind: str = TOOL_CACHE_BACKEND) -> Optional[ToolCacheBackend]:
+    max_bytes = int(TOOL_CACHE_MAX_MB * (1 << 20))
+    if kind == "sqlite":
+        path = TOOL_CACHE_PATH or os.path.join(dataset_registry.compiled_dir, "tool_cache.sqlite")
+        return SQLiteBackend(path, max_bytes)
+    if kind == "memory":
+        return MemoryBackend(max_bytes)
+    return None
+
+
+class ToolCache:
+    """Tool results by (tool, arguments, data version) in a pluggable backend, with hit-rate counters"""
+
+    def __init__(self, backend: Optional[ToolCacheBackend], ttl: float = TOOL_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, tool: str, outcome: str) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(tool, {"hits": 0, "misses": 0})
+            counters[outcome] += 1
+
+    def call(self, tool: str, args: Any, version: str, compute: Callable[[], str], ttl: Optional[float] = None) -> str:
+        if self.backend is None:
+            return compute()
+        key = hashlib.sha256(json.dumps([tool, version, TOOL_OUTPUT_MODE, args], default=str)
+                             .encode("utf-8")).hexdigest()
+        cached = self.backend.get(key)
+        if cached is not None:
+            self._count(tool, "hits")
+            return cached
+        self._count(tool, "misses")
+
+        def run() -> str:
+            result = compute()
+            if isinstance(result, str):
+                self.backend.put(key, tool, result, self.ttl if ttl is None else ttl)
+            return result
+
+        return single_flight.do(("tool", key), run)
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tools = {name: dict(counters) for name, counters in self._counters.items()}
+        hits = sum(c["hits"] for c in tools.values())
+        lookups = hits + sum(c["misses"] for c in tools.values())
+        return {
+            "backend": self.backend.name if self.backend is not None else "off",
+            "ttl_seconds": self.ttl,
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            "tools": tools,
+            **(self.backend.stats() if self.backend is not None else {}),
+        }
+
+
+_cache: Dict[str, Optional[ToolCache]] = {"current": None}
+
+
+def tool_cache() -> ToolCache:
+    """Process-wide cache with the backend selected by TOOL_CACHE_BACKEND"""
+    if _cache["current"] is None:
+        _cache["current"] = ToolCache(create_backend())
+    return _cache["current"]
+
+
+def current_tool_cache() -> Optional[ToolCache]:
+    """The process-wide cache if it has been created, without creating it"""
+    return _cache["current"]
+
+
+def set_tool_cache(cache: ToolCache) -> None:
+    _cache["current"] = cache
+
+
+def _normalize(value: Any) -> Any:
+    return " ".join(value.lower().split()) if isinstance(value, str) else value
+
+
+def cached_tool(name: str, version: Callable[[], Any] = dataset_registry.fingerprint,
+                ttl: Union[None, float, Callable[..., float]] = None):
+    """Decorator (below @tool) caching a tool function's result string.
+
+    `ttl` may be a function of the tool's arguments, for results whose
+    freshness depends on what was asked.
+    """
+    def decorate(fn: Callable[..., str]) -> Callable[..., str]:
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs) -> str:
+            # Defaults filled in, so f("us", ..., mode="expiring") and f("us", ...) share an entry
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key_args = {name: _normalize(value) for name, value in bound.arguments.items()}
+            seconds = ttl(*args, **kwargs) if callable(ttl) else ttl
+            return tool_cache().call(name, key_args, str(version()), lambda: fn(*args, **kwargs), seconds)
+        return wrapper
+    return decorate
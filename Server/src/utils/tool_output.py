@@ -0,0 +1,201 @@
+"""Tool Output - Serialization of agent tool results for the LLM context
+
+Every tool result is read by the agent that called it and replayed to the
+report agent, so its size is paid for on every later step. In "compact" mode
+(TOOL_OUTPUT_MODE) results are written as:
+
+- JSON without indentation or whitespace, non-ASCII kept as is
+- static `_metadata` notes left out (the tool description already says it)
+- record lists as {"columns": [...], "rows": [[...], ...]}, with fields that
+  have the same value in every record moved once into "same"
+- null fields dropped
+- at most TOOL_OUTPUT_MAX_TOKENS tokens (estimated at 4 characters per token):
+  long strings are clipped first, then the largest lists are halved, then
+  entries are replaced by a size note (the smallest one that is enough); a
+  truncated table reports its total row count and numeric column ranges
+
+"json" mode returns the full result with indentation, as before.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+from src.config import TOOL_OUTPUT_MAX_TOKENS, TOOL_OUTPUT_MODE
+
+CHARS_PER_TOKEN = 4
+_STRING_LIMITS = (600, 300, 150)
+# Lists and entries shorter than this (serialized) are not worth cutting
+_MIN_CUT = 120
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _is_table(value: Any) -> bool:
+    return isinstance(value, dict) and "columns" in value and isinstance(value.get("rows"), list)
+
+
+def _table(records: List[Dict]) -> Dict[str, Any]:
+    columns: Dict[str, None] = {}
+    for record in records:
+        columns.update(dict.fromkeys(record))
+    same = {}
+    for column in list(columns):
+        first = records[0].get(column)
+        if all(column in record and record[column] == first for record in records):
+            if first is not None:
+                same[column] = compact(first)
+            del columns[column]
+    table: Dict[str, Any] = {"columns": list(columns),
+                             "rows": [[compact(record.get(column)) for column in columns] for record in records]}
+    if same:
+        table["same"] = same
+    return table
+
+
+def compact(value: Any) -> Any:
+    """Record lists as tables, constant record fields hoisted, null fields dropped (returns a new structure)"""
+    if isinstance(value, dict):
+        return {key: compact(item) for key, item in value.items() if item is not None}
+    if isinstance(value, (list, tuple)):
+        if len(value) > 1 and all(isinstance(item, dict) for item in value):
+            return _table(list(value))
+        return [compact(item) for item in value]
+    return value
+
+
+def _clip_strings(value: Any, limit: int) -> Any:
+    if isinstance(value, str):
+        return value if len(value) <= limit else value[:limit] + "…"
+    if isinstance(value, dict):
+        return {key: _clip_strings(item, limit) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_clip_strings(item, limit) for item in value]
+    return value
+
+
+def _lists(value: Any, found: List) -> List:
+    """Every list with more than one item, as (owner, key) pairs; a table counts as its rows"""
+    if isinstance(value, dict):
+        if _is_table(value):
+            if len(value["rows"]) > 1:
+                found.append((value, "rows"))
+            for row in value["rows"]:
+                for cell in row:
+                    _lists(cell, found)
+            _lists(value.get("same"), found)
+            return found
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return found
+    for key, item in items:
+        if isinstance(item, list) and len(item) > 1:
+            found.append((value, key))
+        _lists(item, found)
+    return found
+
+
+def _summary(table: Dict[str, Any], rows: List[List]) -> Dict[str, Any]:
+    """Row count and numeric ranges of a table's full rows (computed before it is cut)"""
+    ranges = {}
+    for i, column in enumerate(table["columns"]):
+        numbers = [row[i] for row in rows
+                   if isinstance(row[i], (int, float)) and not isinstance(row[i], bool)]
+        if numbers:
+            ranges[column] = [min(numbers), max(numbers)]
+    summary: Dict[str, Any] = {"rows_total": len(rows)}
+    if ranges:
+        summary["ranges"] = ranges
+    return summary
+
+
+def _halve_largest(value: Any) -> bool:
+    """Cut the largest list in half; False when no list is worth cutting"""
+    candidates = [(len(_dumps(owner[key])), owner, key) for owner, key in _lists(value, [])]
+    if not candidates:
+        return False
+    size, owner, key = max(candidates, key=lambda c: c[0])
+    if size < _MIN_CUT:
+        return False
+    items = owner[key]
+    if key == "rows" and _is_table(owner):
+        if "truncated" not in owner:
+            owner["truncated"] = _summary(owner, items)
+        owner[key] = items[:len(items) // 2]
+        owner["truncated"]["rows_shown"] = len(owner[key])
+        return True
+    # Plain lists end with a "…N more" marker
+    hidden = 0
+    if isinstance(items[-1], str) and items[-1].startswith("…") and items[-1].endswith(" more"):
+        hidden, items = int(items[-1][1:-5]), items[:-1]
+    owner[key] = items[:len(items) // 2] + [f"…{hidden + len(items) - len(items) // 2} more"]
+    return True
+
+
+def _values(value: Any, found: List) -> List:
+    """Every dict entry, as (owner, key) pairs"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            found.append((value, key))
+            _values(item, found)
+    elif isinstance(value, list):
+        for item in value:
+            _values(item, found)
+    return found
+
+
+def _omit_entry(value: Any, excess: int) -> bool:
+    """Replace a dict entry with a note of its size: the smallest one that removes `excess` characters,
+    else the largest; False when none is worth replacing"""
+    candidates = [(len(_dumps(owner[key])), owner, key) for owner, key in _values(value, [])]
+    candidates = [c for c in candidates if c[0] >= _MIN_CUT]
+    if not candidates:
+        return False
+    enough = [c for c in candidates if c[0] >= excess + 30]
+    size, owner, key = min(enough, key=lambda c: c[0]) if enough else max(candidates, key=lambda c: c[0])
+    owner[key] = f"…omitted ({size} chars)"
+    return True
+
+
+def fit_budget(value: Any, max_tokens: int) -> str:
+    """Compact JSON of `value`, cut down to at most max_tokens (estimated)"""
+    budget = max_tokens * CHARS_PER_TOKEN
+    text = _dumps(value)
+    if len(text) <= budget:
+        return text
+    for limit in _STRING_LIMITS:
+        value = _clip_strings(value, limit)
+        text = _dumps(value)
+        if len(text) <= budget:
+            return text
+    while len(text) > budget and _halve_largest(value):
+        text = _dumps(value)
+    while len(text) > budget and _omit_entry(value, len(text) - budget):
+        text = _dumps(value)
+    if len(text) > budget:
+        # Many small entries: keep the head of the text (shortened until it fits once quotes are escaped)
+        head, total = text[:max(budget - 60, 0)], len(text)
+        text = _dumps({"truncated": head, "chars_total": total})
+        while len(text) > budget and head:
+            head = head[:max(len(head) - (len(text) - budget), 0)]
+            text = _dumps({"truncated": head, "chars_total": total})
+    return text
+
+
+def format_tool_result(data: Any, notes: Optional[Dict[str, Any]] = None, mode: str = TOOL_OUTPUT_MODE,
+                       max_tokens: int = TOOL_OUTPUT_MAX_TOKENS) -> str:
+    """Serialize a tool result; `notes` (static explanations) join `_metadata` in json mode only"""
+    if mode != "compact":
+        if notes:
+            if isinstance(data, dict):
+                data = {**data, "_metadata": {**(data.get("_metadata") or {}), **notes}}
+            else:
+                data = {"results": data, "_metadata": notes}
+        return json.dumps(data, indent=2)
+    return fit_budget(compact(data), max_tokens)
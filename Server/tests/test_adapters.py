@@ -0,0 +1,87 @@
+"""Data source adapters: HTTP retries, failures and the bundled-data fallback"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.data import adapters
+from src.data.adapters import DataSourceAdapter, DataSourceError, HttpAdapter, parse_source_urls
+
+
+def _http_adapter(handler, retries=2):
+    adapter = HttpAdapter({"iqvia": "http://iqvia.test/", "exim": "http://exim.test"}, retries=retries)
+    adapter._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return adapter
+
+
+def test_adapter_interface_requires_fetch():
+    with pytest.raises(TypeError):
+        DataSourceAdapter()
+
+
+def test_parse_source_urls():
+    assert parse_source_urls(" iqvia=http://a:1 , exim=http://b:2,broken,=http://c") == {
+        "iqvia": "http://a:1", "exim": "http://b:2"}
+
+
+def test_transient_errors_are_retried():
+    statuses = [503, 429]
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.path, request.url.params["molecule"]))
+        if statuses:
+            return httpx.Response(statuses.pop(0))
+        return httpx.Response(200, json={"molecule": request.url.params["molecule"]})
+
+    adapter = _http_adapter(handler)
+    assert asyncio.run(adapter.fetch("iqvia", "Aspirin")) == {"molecule": "Aspirin"}
+    assert seen == [("/iqvia", "Aspirin")] * 3
+    assert adapter.stats()["retries"] == 2 and adapter.stats()["failures"] == 0
+
+
+def test_client_errors_are_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(404)
+
+    adapter = _http_adapter(handler)
+    with pytest.raises(DataSourceError, match="404"):
+        asyncio.run(adapter.fetch("exim", "aspirin"))
+    assert len(calls) == 1
+    assert adapter.stats()["failures"] == 1
+
+
+def test_fetch_many_keeps_order_and_returns_errors():
+    def handler(request):
+        if request.url.host == "exim.test":
+            return httpx.Response(503)
+        return httpx.Response(200, json={"molecule": request.url.params["molecule"]})
+
+    adapter = _http_adapter(handler, retries=0)
+    results = asyncio.run(adapter.fetch_many([("iqvia", "a"), ("exim", "b"), ("patents", "c"), ("iqvia", "d")]))
+    assert results[0] == {"molecule": "a"} and results[3] == {"molecule": "d"}
+    assert isinstance(results[1], DataSourceError) and isinstance(results[2], DataSourceError)
+
+
+def test_fetch_sources_falls_back_to_bundled_data(monkeypatch):
+    def handler(request):
+        if request.url.host == "exim.test":
+            return httpx.Response(502)
+        return httpx.Response(200, json={"remote": request.url.params["molecule"]})
+
+    monkeypatch.setitem(adapters._adapter, "current", _http_adapter(handler, retries=0))
+    monkeypatch.setattr(adapters, "_local", lambda source, molecule: {"local": source, "molecule": molecule})
+
+    assert adapters.fetch_sources([("iqvia", "fallback-a"), ("exim", "fallback-b")]) == [
+        {"remote": "fallback-a"}, {"local": "exim", "molecule": "fallback-b"}]
+    with pytest.raises(DataSourceError):
+        adapters.fetch_source("exim", "fallback-c", fallback=False)
+
+
+def test_current_adapter_is_not_created_by_inspection(monkeypatch):
+    monkeypatch.setitem(adapters._adapter, "current", None)
+    assert adapters.current_data_source_adapter() is None
+    assert adapters._adapter["current"] is None
@@ -0,0 +1,76 @@
+"""Materialized aggregates: columnar trial counts match the record-by-record pass"""
+import json
+import os
+from collections import Counter
+
+import pytest
+
+from src.data.aggregates import (
+    _columnar_trial_groups,
+    build_market_aggregates,
+    build_trade_aggregates,
+    build_trial_aggregates,
+)
+from src.data.columnar import compile_dataset, open_compiled
+from src.data.fallback import normalize_key
+from src.data.synthetic import generate_datasets
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "src", "data")
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module", params=["bundled", "synthetic"])
+def trials_file(request, tmp_path_factory):
+    if request.param == "bundled":
+        return os.path.join(DATA_DIR, "clinical_trials_mock.json")
+    out = tmp_path_factory.mktemp("trials")
+    generate_datasets(str(out), trials=2_000, molecules=40, chunk_size=500)
+    return str(out / "clinical_trials_mock.json")
+
+
+def test_trial_counts_by_brute_force(trials_file):
+    trials = _load(trials_file)["trials"]
+    rows = build_trial_aggregates(_load(trials_file))
+    assert sum(row["total"] for row in rows.values()) == len(trials)
+    for key, row in rows.items():
+        mine = [t for t in trials if normalize_key(t.get("molecule") or "") == key]
+        assert row["total"] == len(mine)
+        assert row["enrollment"] == sum(t.get("sample_size") or 0 for t in mine)
+        assert row["by_phase"] == dict(Counter(t.get("phase") or "Unknown" for t in mine))
+        # Largest first
+        assert list(row["by_status"].values()) == sorted(row["by_status"].values(), reverse=True)
+
+
+def test_columnar_trials_match_records(trials_file, tmp_path):
+    compile_dataset(trials_file, str(tmp_path / "trials.pcol"))
+    with open_compiled(str(tmp_path / "trials.pcol")) as document:
+        assert _columnar_trial_groups(document.section("trials")) is not None
+        assert build_trial_aggregates(document) == build_trial_aggregates(_load(trials_file))
+
+
+def test_trade_rows_read_2024_and_the_series():
+    doc = _load(os.path.join(DATA_DIR, "exim_data.json"))
+    rows = build_trade_aggregates(doc)
+    record = doc["api_exports"][0]
+    row = rows[("api_exports", 0)]
+    assert row["total_volume"] == record["yearwise_volume_tonnes"].get("2024", 0)
+    assert row["value_usd_mn"] == record["export_value_usd_mn"].get("2024", 0)
+    assert row["years"] == sorted(int(year) for year in record["yearwise_volume_tonnes"])
+    assert len(rows) == sum(len(doc.get(section, [])) for section in
+                            ("api_exports", "api_imports", "formulation_exports"))
+
+
+def test_market_rows_rank_manufacturers():
+    doc = _load(os.path.join(DATA_DIR, "market_overview.json"))
+    rows = build_market_aggregates(doc)
+    assert set(rows) == set(doc)
+    for key, row in rows.items():
+        shares = [share for _, share in row["share_ranking"]]
+        assert shares == sorted(shares, reverse=True)
+        assert [m["rank"] for m in row["top_manufacturers"]] == list(range(1, len(row["top_manufacturers"]) + 1))
+        years = [h["year"] for h in row["historical_data"]]
+        assert years == sorted(years)
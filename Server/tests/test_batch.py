@@ -0,0 +1,52 @@
+"""Batch lookups: search_many returns exactly what the single-molecule lookups return"""
+import json
+import os
+
+import pytest
+
+from src.data import MockDataSources
+from src.data.index import molecule_index
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "src", "data")
+
+SINGLE = {
+    "iqvia": MockDataSources.search_iqvia,
+    "exim": MockDataSources.search_exim,
+    "patents": MockDataSources.search_patents,
+    "clinical_trials": MockDataSources.search_clinical_trials,
+}
+
+
+@pytest.fixture(scope="module")
+def molecules():
+    with open(os.path.join(DATA_DIR, "clinical_trials_mock.json")) as f:
+        known = [trial["molecule"] for trial in json.load(f)["trials"]]
+    return known + ["Metformin", "metformin", "Zzzqmab", ""]
+
+
+def test_batch_matches_single_lookups(molecules):
+    results = MockDataSources.search_many(molecules)
+    for molecule, by_source in results.items():
+        assert set(by_source) == set(SINGLE)
+        for source, lookup in SINGLE.items():
+            assert by_source[source] == lookup(molecule), (molecule, source)
+
+
+def test_batch_keeps_input_order_without_duplicates_or_blanks():
+    streamed = [molecule for molecule, _ in MockDataSources.iter_search_many(
+        ["Osimertinib", " Semaglutide ", "", "Osimertinib", "Semaglutide"], sources=["exim"])]
+    assert streamed == ["Osimertinib", "Semaglutide"]
+
+
+def test_batch_selects_sources():
+    results = MockDataSources.search_many(["Semaglutide"], sources=["patents"])
+    assert list(results["Semaglutide"]) == ["patents"]
+    with pytest.raises(ValueError, match="Unknown data source"):
+        MockDataSources.search_many(["Semaglutide"], sources=["patents", "nope"])
+
+
+def test_lookup_many_matches_lookup(molecules):
+    index = molecule_index("clinical_trials_mock.json")
+    batch = index.lookup_many(molecules, fields=("molecule",))
+    for molecule in molecules:
+        assert batch[molecule] == index.lookup(molecule, fields=("molecule",))
@@ -0,0 +1,81 @@
+"""BM25 index: varint round trips and MaxScore top-k against exhaustive scoring"""
+import math
+import sqlite3
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from src.data.bm25 import B, K1, BM25Index, build_bm25, decode_varints, encode_varints
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(5)
+    vocabulary = [f"t{i}" for i in range(300)]
+    # Zipf-like term frequencies: common terms span many blocks, rare ones a few postings
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    weights /= weights.sum()
+    return [list(rng.choice(vocabulary, size=int(rng.integers(1, 60)), p=weights)) for _ in range(3_000)]
+
+
+@pytest.fixture(scope="module")
+def index(corpus, tmp_path_factory):
+    root = tmp_path_factory.mktemp("bm25")
+    conn = sqlite3.connect(str(root / "lexicon.db"), check_same_thread=False)
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value)")
+    build_bm25(corpus, str(root / "postings.bin"), conn)
+    conn.commit()
+    return BM25Index(str(root / "postings.bin"), lambda: conn)
+
+
+def _brute_force(corpus, terms):
+    n = len(corpus)
+    avg = max(sum(len(doc) for doc in corpus) / n, 1.0)
+    counts = [Counter(doc) for doc in corpus]
+    scores = np.zeros(n)
+    for term in dict.fromkeys(terms):
+        df = sum(1 for c in counts if term in c)
+        if not df:
+            continue
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for doc, c in enumerate(counts):
+            tf = c.get(term, 0)
+            if tf:
+                scores[doc] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * len(corpus[doc]) / avg))
+    return scores
+
+
+def test_varints_round_trip():
+    values = np.array([0, 1, 127, 128, 300, 16_383, 16_384, 2 ** 21, 2 ** 28 + 5, 2 ** 35 - 1], dtype=np.uint64)
+    data, lengths = encode_varints(values)
+    assert lengths.tolist() == [1, 1, 1, 2, 2, 2, 3, 4, 5, 5]
+    assert decode_varints(data).tolist() == values.astype(np.int64).tolist()
+
+
+@pytest.mark.parametrize("terms, k", [
+    (["t0", "t1"], 10),
+    (["t0", "t5", "t40", "t250"], 5),
+    (["t3", "t3", "t120"], 20),
+    (["t299", "t0"], 1),
+    (["t7", "t60", "t150", "t200", "t2"], 50),
+])
+def test_top_k_matches_brute_force(corpus, index, terms, k):
+    expected = _brute_force(corpus, terms)
+    result = index.top_k(terms, k)
+    assert len(result) == min(k, int((expected > 0).sum()))
+
+    docs = [doc for doc, _ in result]
+    scores = np.array([score for _, score in result])
+    assert len(set(docs)) == len(docs)
+    assert np.all(np.diff(scores) <= 1e-6)
+    np.testing.assert_allclose(scores, expected[docs], rtol=1e-5)
+    # Same top-k up to ties: every returned score is at least the true k-th best
+    kth = np.sort(expected)[::-1][len(result) - 1]
+    assert scores.min() >= kth - 1e-4
+
+
+def test_unknown_terms_and_empty_queries(index):
+    assert index.top_k(["missing"], 5) == []
+    assert index.top_k([], 5) == []
+    assert index.top_k(["t0"], 0) == []
@@ -0,0 +1,129 @@
+"""Chat result cache: request keys, memory and disk tiers, stale-while-revalidate"""
+import threading
+import time
+
+import pytest
+
+from src.data.registry import dataset_registry
+from src.utils import chat_cache as chat_cache_module
+from src.utils.chat_cache import ChatResultCache, chat_cache_key, chat_request_key
+
+
+def test_chat_key_folds_case_whitespace_and_agent_order():
+    assert (chat_cache_key("Market size of  Metformin?", "metformin", ["market", "patent"])
+            == chat_cache_key("market size of metformin?", "Metformin", ["patent", "market"]))
+    assert chat_cache_key("q", "Metformin", ["market"]) != chat_cache_key("q", "Metformin", ["market", "patent"])
+
+
+def test_chat_key_changes_with_the_data_fingerprint(monkeypatch):
+    monkeypatch.setattr(dataset_registry, "fingerprint", lambda: "a")
+    before = chat_request_key("Market size", "Metformin", ["market"])
+    assert chat_request_key("Market size", "Metformin", ["market"]) == before
+    monkeypatch.setattr(dataset_registry, "fingerprint", lambda: "b")
+    assert chat_request_key("Market size", "Metformin", ["market"]) != before
+
+
+def test_chat_key_changes_with_the_output_mode(monkeypatch):
+    monkeypatch.setattr(dataset_registry, "fingerprint", lambda: "a")
+    monkeypatch.setattr(chat_cache_module, "TOOL_OUTPUT_MODE", "compact")
+    before = chat_request_key("Market size", "Metformin", ["market"])
+    monkeypatch.setattr(chat_cache_module, "TOOL_OUTPUT_MODE", "json")
+    assert chat_request_key("Market size", "Metformin", ["market"]) != before
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ChatResultCache(str(tmp_path / "chat_cache.sqlite"), ttl=100, max_stale=1000)
+
+
+class Compute:
+    """Stand-in crew run returning a new answer per call, optionally held until released"""
+
+    def __init__(self, blocking=False):
+        self.calls = 0
+        self.release = threading.Event()
+        if not blocking:
+            self.release.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        return {"answer": self.calls}
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_miss_then_hit(cache):
+    compute = Compute()
+    assert cache.get_or_compute("k", compute)[:2] == ({"answer": 1}, "miss")
+    value, state, age = cache.get_or_compute("k", compute)
+    assert (value, state) == ({"answer": 1}, "hit") and age < 100
+    assert compute.calls == 1
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_other_workers_read_the_disk_tier(cache, tmp_path):
+    cache.get_or_compute("k", Compute())
+    other = ChatResultCache(cache.path, ttl=100, max_stale=1000)
+    assert other.get_or_compute("k", Compute())[:2] == ({"answer": 1}, "hit")
+    assert other.stats()["disk_hits"] == 1
+
+
+def test_stale_entries_are_served_and_refreshed_once_in_the_background(cache):
+    cache.store("k", {"answer": 0}, now=time.time() - 150)
+    compute = Compute(blocking=True)
+
+    value, state, age = cache.get_or_compute("k", compute)
+    assert (value, state) == ({"answer": 0}, "stale") and age >= 150
+    # A second stale read while the refresh runs does not start another one
+    assert cache.get_or_compute("k", compute)[:2] == ({"answer": 0}, "stale")
+    _wait_for(lambda: compute.calls == 1)
+    compute.release.set()
+    _wait_for(lambda: cache.stats()["refreshes"] == 1)
+
+    assert cache.get_or_compute("k", compute)[:2] == ({"answer": 1}, "hit")
+    assert compute.calls == 1
+    assert cache.stats()["stale_hits"] == 2
+
+
+def test_entries_past_max_stale_are_recomputed(cache):
+    cache.store("k", {"answer": 0}, now=time.time() - 1200)
+    fresh = ChatResultCache(cache.path, ttl=100, max_stale=1000)
+    assert fresh.get_or_compute("k", Compute())[:2] == ({"answer": 1}, "miss")
+
+
+def test_failed_refresh_keeps_the_stale_entry(cache):
+    cache.store("k", {"answer": 0}, now=time.time() - 150)
+
+    def fail():
+        raise RuntimeError("crew failed")
+
+    assert cache.get_or_compute("k", fail)[1] == "stale"
+    _wait_for(lambda: cache.stats()["refresh_failures"] == 1)
+    assert cache.get_or_compute("k", Compute())[:2] == ({"answer": 0}, "stale")
+
+
+def test_concurrent_misses_run_once(cache):
+    compute = Compute(blocking=True)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)[0]))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: compute.calls == 1)
+    time.sleep(0.05)
+    compute.release.set()
+    for thread in threads:
+        thread.join()
+    assert compute.calls == 1
+    assert results == [{"answer": 1}] * 5
+
+
+def test_none_results_are_not_stored(cache):
+    assert cache.get_or_compute("k", lambda: None)[:2] == (None, "miss")
+    assert cache.get_or_compute("k", Compute())[:2] == ({"answer": 1}, "miss")
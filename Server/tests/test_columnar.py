@@ -0,0 +1,71 @@
+"""Columnar compile: compiled documents read back like the JSON source and are closed after use"""
+import json
+import os
+
+import pytest
+
+from src.data.columnar import compile_dataset, is_fresh, open_compiled
+
+SOURCE = {
+    "records": [
+        {"name": "aspirin", "phase": 3, "score": 0.5, "tags": ["a", "b"]},
+        {"name": "ibuprofen", "phase": None, "score": 1.25},
+        {"name": "naproxen", "phase": 2, "extra": {"nested": True}},
+    ],
+    "total": 3,
+    "label": "demo",
+}
+
+
+@pytest.fixture
+def compiled(tmp_path):
+    source = tmp_path / "demo.json"
+    source.write_text(json.dumps(SOURCE))
+    out = tmp_path / "demo.pcol"
+    compile_dataset(str(source), str(out))
+    return source, out
+
+
+def test_compiled_document_matches_source(compiled):
+    _, out = compiled
+    with open_compiled(str(out)) as document:
+        assert set(document) == set(SOURCE)
+        assert document["total"] == 3
+        assert document["label"] == "demo"
+        assert [dict(record) if isinstance(record, dict) else record
+                for record in document["records"]] == SOURCE["records"]
+
+
+def test_is_fresh_follows_the_source(compiled):
+    source, out = compiled
+    assert is_fresh(str(source), str(out))
+
+    source.write_text(json.dumps({**SOURCE, "total": 4}))
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not is_fresh(str(source), str(out))
+
+
+def test_is_fresh_closes_the_document(compiled, monkeypatch):
+    from src.data import columnar
+
+    source, out = compiled
+    opened = []
+
+    def track(path):
+        opened.append(open_compiled(path))
+        return opened[-1]
+
+    monkeypatch.setattr(columnar, "open_compiled", track)
+    assert columnar.is_fresh(str(source), str(out))
+    assert len(opened) == 1 and opened[0]._mm.closed
+
+
+def test_non_compiled_file_is_rejected(tmp_path):
+    bogus = tmp_path / "bogus.pcol"
+    bogus.write_bytes(b"x")
+    with pytest.raises(ValueError):
+        open_compiled(str(bogus))
+    source = tmp_path / "bogus.json"
+    source.write_text("{}")
+    assert not is_fresh(str(source), str(bogus))
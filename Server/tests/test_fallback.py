@@ -0,0 +1,52 @@
+"""Fallback generation: seeded by the normalized key, memoized, handed out as copies"""
+from src.data import MockDataSources
+from src.data.fallback import FallbackMemo, normalize_key, seeded_rng
+
+
+def _generator(calls):
+    def generate(key, rng):
+        calls.append(key)
+        return {"molecule": key, "value": rng.random(), "series": [rng.randint(0, 100) for _ in range(3)]}
+    return generate
+
+
+def test_seed_depends_on_source_and_normalized_key():
+    assert normalize_key("  Zeta  MAB ") == "zeta mab"
+    assert seeded_rng("iqvia", "Zeta Mab").random() == seeded_rng("iqvia", " zeta  mab").random()
+    assert seeded_rng("iqvia", "zeta mab").random() != seeded_rng("exim", "zeta mab").random()
+
+
+def test_memo_hits_return_independent_copies():
+    calls = []
+    memo = FallbackMemo(max_entries=10)
+    first = memo.get_or_generate("iqvia", "zetamab", _generator(calls))
+    first["series"].append("annotated")
+    second = memo.get_or_generate("iqvia", "zetamab", _generator(calls))
+    assert calls == ["zetamab"]
+    assert second["series"] == first["series"][:3]
+    assert memo.stats()["hits"] == 1 and memo.stats()["misses"] == 1
+
+
+def test_spellings_share_numbers_but_echo_their_input():
+    calls = []
+    memo = FallbackMemo(max_entries=10)
+    a = memo.get_or_generate("iqvia", "Zetamab", _generator(calls))
+    b = memo.get_or_generate("iqvia", "zetamab ", _generator(calls))
+    assert (a["molecule"], b["molecule"]) == ("Zetamab", "zetamab ")
+    assert (a["value"], a["series"]) == (b["value"], b["series"])
+
+
+def test_memo_evicts_least_recently_used():
+    calls = []
+    memo = FallbackMemo(max_entries=2)
+    for key in ["a", "b", "a", "c", "a", "b"]:
+        memo.get_or_generate("web", key, _generator(calls))
+    assert calls == ["a", "b", "c", "b"]
+    assert memo.stats()["evictions"] == 2 and memo.stats()["entries"] == 2
+
+
+def test_unknown_molecules_get_stable_market_data():
+    first = MockDataSources.search_iqvia("Qqxylomab")
+    second = MockDataSources.search_iqvia("qqxylomab")
+    assert first["molecule"] == "Qqxylomab"
+    assert first["market_overview"] == second["market_overview"]
@@ -0,0 +1,95 @@
+"""Knowledge base: chunking, cited search over a build, and incremental PDF ingestion"""
+import os
+
+import pytest
+
+from src.data import knowledge
+from src.data.knowledge import KnowledgeIndex, build_index, chunk_page, ingest_documents, words
+
+
+def test_words_keep_ids_and_codes():
+    assert words("The NCT04123456 trial, HS 2942.20 and the drug") == ["nct04123456", "trial", "hs", "2942.20", "drug"]
+
+
+def test_chunk_page_overlaps_windows():
+    text = " ".join(f"w{i}" for i in range(10))
+    assert chunk_page(text, words=4, overlap=1) == ["w0 w1 w2 w3", "w3 w4 w5 w6", "w6 w7 w8 w9"]
+    assert chunk_page("", words=4, overlap=1) == []
+    assert chunk_page("one two", words=4, overlap=1) == ["one two"]
+
+
+def test_search_cites_the_matching_page(tmp_path):
+    chunks = [
+        ("report.pdf", 1, "metformin market growth in india driven by generics"),
+        ("report.pdf", 2, "trial NCT04123456 evaluates semaglutide in obese adults"),
+        ("trade.pdf", 1, "exports of HS 2942.20 rose to the united states"),
+        ("trade.pdf", 3, "imports from china fell sharply this quarter"),
+    ]
+    build_index(chunks, str(tmp_path), dim=256)
+    index = KnowledgeIndex(str(tmp_path))
+
+    hits = index.search("NCT04123456", k=3)
+    assert hits[0]["filename"] == "report.pdf" and hits[0]["page"] == 2
+    assert hits[0]["bm25_score"] > 0
+    assert [h["filename"] for h in index.search("2942.20 exports", k=1)] == ["trade.pdf"]
+    assert index.search("nothing here matches", k=3) == []
+    assert index.stats()["chunks"] == 4
+
+
+def test_search_without_a_build(tmp_path):
+    assert KnowledgeIndex(str(tmp_path / "missing")).search("anything") is None
+
+
+@pytest.fixture
+def fake_pdfs(tmp_path, monkeypatch):
+    """PDFs whose 'pages' are the lines of the file; extraction calls are recorded"""
+    extracted = []
+
+    def extract_pages(path):
+        extracted.append(os.path.basename(path))
+        with open(path) as f:
+            content = f.read()
+        if content.startswith("broken"):
+            raise ValueError("not a PDF")
+        for number, line in enumerate(content.splitlines(), start=1):
+            yield number, line
+
+    monkeypatch.setattr(knowledge, "extract_pages", extract_pages)
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    return docs, tmp_path / "index", extracted
+
+
+def _write(path, text, bump=0):
+    path.write_text(text)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump * 1_000_000_000))
+
+
+def test_ingest_is_incremental(fake_pdfs):
+    docs, out, extracted = fake_pdfs
+    _write(docs / "a.pdf", "alpha semaglutide page\nalpha second page")
+    _write(docs / "b.pdf", "beta metformin page")
+    _write(docs / "copy.pdf", "beta metformin page")
+    _write(docs / "bad.pdf", "broken")
+
+    stats = ingest_documents(str(docs), str(out), workers=1)
+    assert (stats["files"], stats["extracted"], stats["failed"], stats["duplicates"]) == (4, 2, 1, 1)
+    # Byte-identical copies are extracted once
+    assert sorted(extracted) == ["a.pdf", "b.pdf", "bad.pdf"]
+    hits = KnowledgeIndex(str(out)).search("metformin", k=5)
+    assert [(h["filename"], h["page"]) for h in hits] == [("b.pdf", 1)]
+
+    extracted.clear()
+    stats = ingest_documents(str(docs), str(out), workers=1)
+    # Only the failed file is retried; nothing else changed, so the build is kept
+    assert extracted == ["bad.pdf"] and stats.get("unchanged")
+
+    extracted.clear()
+    _write(docs / "a.pdf", "alpha tirzepatide page", bump=5)
+    os.remove(docs / "bad.pdf")
+    stats = ingest_documents(str(docs), str(out), workers=1)
+    assert extracted == ["a.pdf"] and not stats.get("unchanged")
+    index = KnowledgeIndex(str(out))
+    assert index.search("semaglutide", k=5) == []
+    assert [(h["filename"], h["page"]) for h in index.search("tirzepatide", k=5)] == [("a.pdf", 1)]
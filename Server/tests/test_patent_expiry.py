@@ -0,0 +1,79 @@
+"""Patent expiry index: interval tree and expiry window queries against brute force"""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from src.data.patent_expiry import IntervalTree, JurisdictionIndex, parse_window
+
+
+@pytest.fixture(scope="module")
+def intervals():
+    rng = np.random.default_rng(11)
+    starts = rng.integers(0, 10_000, 2_000)
+    ends = starts + rng.integers(0, 1_500, 2_000)
+    return starts, ends
+
+
+def test_overlapping_matches_brute_force(intervals):
+    starts, ends = intervals
+    tree = IntervalTree(starts, ends)
+    rng = np.random.default_rng(5)
+    for _ in range(300):
+        low = int(rng.integers(-500, 11_500))
+        high = low + int(rng.integers(0, 800))
+        expected = np.flatnonzero((starts <= high) & (ends >= low))
+        found = tree.overlapping(low, high)
+        assert len(found) == len(set(found.tolist()))
+        assert sorted(found.tolist()) == expected.tolist()
+
+
+def test_touching_endpoints_overlap():
+    tree = IntervalTree(np.array([0, 10, 20]), np.array([10, 20, 30]))
+    assert sorted(tree.overlapping(10, 10).tolist()) == [0, 1]
+    assert sorted(tree.overlapping(31, 40).tolist()) == []
+    assert sorted(tree.overlapping(-5, -1).tolist()) == []
+
+
+def test_empty_tree():
+    assert len(IntervalTree(np.array([], dtype=np.int64), np.array([], dtype=np.int64)).overlapping(0, 1)) == 0
+
+
+def test_jurisdiction_windows_match_brute_force(intervals):
+    starts, ends = intervals
+    offset = date(2000, 1, 1).toordinal()
+    index = JurisdictionIndex(list(range(len(starts))), (starts + offset).tolist(), (ends + offset).tolist())
+    first, last = date(2010, 3, 1), date(2012, 6, 30)
+    lo, hi = first.toordinal() - offset, last.toordinal() - offset
+
+    expiring = index.expiring(first, last)
+    expected = np.flatnonzero((ends >= lo) & (ends <= hi))
+    assert sorted(expiring.tolist()) == expected.tolist()
+    assert np.all(np.diff(ends[expiring]) >= 0)
+
+    protected = index.protected(first, last)
+    expected = np.flatnonzero((starts <= hi) & (ends >= lo))
+    assert sorted(protected.tolist()) == expected.tolist()
+    # Earliest expiry first, ties in position order
+    assert protected.tolist() == sorted(expected.tolist(), key=lambda i: (ends[i], i))
+
+
+def test_parse_window_bounds():
+    assert parse_window("2026", "2026") == (date(2026, 1, 1), date(2026, 12, 31))
+    assert parse_window("2024-02", "2024-02") == (date(2024, 2, 1), date(2024, 2, 29))
+    assert parse_window("2026-12", "2026-12") == (date(2026, 12, 1), date(2026, 12, 31))
+    assert parse_window("2026-06-15", "2027-01") == (date(2026, 6, 15), date(2027, 1, 31))
+
+
+@pytest.mark.parametrize("start, end", [
+    ("2026-00", "2026"), ("2026-13", "2026"), ("2026", "2026-00"), ("2026", "2026-13"),
+    ("2026-1x", "2026"), ("2026-02-30", "2026"),
+])
+def test_parse_window_rejects_invalid_months(start, end):
+    with pytest.raises(ValueError, match="Invalid date"):
+        parse_window(start, end)
+
+
+def test_parse_window_rejects_reversed_bounds():
+    with pytest.raises(ValueError, match="start must not be after end"):
+        parse_window("2027", "2026")
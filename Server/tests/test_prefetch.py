@@ -0,0 +1,86 @@
+"""Crew prefetch: initial lookups run concurrently and land in the task description"""
+import threading
+
+import pytest
+
+from src.utils import prefetch
+from src.utils.prefetch import PREFETCH_HEADER, prefetch_context, prefetch_tool_results, shared_tool
+
+
+class FakeTool:
+    def __init__(self, name, barrier=None, fail=False):
+        self.name = name
+        self.barrier = barrier
+        self.fail = fail
+        self.calls = []
+
+    def run(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.barrier is not None:
+            # Every lookup waits for the others: passes only if they run at the same time
+            self.barrier.wait(5)
+        if self.fail:
+            raise RuntimeError("source down")
+        return f"{self.name}:{kwargs}"
+
+
+@pytest.fixture
+def tools(monkeypatch):
+    barrier = threading.Barrier(3)
+    made = {
+        "market": FakeTool("IQVIA_Market_Data", barrier),
+        "patent": FakeTool("Patent_Search", barrier),
+        "web": FakeTool("Web_Search", barrier),
+        "trials": FakeTool("Clinical_Trials", fail=True),
+    }
+    factories = {key: (lambda tool=tool: tool) for key, tool in made.items()}
+    monkeypatch.setattr(prefetch, "PREFETCH_TOOLS", {
+        "market": [(factories["market"], "molecule")],
+        "patent": [(factories["patent"], "molecule")],
+        "web": [(factories["web"], "query")],
+        "trials": [(factories["trials"], "molecule")],
+    })
+    monkeypatch.setattr(prefetch, "_tools", {})
+    return made
+
+
+def test_lookups_run_concurrently_and_failures_are_left_out(tools):
+    results = prefetch_tool_results(["market", "patent", "web", "report"], "Semaglutide", "India outlook")
+    assert set(results) == {"market", "patent", "web"}
+    assert results["market"] == [("IQVIA_Market_Data", {"molecule": "Semaglutide"},
+                                  "IQVIA_Market_Data:{'molecule': 'Semaglutide'}")]
+    assert tools["web"].calls == [{"query": "Semaglutide India outlook"}]
+
+    tools["market"].barrier = tools["patent"].barrier = None
+    assert "trials" not in prefetch_tool_results(["trials", "market"], "Semaglutide")
+    assert tools["trials"].calls == [{"molecule": "Semaglutide"}]
+
+
+def test_nothing_to_fetch_without_a_molecule(tools):
+    assert prefetch_tool_results(["market", "patent"], "") == {}
+    assert tools["market"].calls == []
+
+
+def test_shared_tool_creates_one_instance(monkeypatch):
+    monkeypatch.setattr(prefetch, "_tools", {})
+    created = []
+
+    def factory():
+        created.append(object())
+        return created[-1]
+
+    threads = [threading.Thread(target=shared_tool, args=(factory,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1 and shared_tool(factory) is created[0]
+
+
+def test_context_lists_each_result():
+    assert prefetch_context([]) == ""
+    text = prefetch_context([("IQVIA_Market_Data", {"molecule": "Semaglutide"}, '{"tam":1}'),
+                             ("Web_Search", {"query": "Semaglutide India"}, "[]")])
+    assert PREFETCH_HEADER in text
+    assert 'IQVIA_Market_Data(molecule="Semaglutide"):\n{"tam":1}' in text
+    assert text.endswith('Web_Search(query="Semaglutide India"):\n[]')
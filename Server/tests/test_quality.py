@@ -0,0 +1,77 @@
+"""Data quality profiles: gap flags against the str(data) scan they replaced"""
+import json
+import os
+from datetime import date
+
+import pytest
+
+from src.data.index import RECORD_EXTRACTORS, resolve
+from src.data.quality import PARTIAL_FLAG, YTD_FLAG, gap_flags, profile_record, with_staleness
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "src", "data")
+
+
+def legacy_gaps(data):
+    """The previous detect_data_gaps: substring scans of str(data)"""
+    text = str(data).lower()
+    return {"is_yyd": "yty_data" in text or "year_to_date" in text,
+            "is_partial": "estimated" in text or "partial" in text}
+
+
+def _bundled_records():
+    for filename, extract in RECORD_EXTRACTORS.items():
+        with open(os.path.join(DATA_DIR, filename)) as f:
+            doc = json.load(f)
+        for ref, _ in extract(doc):
+            yield pytest.param(resolve(doc, ref), id=f"{filename}:{'/'.join(map(str, ref))}")
+
+
+@pytest.mark.parametrize("record", list(_bundled_records()))
+def test_bundled_records_match_the_legacy_scan(record):
+    flags = gap_flags(profile_record(record))
+    assert {key: flags[key] for key in ("is_yyd", "is_partial")} == legacy_gaps(record)
+
+
+@pytest.mark.parametrize("record, ytd, partial", [
+    ({"revenue": {"year_to_date": 120}}, True, False),
+    ({"yty_data": [1, 2]}, True, False),
+    ({"value": 5, "status": "Estimated"}, False, True),
+    ({"notes": ["partial quarter"]}, False, True),
+    ({"value": 5, "source": "audited"}, False, False),
+])
+def test_markers_agree_with_the_legacy_scan(record, ytd, partial):
+    flags = gap_flags(profile_record(record))
+    assert (flags["is_yyd"], flags["is_partial"]) == (ytd, partial)
+    assert legacy_gaps(record) == {"is_yyd": ytd, "is_partial": partial}
+    assert (YTD_FLAG in flags["flags"], PARTIAL_FLAG in flags["flags"]) == (ytd, partial)
+
+
+def test_ytd_spellings_the_legacy_scan_missed():
+    record = {"series": [{"period": "2025 YTD", "value": 3}]}
+    assert not legacy_gaps(record)["is_yyd"]
+    assert gap_flags(profile_record(record))["is_yyd"]
+
+
+def test_false_marker_fields_are_not_flagged():
+    # The old scan flagged any mention of "estimated", including a field saying it is not
+    record = {"value": 5, "is_estimated": False}
+    assert legacy_gaps(record)["is_partial"]
+    assert not gap_flags(profile_record(record))["is_partial"]
+
+
+def test_completeness_counts_missing_leaves():
+    profile = profile_record({"a": 1, "b": None, "c": "N/A", "d": {"e": "", "f": "x"}, "g": []})
+    assert (profile["fields"], profile["missing"]) == (6, 4)
+    assert profile["completeness"] == round(2 / 6, 3)
+
+
+def test_staleness_uses_the_record_date_then_the_dataset_date():
+    assert profile_record({"value": 1, "last_update": "2025-01-31T10:00"})["last_update"] == "2025-01-31"
+    assert profile_record({"value": 1}, default_date=date(2024, 6, 1))["last_update"] == "2024-06-01"
+
+    profile = with_staleness(profile_record({"as_of": "2025-01-01"}), today=date(2025, 3, 2))
+    assert profile["staleness_days"] == 60
+    assert gap_flags(profile, stale_days=90)["is_stale"] is False
+    flags = gap_flags(profile, stale_days=30)
+    assert flags["is_stale"] and "60 days ago (2025-01-01)" in flags["flags"][-1]
+    assert gap_flags(profile_record({"value": 1}))["is_stale"] is False
@@ -0,0 +1,84 @@
+"""Dataset registry: refreshes swap in new snapshots without disturbing pinned readers"""
+import json
+import os
+import threading
+
+import pytest
+
+from src.data.registry import DatasetRegistry
+
+
+def _write(path, value):
+    with open(path, "w") as f:
+        json.dump({"value": value, "padding": "x" * value}, f)
+    # Distinct mtimes even on coarse filesystem clocks
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + value * 1_000_000_000))
+
+
+@pytest.fixture
+def registry(tmp_path):
+    _write(tmp_path / "data.json", 1)
+    registry = DatasetRegistry(str(tmp_path), str(tmp_path / "compiled"), use_compiled=False)
+    registry.get("data.json")
+    # The watcher thread only sleeps here; the tests call refresh() themselves
+    registry.start_watching(3600)
+    return registry
+
+
+def test_refresh_keeps_the_pinned_snapshot(registry, tmp_path):
+    builds = []
+
+    def double(doc):
+        builds.append(doc["value"])
+        return doc["value"] * 2
+
+    assert registry.derive("data.json", "double", double) == 2
+    with registry.pin() as snapshot:
+        _write(tmp_path / "data.json", 2)
+        assert registry.refresh()
+
+        assert registry.version == snapshot.version
+        assert registry.get("data.json")["value"] == 1
+        assert registry.derive("data.json", "double", double) == 2
+
+    assert registry.version == snapshot.version + 1
+    assert registry.get("data.json")["value"] == 2
+    # Rebuilt once during the refresh, before the swap
+    assert registry.derive("data.json", "double", double) == 4
+    assert builds == [1, 2]
+
+
+def test_pinned_snapshot_holds_in_other_threads(registry, tmp_path):
+    pinned, refreshed = threading.Event(), threading.Event()
+    seen = []
+
+    def reader():
+        with registry.pin():
+            seen.append(registry.get("data.json")["value"])
+            pinned.set()
+            refreshed.wait(5)
+            seen.append(registry.get("data.json")["value"])
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    pinned.wait(5)
+    _write(tmp_path / "data.json", 3)
+    assert registry.refresh()
+    assert registry.get("data.json")["value"] == 3
+    refreshed.set()
+    thread.join()
+    assert seen == [1, 1]
+
+
+def test_unchanged_files_do_not_swap(registry):
+    version = registry.version
+    assert not registry.refresh()
+    assert registry.version == version
+
+
+def test_unreadable_file_keeps_the_previous_version(registry, tmp_path):
+    with open(tmp_path / "data.json", "w") as f:
+        f.write('{"value": ')
+    assert not registry.refresh()
+    assert registry.get("data.json")["value"] == 1
@@ -0,0 +1,86 @@
+"""Molecule resolver: typos and aliases resolve, different molecules never do"""
+import threading
+
+import pytest
+
+from src.data.resolver import MoleculeResolver, build_resolver, molecule_resolver, resolve_tool_input
+
+
+@pytest.mark.parametrize("query, nearest", [
+    ("Empagliflozin", "Dapagliflozin"),
+    ("Canagliflozin", "Dapagliflozin"),
+    ("Esomeprazole", "Omeprazole"),
+    ("Prednisone", None),
+])
+def test_other_molecules_are_kept_with_suggestions(query, nearest):
+    name, suggestions = resolve_tool_input(query)
+    assert name == query
+    if nearest:
+        assert nearest in suggestions
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Metfromin", "Metformin"),
+    ("Metformn", "Metformin"),
+    ("metformine", "Metformin"),
+    ("Semaglutid", "Semaglutide"),
+    ("Omeprazol", "Omeprazole"),
+    ("Dapagliflozine", "Dapagliflozin"),
+    ("  paracetamol ", "Paracetamol"),
+])
+def test_typos_resolve_without_suggestions(query, expected):
+    assert resolve_tool_input(query) == (expected, [])
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Acetaminophen", "Paracetamol"),
+    ("Ozempic", "Semaglutide"),
+    ("Farxiga", "Dapagliflozin"),
+    ("Humira", "Adalimumab"),
+])
+def test_synonyms_and_brands_resolve_to_the_molecule(query, expected):
+    assert resolve_tool_input(query) == (expected, [])
+
+
+def test_formulations_and_placeholders_are_not_molecules():
+    resolver = molecule_resolver()
+    for name in ("Metformin SR", "Omeprazole Capsules", "Metformin API", "Generics", "Multiple biosimilars"):
+        assert name not in resolver
+    assert "Metformin" in resolver and "Omeprazole" in resolver
+
+
+def test_brands_without_a_molecule_take_it_from_other_rows():
+    resolver = build_resolver([
+        ("Budesonide/Formoterol", None, "molecule"),
+        ("Symbicort", "Budesonide/Formoterol", "brand"),
+        ("Symbicort", None, "brand"),
+        ("Seroflo", None, "brand"),
+    ])
+    assert resolver.canonical("Symbicort") == "Budesonide/Formoterol"
+    assert "Seroflo" not in resolver
+
+
+def test_concurrent_first_lookups_on_an_unfrozen_resolver():
+    resolver = MoleculeResolver()
+    for i in range(2000):
+        resolver.add(f"Molecule{i:04d}")
+    start, results, errors = threading.Barrier(8), [], []
+
+    def lookup():
+        start.wait()
+        try:
+            results.append(resolver.canonical("Molecule0042x"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert results == ["Molecule0042"] * 8
+
+
+def test_published_resolver_is_frozen():
+    assert molecule_resolver()._frozen is not None
@@ -0,0 +1,82 @@
+"""Single-flight: one computation per key, and every caller owns its result"""
+import threading
+
+import pytest
+
+from src.data.singleflight import SingleFlight
+
+
+def _run_concurrently(flight, key, fn, callers):
+    results, errors = [None] * callers, []
+
+    def call(i):
+        try:
+            results[i] = flight.do(key, fn)
+            # Every caller annotates its result in place, as the tools do
+            results[i]["_metadata"] = {"caller": i}
+            results[i]["rows"].append(i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_waiters_get_isolated_copies():
+    flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def fetch():
+        executions.append(1)
+        release.wait(5)
+        return {"molecule": "Semaglutide", "rows": [0]}
+
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    results, errors = _run_concurrently(flight, ("iqvia", "semaglutide"), fetch, 6)
+    timer.join()
+
+    assert not errors
+    assert len(executions) == 1
+    assert flight.stats()["coalesced"] == 5
+    assert len({id(result) for result in results}) == 6
+    assert len({id(result["rows"]) for result in results}) == 6
+    for i, result in enumerate(results):
+        assert result["_metadata"] == {"caller": i}
+        assert result["rows"] == [0, i]
+
+
+def test_leader_changes_after_resolve_do_not_reach_waiters():
+    flight = SingleFlight()
+    call, leader = flight.claim("key")
+    joined, follower = flight.claim("key")
+    assert leader and not follower and joined is call
+
+    result = {"rows": [1]}
+    flight.resolve("key", call, result)
+    result["rows"].append(2)
+
+    first, second = flight.wait(joined), flight.wait(joined)
+    assert first == second == {"rows": [1]}
+    assert first is not second and first["rows"] is not second["rows"]
+
+
+def test_waiters_see_the_leaders_error():
+    flight = SingleFlight()
+    call, _ = flight.claim("key")
+    joined, _ = flight.claim("key")
+    flight.resolve("key", call, error=ValueError("source down"))
+    with pytest.raises(ValueError, match="source down"):
+        flight.wait(joined)
+
+
+def test_next_call_computes_again():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    assert flight.stats()["executions"] == 2
@@ -0,0 +1,74 @@
+"""Streaming JSON: members and records decoded across read boundaries match json.load"""
+import json
+import os
+from collections.abc import Mapping, Sequence
+
+import pytest
+
+from src.data.columnar import compile_dataset, open_compiled
+from src.data.index import RECORD_EXTRACTORS
+from src.data.stream import ArrayStream, iter_members, iter_records
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "src", "data")
+
+
+def _streamed(path, chunk_size):
+    return {key: list(value) if isinstance(value, ArrayStream) else value
+            for key, value in iter_members(path, chunk_size)}
+
+
+def _plain(value):
+    """A compiled value as plain dicts and lists"""
+    if isinstance(value, Mapping):
+        return {key: _plain(value[key]) for key in value}
+    if isinstance(value, Sequence) and not isinstance(value, str):
+        return [_plain(item) for item in value]
+    return value
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+@pytest.mark.parametrize("filename", sorted(RECORD_EXTRACTORS))
+def test_bundled_files_stream_like_json_load(filename, chunk_size):
+    path = os.path.join(DATA_DIR, filename)
+    with open(path) as f:
+        assert _streamed(path, chunk_size) == json.load(f)
+
+
+def test_values_split_at_every_offset(tmp_path):
+    doc = {"n": [0, 12345, -6.02e23, 1.5, True, False, None], "s": "café \"q\" \\ ☃",
+           "records": [{"a": [1, [2, {"b": None}]]}, {}, []], "empty": [], "last": 987654321}
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps(doc, ensure_ascii=False, indent=1))
+    for chunk_size in range(1, 12):
+        assert _streamed(str(path), chunk_size) == doc
+
+
+def test_iter_records_reads_one_section(tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps({"metadata": {"v": 1}, "trials": [{"id": i} for i in range(50)], "tail": 1}))
+    assert list(iter_records(str(path), "trials", chunk_size=5)) == [{"id": i} for i in range(50)]
+    assert list(iter_records(str(path), "missing", chunk_size=5)) == []
+
+
+def test_unread_arrays_are_skipped(tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps({"a": [1, 2, 3], "b": 4}))
+    assert [key for key, _ in iter_members(str(path), chunk_size=2)] == ["a", "b"]
+
+
+@pytest.mark.parametrize("text", ['{"a": [1, 2}', '{"a": 1} trailing', '[1, 2]', '{"a": 1'])
+def test_malformed_files_raise(tmp_path, text):
+    path = tmp_path / "bad.json"
+    path.write_text(text)
+    with pytest.raises(ValueError):
+        _streamed(str(path), 3)
+
+
+@pytest.mark.parametrize("filename", sorted(RECORD_EXTRACTORS))
+def test_bundled_files_compile_to_the_same_values(tmp_path, filename):
+    path = os.path.join(DATA_DIR, filename)
+    compile_dataset(path, str(tmp_path / "out.pcol"))
+    with open(path) as f:
+        expected = json.load(f)
+    with open_compiled(str(tmp_path / "out.pcol")) as document:
+        assert _plain(document) == expected
@@ -0,0 +1,68 @@
+"""Synthetic datasets: valid JSON in the bundled schemas, reproducible from the seed"""
+import json
+import os
+
+import pytest
+
+from src.data.synthetic import generate_datasets
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "src", "data")
+COUNTS = {"trials": 23, "patents": 17, "trade": 30, "markets": 11}
+
+
+@pytest.fixture(scope="module")
+def synthetic(tmp_path_factory):
+    out = tmp_path_factory.mktemp("synthetic")
+    # A chunk size that does not divide the row counts, so rows cross chunk boundaries
+    report = generate_datasets(str(out), molecules=50, chunk_size=7, **COUNTS)
+    return out, report
+
+
+def _load(directory, filename):
+    with open(os.path.join(directory, filename)) as f:
+        return json.load(f)
+
+
+def _sections(doc):
+    return {key: value for key, value in doc.items() if isinstance(value, list) and value
+            and isinstance(value[0], dict)}
+
+
+def test_row_counts(synthetic):
+    out, report = synthetic
+    assert {name: info["rows"] for name, info in report.items()} == {
+        "clinical_trials_mock.json": 23, "uspto_patents_detailed.json": 17, "exim_data.json": 30,
+        "market_overview.json": 11}
+    assert len(_load(out, "clinical_trials_mock.json")["trials"]) == 23
+    assert len(_load(out, "uspto_patents_detailed.json")["patent_families"]) == 17
+    assert sum(len(rows) for rows in _sections(_load(out, "exim_data.json")).values()) == 30
+    assert len(_load(out, "market_overview.json")) == 11
+    assert not [name for name in os.listdir(out) if name.endswith(".tmp")]
+
+
+@pytest.mark.parametrize("filename", ["clinical_trials_mock.json", "uspto_patents_detailed.json", "exim_data.json"])
+def test_records_use_bundled_fields(synthetic, filename):
+    out, _ = synthetic
+    bundled, generated = _sections(_load(DATA_DIR, filename)), _sections(_load(out, filename))
+    assert set(generated) == set(bundled)
+    for section, rows in generated.items():
+        known = set().union(*(record.keys() for record in bundled[section]))
+        for record in rows:
+            assert set(record) <= known, section
+
+
+def test_market_segments_use_bundled_fields(synthetic):
+    out, _ = synthetic
+    known = set().union(*(segment.keys() for segment in _load(DATA_DIR, "market_overview.json").values()))
+    for segment in _load(out, "market_overview.json").values():
+        assert set(segment) <= known
+
+
+def test_same_seed_same_data(synthetic, tmp_path):
+    out, _ = synthetic
+    generate_datasets(str(tmp_path / "same"), molecules=50, chunk_size=7, **COUNTS)
+    for filename in os.listdir(out):
+        assert _load(tmp_path / "same", filename) == _load(out, filename), filename
+    generate_datasets(str(tmp_path / "other"), molecules=50, chunk_size=7, seed=8, trials=23)
+    assert _load(tmp_path / "other", "clinical_trials_mock.json")["trials"] != \
+        _load(out, "clinical_trials_mock.json")["trials"]
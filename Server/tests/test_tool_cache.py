@@ -0,0 +1,87 @@
+"""Tool result cache: entries are keyed on the normalized arguments, the data version and the tool output mode"""
+import json
+
+import pytest
+
+from src.data.registry import DatasetRegistry
+from src.utils import tool_cache as tool_cache_module
+from src.utils.tool_cache import MemoryBackend, SQLiteBackend, ToolCache, ToolCacheBackend, cached_tool, set_tool_cache
+
+
+@pytest.fixture
+def cache():
+    previous = tool_cache_module.current_tool_cache()
+    cache = ToolCache(MemoryBackend(1 << 20))
+    set_tool_cache(cache)
+    yield cache
+    set_tool_cache(previous)
+
+
+@pytest.fixture
+def counting_tool(cache):
+    state = {"version": "v1", "calls": 0}
+
+    @cached_tool("Counting_Tool", version=lambda: state["version"])
+    def lookup(molecule: str, mode: str = "expiring") -> str:
+        state["calls"] += 1
+        return f"{molecule}:{state['calls']}"
+
+    return lookup, state
+
+
+def test_repeated_tool_calls_hit(counting_tool):
+    lookup, state = counting_tool
+    assert lookup("Semaglutide") == "Semaglutide:1"
+    assert lookup("  semaglutide ") == "Semaglutide:1"
+    assert lookup("Semaglutide", mode="expiring") == "Semaglutide:1"
+    assert state["calls"] == 1
+
+
+def test_tool_key_changes_with_the_data_version(counting_tool):
+    lookup, state = counting_tool
+    lookup("Semaglutide")
+    state["version"] = "v2"
+    assert lookup("Semaglutide") == "Semaglutide:2"
+    assert state["calls"] == 2
+
+
+def test_tool_key_changes_with_the_output_mode(counting_tool, monkeypatch):
+    lookup, state = counting_tool
+    lookup("Semaglutide")
+    monkeypatch.setattr(tool_cache_module, "TOOL_OUTPUT_MODE", "json")
+    assert lookup("Semaglutide") == "Semaglutide:2"
+    assert lookup("Semaglutide") == "Semaglutide:2"
+    assert state["calls"] == 2
+
+
+def _write(path, doc):
+    with open(path, "w") as f:
+        json.dump(doc, f)
+
+
+def test_fingerprint_follows_file_contents(tmp_path):
+    _write(tmp_path / "data.json", {"value": 1})
+    before = DatasetRegistry(str(tmp_path), use_compiled=False).fingerprint()
+    assert DatasetRegistry(str(tmp_path), use_compiled=False).fingerprint() == before
+    _write(tmp_path / "data.json", {"value": 22})
+    assert DatasetRegistry(str(tmp_path), use_compiled=False).fingerprint() != before
+
+
+def test_sqlite_backend_is_shared_and_expires(tmp_path, monkeypatch):
+    path = str(tmp_path / "tool_cache.sqlite")
+    SQLiteBackend(path, 1 << 20).put("key", "Patent_Search", "result", ttl=60)
+    other = SQLiteBackend(path, 1 << 20)
+    assert other.get("key") == "result"
+    assert other.get("missing") is None
+    monkeypatch.setattr("src.data.sqlite_lru.time.time", lambda: 10 ** 12)
+    assert other.get("key") is None
+    assert other.stats()["entries"] == 0
+
+
+def test_backend_interface_requires_get_and_put():
+    class WriteOnly(ToolCacheBackend):
+        def put(self, key, tool, value, ttl):
+            pass
+
+    with pytest.raises(TypeError):
+        WriteOnly()
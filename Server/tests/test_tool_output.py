@@ -0,0 +1,74 @@
+"""Tool output: compact tables and the token budget"""
+import json
+
+import pytest
+
+from src.utils.tool_output import CHARS_PER_TOKEN, compact, estimate_tokens, fit_budget, format_tool_result
+
+
+def _records(n):
+    return [{"molecule": "metformin", "country": f"C{i}", "value": i * 10, "note": None} for i in range(n)]
+
+
+def test_compact_hoists_constant_fields_and_drops_nulls():
+    assert compact({"data": _records(3), "empty": None}) == {"data": {
+        "columns": ["country", "value"],
+        "rows": [["C0", 0], ["C1", 10], ["C2", 20]],
+        "same": {"molecule": "metformin"},
+    }}
+
+
+def test_small_results_are_not_cut():
+    value = compact({"data": _records(5)})
+    assert json.loads(fit_budget(value, 1000)) == value
+
+
+@pytest.mark.parametrize("max_tokens", [100, 300])
+def test_large_tables_are_halved_with_a_summary(max_tokens):
+    text = fit_budget(compact({"data": _records(500), "source": "IQVIA"}), max_tokens)
+    assert estimate_tokens(text) <= max_tokens
+    result = json.loads(text)
+    table = result["data"]
+    assert table["truncated"]["rows_total"] == 500
+    assert table["truncated"]["ranges"] == {"value": [0, 4990]}
+    assert table["truncated"]["rows_shown"] == len(table["rows"])
+    # Rows are kept from the head, in order
+    assert table["rows"] == [[f"C{i}", i * 10] for i in range(len(table["rows"]))]
+    assert result["source"] == "IQVIA"
+
+
+def test_long_strings_are_clipped_before_lists_are_cut():
+    value = {"summary": "x" * 5000, "items": list(range(20))}
+    result = json.loads(fit_budget(value, 250))
+    assert result["items"] == list(range(20))
+    assert result["summary"].startswith("xxx") and result["summary"].endswith("…")
+    assert len(result["summary"]) < 5000
+
+
+def test_plain_lists_report_how_many_items_are_hidden():
+    value = {"ids": [f"NCT{i:08d}" for i in range(400)]}
+    result = json.loads(fit_budget(value, 200))
+    shown, marker = result["ids"][:-1], result["ids"][-1]
+    assert shown == [f"NCT{i:08d}" for i in range(len(shown))]
+    assert marker == f"…{400 - len(shown)} more"
+
+
+def test_oversized_entries_are_omitted_with_their_size():
+    value = {"keep": 1, "blob": {f"k{i}": i for i in range(200)}}
+    result = json.loads(fit_budget(value, 60))
+    assert result["keep"] == 1
+    assert result["blob"].startswith("…omitted (")
+
+
+@pytest.mark.parametrize("max_tokens", [20, 50, 120])
+def test_many_small_entries_stay_within_budget(max_tokens):
+    value = {f"key{i}": f'"q{i}"' for i in range(300)}
+    text = fit_budget(value, max_tokens)
+    assert len(text) <= max_tokens * CHARS_PER_TOKEN
+    assert json.loads(text)["chars_total"] > max_tokens * CHARS_PER_TOKEN
+
+
+def test_json_mode_keeps_everything():
+    data = {"data": _records(500)}
+    text = format_tool_result(data, notes={"source": "mock"}, mode="json", max_tokens=10)
+    assert json.loads(text) == {**data, "_metadata": {"source": "mock"}}
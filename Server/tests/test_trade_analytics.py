@@ -0,0 +1,88 @@
+"""Trade analytics: vectorized metrics against per-series loops, compiled input against JSON"""
+import json
+import math
+
+import numpy as np
+import pytest
+
+from src.data.columnar import compile_dataset, open_compiled
+from src.data.synthetic import generate_datasets
+from src.data.trade_analytics import SECTIONS, build_trade_analytics, cagr, convert_units, yoy_growth, zscores
+
+
+@pytest.fixture(scope="module")
+def matrix():
+    rng = np.random.default_rng(3)
+    values = rng.uniform(0, 100, (200, 6))
+    values[rng.random(values.shape) < 0.15] = np.nan
+    values[rng.random(values.shape) < 0.05] = 0.0
+    return values
+
+
+def test_convert_units():
+    assert convert_units([1.5, 2], "tonnes").tolist() == [1500.0, 2000.0]
+    assert convert_units([2500], "g", "kg").tolist() == [2.5]
+    assert convert_units([3], "kg", "MT").tolist() == [0.003]
+    assert convert_units([7], "packs").tolist() == [7.0]
+
+
+def test_yoy_growth_matches_a_loop(matrix):
+    growth = yoy_growth(matrix)
+    for r, row in enumerate(matrix):
+        for c in range(len(row) - 1):
+            before, after = row[c], row[c + 1]
+            expected = (after - before) / before * 100 if before > 0 else math.nan
+            assert growth[r, c] == pytest.approx(expected, nan_ok=True)
+
+
+def test_cagr_matches_a_loop(matrix):
+    years = np.arange(2019, 2025)
+    result = cagr(matrix, years)
+    for r, row in enumerate(matrix):
+        present = [(year, v) for year, v in zip(years, row) if not math.isnan(v)]
+        expected = math.nan
+        if len(present) >= 2:
+            (y0, start), (y1, end) = present[0], present[-1]
+            if start > 0 and end >= 0:
+                expected = ((end / start) ** (1 / (y1 - y0)) - 1) * 100
+        assert result[r] == pytest.approx(expected, nan_ok=True)
+
+
+def test_zscores_match_nan_statistics(matrix):
+    z = zscores(matrix, axis=0)
+    mean, std = np.nanmean(matrix, axis=0), np.nanstd(matrix, axis=0)
+    expected = np.where(np.isnan(matrix), 0.0, (matrix - mean) / std)
+    np.testing.assert_allclose(z, expected)
+    assert not zscores(np.full((4, 2), 5.0)).any()
+
+
+@pytest.fixture(scope="module")
+def exim(tmp_path_factory):
+    out = tmp_path_factory.mktemp("exim")
+    generate_datasets(str(out), trade=400, molecules=30, chunk_size=64)
+    compile_dataset(str(out / "exim_data.json"), str(out / "exim.pcol"))
+    with open(out / "exim_data.json") as f:
+        return json.load(f), str(out / "exim.pcol")
+
+
+def test_compiled_sections_give_the_same_rows(exim):
+    doc, compiled = exim
+    from_json = build_trade_analytics(doc)
+    with open_compiled(compiled) as document:
+        from_columns = build_trade_analytics(document)
+        for section in SECTIONS:
+            assert len(from_columns[section]) == len(doc[section])
+            for pos in range(len(doc[section])):
+                assert from_columns[section].row(pos) == from_json[section].row(pos)
+
+
+def test_rows_standardize_units_and_flag_erosion(exim):
+    doc, _ = exim
+    record = doc["api_exports"][0]
+    row = build_trade_analytics(doc)["api_exports"].row(0)
+    assert row["volume_unit"] == "kg"
+    years = sorted(record["yearwise_volume_tonnes"], key=int)
+    assert row["volume"] == [round(record["yearwise_volume_tonnes"][y] * 1000, 2) for y in years]
+    assert row["price_erosion"] == (row["cagr_percent"]["unit_price"] is not None
+                                    and row["cagr_percent"]["unit_price"] < 0)
+    assert all(abs(o["z_score"]) > 2 for o in row["outliers"])
@@ -0,0 +1,86 @@
+"""Trial store: indexed SQL queries return what the Python filtering over the trial list did"""
+import json
+import os
+from collections import Counter
+
+import pytest
+
+from src.data import MockDataSources
+from src.data.index import build_dataset_index, tokenize
+from src.data.synthetic import generate_datasets
+from src.data.trial_store import TRIALS_FILE, TrialStore, build_trial_store
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    out = tmp_path_factory.mktemp("trials")
+    generate_datasets(str(out), trials=3000, molecules=40, seed=3)
+    with open(os.path.join(out, TRIALS_FILE)) as f:
+        doc = json.load(f)
+    path = os.path.join(out, "trials.sqlite")
+    build_trial_store(doc["trials"], path, (1, 1))
+    return doc, TrialStore(path)
+
+
+def _ids(trials):
+    return [trial["trial_id"] for trial in trials]
+
+
+def _sponsor(trial):
+    sponsor = trial.get("sponsor")
+    return sponsor.get("name") if isinstance(sponsor, dict) else sponsor
+
+
+def _python_filter(trials, molecule="", phase=None, status=None, therapy_area="", sponsor="",
+                   completion_after="", completion_before=""):
+    tokens = set(tokenize(molecule))
+    phases = {p.lower() for p in phase or []}
+    statuses = {s.lower() for s in status or []}
+    return [
+        t for t in trials
+        if (not molecule or tokens and tokens <= set(tokenize(t.get("molecule") or "")))
+        and (not phases or (t.get("phase") or "").lower() in phases)
+        and (not statuses or (t.get("status") or "").lower() in statuses)
+        and (not therapy_area or therapy_area.lower() in (t.get("therapy_area") or "").lower())
+        and (not sponsor or (_sponsor(t) or "").lower() == sponsor.lower())
+        and (not completion_after or (t.get("estimated_completion_date") or "") >= completion_after)
+        and (not completion_before or (t.get("estimated_completion_date") or "") < completion_before)
+    ]
+
+
+def test_molecule_results_match_the_index_path(dataset):
+    doc, store = dataset
+    trials = doc["trials"]
+    index = build_dataset_index(TRIALS_FILE, doc)
+    for molecule in sorted({t["molecule"] for t in trials})[:10]:
+        matches = index.lookup(molecule, fields=("molecule",))
+        old = MockDataSources._clinical_trials_result(molecule, doc, matches)
+        new = MockDataSources._format_trials(
+            molecule, store.trials(molecule=molecule),
+            store.group_counts("phase", molecule=molecule), store.group_counts("status", molecule=molecule))
+        assert new == old
+        assert list(new["pipeline_summary"]["by_phase"]) == list(old["pipeline_summary"]["by_phase"])
+
+
+@pytest.mark.parametrize("filters", [
+    {"phase": ["Phase 3"], "status": ["Recruiting", "Active, not recruiting"]},
+    {"phase": ["phase 2"], "therapy_area": "oncology"},
+    {"status": ["Completed"], "completion_after": "2024-01-01", "completion_before": "2026-01-01"},
+    {"sponsor": "novo nordisk", "phase": ["Phase 1", "Phase 4"]},
+    {"molecule": "no such molecule"},
+    {},
+])
+def test_filters_match_python_filtering(dataset, filters):
+    doc, store = dataset
+    expected = _python_filter(doc["trials"], **filters)
+    assert _ids(store.trials(**filters)) == _ids(expected)
+    assert store.count(**filters) == len(expected)
+    assert store.group_counts("sponsor", **filters) == dict(Counter(_sponsor(t) or "Unknown" for t in expected))
+    total = sum(t.get("sample_size") or 0 for t in expected)
+    assert store.enrollment(**filters)["total"] == total
+
+
+def test_pagination_follows_dataset_order(dataset):
+    doc, store = dataset
+    expected = _python_filter(doc["trials"], phase=["Phase 2"])
+    assert _ids(store.trials(limit=25, offset=50, phase=["Phase 2"])) == _ids(expected[50:75])
@@ -0,0 +1,64 @@
+"""Web result cache and the SQLite LRU store it shares with the tool and chat caches"""
+import sqlite3
+
+import pytest
+
+from src.data.sqlite_lru import SQLiteLRU
+from src.data.web_cache import WebResultCache, normalize_query
+
+
+def _accessed(path, key):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT accessed FROM entries WHERE key = ?", (key,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.sqlite")
+
+
+def test_reworded_queries_share_an_entry(path):
+    cache = WebResultCache(path, {"general": 100.0})
+    assert normalize_query("NICE guidelines for asthma 2024") == normalize_query("asthma 2024 nice Guidelines")
+    cache.put("NICE guidelines for asthma 2024", {"results": [1]}, now=0)
+    assert cache.get("asthma 2024 nice Guidelines", now=1) == {"results": [1]}
+    assert cache.stats()["hits"] == 1
+
+
+def test_entries_expire_by_source_type(path):
+    cache = WebResultCache(path, {"news": 10.0, "guidelines": 1000.0})
+    cache.put("latest semaglutide news", {"n": 1}, now=0)
+    cache.put("asthma guidelines", {"g": 1}, now=0)
+    assert cache.get("latest semaglutide news", now=11) is None
+    assert cache.get("asthma guidelines", now=11) == {"g": 1}
+    stats = cache.stats()
+    assert stats["expired"] == 1 and stats["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(path):
+    store = SQLiteLRU(path, max_bytes=250, touch_interval=0)
+    for i, key in enumerate("abc"):
+        store.put(key, b"x" * 100, expires=1000, now=i)
+    assert store.get("a", now=1) is None
+    store.put("d", b"x" * 100, expires=1000, now=3)
+    store.get("c", now=4)
+    store.put("e", b"x" * 100, expires=1000, now=5)
+    assert store.get("b", now=6) is None and store.get("d", now=6) is None
+    assert store.get("c", now=6) is not None and store.get("e", now=6) is not None
+
+
+def test_hits_only_touch_entries_after_the_interval(path):
+    store = SQLiteLRU(path, max_bytes=1 << 20, touch_interval=60)
+    store.put("key", b"value", expires=10_000, now=100)
+    assert store.get("key", now=130) == (b"value", 100)
+    assert _accessed(path, "key") == 100
+    store.get("key", now=161)
+    assert _accessed(path, "key") == 161
+
+
+def test_entries_survive_a_new_instance(path):
+    WebResultCache(path).put("metformin market", {"rows": 3})
+    assert WebResultCache(path).get("market metformin") == {"rows": 3}